@@ -0,0 +1,9 @@
+"""Deterministic benchmarks for the OCR/translate pipeline.
+
+Run ``python -m benchmarks`` (``--profile full`` for the 1M/10M cache sizes)
+and compare two result files with ``python -m benchmarks --compare old.json
+new.json``.  Translator, OCR and LLM backends are fakes with seeded latency
+and failure rates (see :mod:`benchmarks.fakes`), and the input PDFs are
+generated on the fly (see :mod:`benchmarks.synthetic`), so two runs on the
+same machine do the same work and differ only in how fast the code is.
+"""
@@ -0,0 +1,151 @@
+import argparse
+import copy
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.common import (
+    DEFAULT_REGRESSION_THRESHOLD,
+    compare_results,
+    environment,
+    save_results,
+)
+
+BENCHMARKS = ("cache", "pipeline", "llm", "startup", "rate_limit")
+
+# 지연은 초 단위. quick 은 개발 중 반복 실행용, full 은 릴리스 전 비교용.
+PROFILES = {
+    "quick": {
+        "seed": 1234,
+        "pages": 24,
+        "ocr_workers": 4,
+        "pages_per_batch": 2,
+        "cache_sizes": [10_000, 100_000],
+        "cache_lookups": 5_000,
+        "llm_single_calls": 100,
+        "startup_repeats": 3,
+        "startup_documents": 5,
+        # 로컬 가짜 서버의 한도와 지연 (429 는 Retry-After 초 뒤 재시도)
+        "rate_limit": {
+            "requests": 300, "workers": 16, "server_rps": 100, "server_concurrency": 8,
+            "retry_after": 0.2, "error_rate": 0.02, "latency": 0.01, "latency_per_request": 0.002,
+            "max_attempts": 6,
+        },
+        "translator": {"base": 0.02, "per_item": 0.0005, "jitter": 0.01, "failure_rate": 0.02},
+        "ocr": {"base": 0.05, "jitter": 0.02, "failure_rate": 0.02},
+        "llm": {"base": 0.05, "per_item": 0.01, "jitter": 0.02, "failure_rate": 0.0},
+    },
+    "full": {
+        "seed": 1234,
+        "pages": 200,
+        "ocr_workers": 6,
+        "pages_per_batch": 2,
+        "cache_sizes": [10_000, 100_000, 1_000_000, 10_000_000],
+        "cache_lookups": 20_000,
+        "llm_single_calls": 400,
+        "startup_repeats": 7,
+        "startup_documents": 20,
+        "rate_limit": {
+            "requests": 2000, "workers": 32, "server_rps": 200, "server_concurrency": 16,
+            "retry_after": 0.5, "error_rate": 0.02, "latency": 0.05, "latency_per_request": 0.005,
+            "max_attempts": 6,
+        },
+        "translator": {"base": 0.05, "per_item": 0.001, "jitter": 0.03, "failure_rate": 0.02},
+        "ocr": {"base": 0.2, "jitter": 0.1, "failure_rate": 0.01},
+        "llm": {"base": 0.3, "per_item": 0.02, "jitter": 0.1, "failure_rate": 0.0},
+    },
+}
+
+
+def _load(name):
+    if name == "cache":
+        from benchmarks import bench_cache as module
+    elif name == "pipeline":
+        from benchmarks import bench_pipeline as module
+    elif name == "startup":
+        from benchmarks import bench_startup as module
+    elif name == "rate_limit":
+        from benchmarks import bench_rate_limit as module
+    else:
+        from benchmarks import bench_llm as module
+    return module
+
+
+def _run_isolated(name, config):
+    """Run one benchmark in a fresh interpreter so peak RSS is not shared between them.
+
+    The child writes its results to a file: imported libraries may print to
+    stdout (PyMuPDF's deprecation notice, for one).
+    """
+    with tempfile.TemporaryDirectory(prefix="bench-") as tmp:
+        output = Path(tmp) / f"{name}.json"
+        completed = subprocess.run(
+            [sys.executable, "-m", "benchmarks", "--only", name, "--in-process",
+             "--config-json", json.dumps(config), "--output", str(output)],
+            capture_output=True, text=True,
+        )
+        if completed.returncode != 0 or not output.exists():
+            lines = completed.stderr.strip().splitlines()
+            return {"error": lines[-1] if lines else f"exit status {completed.returncode}"}
+        return json.loads(output.read_text(encoding="utf-8"))["benchmarks"][name]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks",
+                                     description="Run the deterministic benchmark suite")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="quick")
+    parser.add_argument("--only", action="append", choices=BENCHMARKS,
+                        help="run only these benchmarks (repeatable)")
+    parser.add_argument("--cache-sizes", type=lambda v: [int(x) for x in v.split(",")],
+                        help="comma-separated cache entry counts")
+    parser.add_argument("--pages", type=int, help="pages per synthetic document")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--workdir", help="directory for temporary databases and PDFs")
+    parser.add_argument("-o", "--output", help="result JSON path ('-' for stdout)")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"),
+                        help="compare two result files and exit non-zero on regressions")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD)
+    parser.add_argument("--in-process", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--config-json", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        baseline, current = (json.loads(Path(p).read_text(encoding="utf-8")) for p in args.compare)
+        regressions = compare_results(baseline, current, args.threshold)
+        for metric, before, after, change in regressions:
+            print(f"REGRESSION {metric}: {before} -> {after} ({change:+.1%})")
+        print(f"{len(regressions)} regression(s) above {args.threshold:.0%}")
+        return 1 if regressions else 0
+
+    if args.config_json:
+        config = json.loads(args.config_json)
+    else:
+        config = copy.deepcopy(PROFILES[args.profile])
+        config["profile"] = args.profile
+        for key in ("cache_sizes", "pages", "seed", "workdir"):
+            if getattr(args, key) is not None:
+                config[key] = getattr(args, key)
+
+    results = {"environment": environment(), "config": config, "benchmarks": {}}
+    for name in args.only or BENCHMARKS:
+        started = time.perf_counter()
+        if args.in_process:
+            results["benchmarks"][name] = _load(name).run(config)
+        else:
+            print(f"[bench] {name} ...", file=sys.stderr)
+            results["benchmarks"][name] = _run_isolated(name, config)
+            print(f"[bench] {name} {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+    if args.output == "-":
+        json.dump(results, sys.stdout, ensure_ascii=False, indent=2)
+        return 0
+    output = args.output or f"benchmarks/results/{time.strftime('%Y%m%d-%H%M%S')}.json"
+    print(f"결과 저장: {save_results(results, output)}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+"""Cache hit/miss latency and fill rate at increasing entry counts."""
+
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.common import Stopwatch, latency_summary, peak_rss_mb, rate
+from core.cache_handler import TranslationCacheManager
+from core.fuzzy_tm import FuzzyTranslationMemory
+from core.memory_cache import MemoryLRUCache
+from core.rewrite_cache_manager import RewriteCacheManager
+
+FILL_CHUNK = 50_000
+GET_MANY_SIZE = 256
+# 메모리 계층은 프로세스 안에 모두 올라가므로 이 크기까지만 잰다.
+MAX_MEMORY_TIER_ENTRIES = 1_000_000
+# 근사 색인은 문장마다 MinHash 를 계산하므로 이 크기까지만 잰다.
+MAX_FUZZY_ENTRIES = 100_000
+FUZZY_SCOPE = "en>ko"
+
+
+def cache_key(index):
+    return f"en>ko\tsynthetic sentence number {index:010d} for the cache benchmark"
+
+
+def cache_value(index):
+    return f"캐시 벤치마크용 합성 문장 {index:010d}"
+
+
+def cache_items(start, stop):
+    for index in range(start, stop):
+        yield cache_key(index), cache_value(index)
+
+
+def _fill(put_many, size):
+    with Stopwatch() as watch:
+        for start in range(0, size, FILL_CHUNK):
+            put_many(cache_items(start, min(start + FILL_CHUNK, size)))
+    return {"seconds": round(watch.seconds, 3), "entries_per_second": rate(size, watch.seconds)}
+
+
+def _probe(get, get_many, size, lookups, seed):
+    rng = random.Random(seed)
+    hit_keys = [cache_key(rng.randrange(size)) for _ in range(lookups)]
+    miss_keys = [cache_key(size + rng.randrange(size)) for _ in range(lookups)]
+
+    def _timed(keys, expect_hit):
+        samples = []
+        wrong = 0
+        for key in keys:
+            started = time.perf_counter()
+            value = get(key)
+            samples.append(time.perf_counter() - started)
+            wrong += (value is None) == expect_hit
+        return samples, wrong
+
+    hit_samples, hit_errors = _timed(hit_keys, True)
+    miss_samples, miss_errors = _timed(miss_keys, False)
+    with Stopwatch() as watch:
+        for start in range(0, len(hit_keys), GET_MANY_SIZE):
+            get_many(hit_keys[start:start + GET_MANY_SIZE])
+    return {
+        "hit_us": latency_summary(hit_samples, unit=1e6),
+        "miss_us": latency_summary(miss_samples, unit=1e6),
+        "get_many_keys_per_second": rate(len(hit_keys), watch.seconds),
+        "wrong_answers": hit_errors + miss_errors,
+    }
+
+
+def bench_translation_cache(size, lookups, seed, workdir):
+    manager = TranslationCacheManager(base_dir=workdir, memory_cache=False)
+    try:
+        result = {"fill": _fill(manager.put_many, size)}
+        result.update(_probe(manager.get_entry, manager.get_many, size, lookups, seed))
+    finally:
+        manager.close_all()
+    return result
+
+
+def bench_rewrite_cache(size, lookups, seed, workdir):
+    manager = RewriteCacheManager(db_path=Path(workdir) / "rewrite.db", memory_cache=False)
+    try:
+        result = {"fill": _fill(manager.put_many, size)}
+        result.update(_probe(manager.get, manager.get_many, size, lookups, seed))
+    finally:
+        manager.close()
+    return result
+
+
+def bench_memory_tier(size, lookups, seed):
+    cache = MemoryLRUCache(max_entries=size, max_bytes=1 << 40, name="bench")
+    result = {"fill": _fill(cache.set_many, size)}
+    result.update(_probe(cache.get, cache.get_many, size, lookups, seed))
+    return result
+
+
+def _ocr_noise(text, rng):
+    """Drop, insert or replace one letter (digits are left alone)."""
+    positions = [i for i, char in enumerate(text) if char.isalpha()]
+    i = rng.choice(positions)
+    op = rng.randrange(3)
+    if op == 0:
+        return text[:i] + text[i + 1:]
+    if op == 1:
+        return text[:i] + rng.choice("lI ") + text[i:]
+    return text[:i] + rng.choice("rnm") + text[i + 1:]
+
+
+def bench_fuzzy_tm(size, lookups, seed, workdir):
+    """Fill rate, and hit rate/latency for noisy copies of cached keys and for unseen keys."""
+    memory = FuzzyTranslationMemory(Path(workdir) / "fuzzy_tm.db")
+    try:
+        with Stopwatch() as watch:
+            for start in range(0, size, FILL_CHUNK):
+                memory.add_many(FUZZY_SCOPE, cache_items(start, min(start + FILL_CHUNK, size)))
+        result = {
+            "fill": {"seconds": round(watch.seconds, 3), "entries_per_second": rate(size, watch.seconds)}
+        }
+        rng = random.Random(seed)
+        noisy = []
+        for _ in range(lookups):
+            index = rng.randrange(size)
+            noisy.append((_ocr_noise(cache_key(index), rng), cache_value(index)))
+        unseen = [cache_key(size + rng.randrange(size)) for _ in range(lookups)]
+
+        samples = []
+        hits = wrong = 0
+        for text, expected in noisy:
+            started = time.perf_counter()
+            match = memory.lookup(FUZZY_SCOPE, text)
+            samples.append(time.perf_counter() - started)
+            hits += match is not None
+            wrong += match is not None and match.value != expected
+        miss_samples = []
+        for text in unseen:
+            started = time.perf_counter()
+            match = memory.lookup(FUZZY_SCOPE, text)
+            miss_samples.append(time.perf_counter() - started)
+            # 번호만 다른 문장은 재사용하면 안 된다.
+            wrong += match is not None
+        result.update(
+            {
+                "noisy_hit_rate": round(hits / len(noisy), 4) if noisy else 0.0,
+                "hit_us": latency_summary(samples, unit=1e6),
+                "miss_us": latency_summary(miss_samples, unit=1e6),
+                "wrong_answers": wrong,
+            }
+        )
+    finally:
+        memory.close()
+    return result
+
+
+def run(config):
+    sizes = config["cache_sizes"]
+    lookups = config["cache_lookups"]
+    seed = config["seed"]
+    results = {}
+    for size in sizes:
+        entry = {}
+        with tempfile.TemporaryDirectory(prefix="bench-cache-", dir=config.get("workdir")) as tmp:
+            entry["translation_cache"] = bench_translation_cache(
+                size, lookups, seed, Path(tmp) / "translation"
+            )
+            entry["rewrite_cache"] = bench_rewrite_cache(size, lookups, seed, tmp)
+            if size <= MAX_FUZZY_ENTRIES:
+                entry["fuzzy_tm"] = bench_fuzzy_tm(size, lookups, seed, tmp)
+        if size <= MAX_MEMORY_TIER_ENTRIES:
+            entry["memory_tier"] = bench_memory_tier(size, lookups, seed)
+        entry["peak_rss_mb"] = peak_rss_mb()
+        results[f"{size}"] = entry
+    return results
@@ -0,0 +1,103 @@
+"""Request count, throughput and prompt growth of the LLM clients against fake models."""
+
+import tempfile
+from pathlib import Path
+
+from benchmarks import fakes, synthetic
+from benchmarks.common import Stopwatch, rate
+from core.gpt_refiner import GptRefiner
+from core.rate_limiter import BackendScheduler
+from core.rewrite_cache_manager import RewriteCacheManager
+from gemini_context import RollingContext
+from gemini_ocr_translate import GeminiOCRTranslate
+
+# 묶음 리라이팅 응답 중 항목 수가 어긋나는 비율 (항목별 대체 경로 측정용)
+REFINE_MISMATCH_RATE = 0.05
+
+
+def _unlimited():
+    # 가짜 모델에는 할당량이 없으므로 실제 API 기본 한도 대신 재시도만 하는 스케줄러를 쓴다.
+    return BackendScheduler("fake")
+
+
+def _sentences(config):
+    text = " ".join(synthetic.page_text(i, config["seed"]) for i in range(config["pages"]))
+    return [sentence.strip() + "." for sentence in text.split(".") if sentence.strip()]
+
+
+def _run(client, call):
+    with Stopwatch() as watch:
+        call()
+    return {
+        "requests": client.stats["requests"],
+        "seconds": round(watch.seconds, 3),
+        "requests_per_second": rate(client.stats["requests"], watch.seconds),
+    }
+
+
+def _refine(profile, sentences, workdir, **options):
+    client = fakes.FakeChatClient(profile, mismatch_rate=REFINE_MISMATCH_RATE)
+    cache = RewriteCacheManager(db_path=Path(workdir) / "rewrite.db", memory_cache=False)
+    try:
+        refiner = GptRefiner(client=client, cache=cache, scheduler=_unlimited(), **options)
+        with Stopwatch() as watch:
+            refiner.refine_many(sentences)
+        # 두 번째 실행은 모두 캐시에서 나와야 한다.
+        calls = client.calls
+        with Stopwatch() as cached:
+            refiner.refine_many(sentences)
+    finally:
+        cache.close()
+    return {
+        "requests": calls,
+        "seconds": round(watch.seconds, 3),
+        "sentences_per_second": rate(len(sentences), watch.seconds),
+        "prompt_chars": client.prompt_chars,
+        "cached_rerun_seconds": round(cached.seconds, 3),
+        "cached_rerun_requests": client.calls - calls,
+    }
+
+
+def run(config):
+    sentences = _sentences(config)
+    profile = fakes.BackendProfile(seed=config["seed"], **config["llm"])
+    results = {"config": {"sentences": len(sentences), "llm": profile.as_dict()}}
+
+    single = GeminiOCRTranslate(model=fakes.FakeGeminiModel(profile), scheduler=_unlimited())
+    sample = sentences[: config["llm_single_calls"]]
+    results["translate_text"] = _run(single, lambda: [single.translate_text(s) for s in sample])
+    results["translate_text"]["sentences_per_second"] = rate(
+        len(sample), results["translate_text"]["seconds"]
+    )
+
+    batched = GeminiOCRTranslate(model=fakes.FakeGeminiModel(profile), scheduler=_unlimited())
+    results["translate_batch"] = _run(batched, lambda: batched.translate_batch(sentences))
+    results["translate_batch"]["sentences_per_second"] = rate(
+        len(sentences), results["translate_batch"]["seconds"]
+    )
+
+    # 긴 세션에서 맥락이 붙은 프롬프트 크기가 평평하게 유지되는지 확인
+    context = RollingContext()
+    session = GeminiOCRTranslate(
+        model=fakes.FakeGeminiModel(profile), context=context, scheduler=_unlimited()
+    )
+    results["rolling_context"] = _run(
+        session, lambda: [session.translate_text(s) for s in sample]
+    )
+    sizes = list(context.prompt_sizes)
+    quarter = max(len(sizes) // 4, 1)
+    results["rolling_context"].update(
+        {
+            "first_quarter_prompt_tokens": round(sum(sizes[:quarter]) / quarter, 1),
+            "last_quarter_prompt_tokens": round(sum(sizes[-quarter:]) / quarter, 1),
+            "max_prompt_tokens": max(sizes) if sizes else 0,
+        }
+    )
+
+    # 리라이팅: 한 문장씩 요청 vs 번호 묶음 + 동시 요청
+    with tempfile.TemporaryDirectory(prefix="bench-llm-", dir=config.get("workdir")) as tmp:
+        results["refine_single"] = _refine(
+            profile, sample, Path(tmp) / "single", max_segments=1, concurrency=1
+        )
+        results["refine_batched"] = _refine(profile, sentences, Path(tmp) / "batched")
+    return results
@@ -0,0 +1,212 @@
+"""Per-stage and end-to-end throughput of the document pipeline on synthetic PDFs."""
+
+import asyncio
+import tempfile
+import threading
+import time
+from multiprocessing import Pool
+from pathlib import Path
+
+import fitz
+
+from benchmarks import fakes, synthetic
+from benchmarks.common import Stopwatch, check, latency_summary, peak_rss_mb, rate
+from core.document_engine import DocumentTranslator, _is_failed_result
+from core.memory_cache import get_shared_cache
+from core.page_source import publish_pixmap, release_shared
+from core.pdf_overlay import write_text_on_pdf
+from core.pipeline import run_page_pipeline
+
+# 공유 풀 검사: 문서 두 개가 페이지마다 이만큼 걸리는 OCR 을 동시에 돌린다.
+CHECK_PAGES = 24
+CHECK_OCR_SECONDS = 0.05
+
+
+class InstrumentedTranslator(DocumentTranslator):
+    """Records the OCR and translation service time of every page."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.ocr_seconds = {}
+        self.translate_seconds = {}
+
+    def _translate_ocr_results(self, ocr_results):
+        started = time.perf_counter()
+        results = super()._translate_ocr_results(ocr_results)
+        elapsed = time.perf_counter() - started
+        for i, _text, seconds in ocr_results:
+            self.ocr_seconds[i] = seconds
+            # 여러 페이지를 한 요청으로 묶었다면 그 시간을 페이지 수로 나눠 배분한다.
+            self.translate_seconds[i] = elapsed / len(ocr_results)
+        return results
+
+
+def _clear_memory_tiers():
+    get_shared_cache("sentence_translation").clear()
+    get_shared_cache("language_detection").clear()
+
+
+def bench_rasterize(pdf_path):
+    samples = []
+    with fitz.open(str(pdf_path)) as doc:
+        for page in doc:
+            started = time.perf_counter()
+            pix = page.get_pixmap(dpi=200, colorspace=fitz.csGRAY, alpha=False)
+            shm, _descriptor = publish_pixmap(pix)
+            samples.append(time.perf_counter() - started)
+            release_shared(shm)
+    return {
+        "pages_per_second": rate(len(samples), sum(samples)),
+        "page_ms": latency_summary(samples),
+    }
+
+
+def bench_ocr_stage(pool, pages):
+    jobs = [(i, b"", False) for i in range(pages)]
+    with Stopwatch() as watch:
+        results = list(pool.imap_unordered(fakes.fake_ocr_page, jobs, chunksize=1))
+    return {
+        "pages_per_second": rate(len(results), watch.seconds),
+        "page_ms": latency_summary([seconds for _, _, seconds in results]),
+        "failed_pages": sum("OCR 실패" in text for _, text, _ in results),
+    }
+
+
+def bench_translate_stage(config, profile):
+    texts = [(i, synthetic.page_text(i, config["seed"])) for i in range(config["pages"])]
+    engine = DocumentTranslator(
+        "<memory>", manager_factory=fakes.manager_factory(profile), resume=False
+    )
+    result = {}
+    try:
+        for label in ("cold", "warm"):
+            if label == "cold":
+                _clear_memory_tiers()
+            engine.stats.clear()
+            with Stopwatch() as watch:
+                engine._translate_pages(texts)
+            result[label] = {
+                "pages_per_second": rate(len(texts), watch.seconds),
+                "sentences_per_second": rate(engine.stats["sentences"], watch.seconds),
+                "translated_sentences": engine.stats["translated_sentences"],
+                "memory_hits": engine.stats["memory_hits"],
+            }
+    finally:
+        engine._close_managers()
+    return result
+
+
+def bench_end_to_end(config, pdf_path, pool, profile):
+    _clear_memory_tiers()
+    engine = InstrumentedTranslator(
+        str(pdf_path),
+        resume=False,
+        pool=pool,
+        manager_factory=fakes.manager_factory(profile),
+        ocr_fn=fakes.fake_ocr_page,
+    )
+    engine.cache_enabled = False
+    engine.pages_per_batch = config["pages_per_batch"]
+    emitted = {}
+    started = time.perf_counter()
+
+    def _on_page(index, result):
+        emitted[index] = (time.perf_counter() - started, result)
+
+    with Stopwatch() as watch:
+        engine.process(_on_page)
+    service = [
+        engine.ocr_seconds[i] + engine.translate_seconds[i] for i in engine.translate_seconds
+    ]
+    return {
+        "pages": len(emitted),
+        "seconds": round(watch.seconds, 3),
+        "pages_per_second": rate(len(emitted), watch.seconds),
+        "first_page_seconds": round(min(t for t, _ in emitted.values()), 4) if emitted else 0.0,
+        "page_latency_ms": latency_summary(service),
+        "ocr_ms": latency_summary(list(engine.ocr_seconds.values())),
+        "translate_ms": latency_summary(list(engine.translate_seconds.values())),
+        "failed_pages": sum(_is_failed_result(result) for _, result in emitted.values()),
+    }, {index: result for index, (_, result) in emitted.items()}
+
+
+def bench_overlay(pdf_path, texts, workdir):
+    output = Path(workdir) / "overlay.pdf"
+    with Stopwatch() as watch:
+        write_text_on_pdf(str(pdf_path), texts, str(output))
+    return {
+        "pages_per_second": rate(len(texts), watch.seconds),
+        "seconds": round(watch.seconds, 3),
+        "output_bytes": output.stat().st_size,
+    }
+
+
+def check_shared_pool(pool):
+    """Two documents on one pool OCR at the same time instead of one after the other."""
+    spans = {}
+
+    def _document(name):
+        async def _translate(batch):
+            return [(item[0], item) for item in batch]
+
+        def _emit(_index, item):
+            spans.setdefault(name, []).append(item[2:])
+
+        jobs = ((name, i, CHECK_OCR_SECONDS) for i in range(CHECK_PAGES))
+        asyncio.run(run_page_pipeline(
+            jobs, fakes.sleep_ocr_page, pool, _translate, _emit, range(CHECK_PAGES)
+        ))
+
+    threads = [threading.Thread(target=_document, args=(name,)) for name in ("a", "b")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    check(all(len(spans.get(name, ())) == CHECK_PAGES for name in ("a", "b")),
+          "shared pool: a document lost pages")
+    first = {name: min(start for start, _ in items) for name, items in spans.items()}
+    last = {name: max(end for _, end in items) for name, items in spans.items()}
+    overlap = min(last.values()) - max(first.values())
+    shorter = min(last[name] - first[name] for name in spans)
+    # 한 문서가 끝난 뒤에 다른 문서가 시작하면 겹치는 구간이 거의 없다.
+    check(overlap >= shorter / 2,
+          f"shared pool: documents ran one after another (overlap {overlap:.3f}s "
+          f"of {shorter:.3f}s)")
+    return {"documents": 2, "pages": CHECK_PAGES, "overlap_s": round(overlap, 3)}
+
+
+def run(config):
+    translator = fakes.BackendProfile(seed=config["seed"], **config["translator"])
+    ocr = fakes.BackendProfile(seed=config["seed"], **config["ocr"])
+    results = {
+        "config": {
+            "pages": config["pages"],
+            "ocr_workers": config["ocr_workers"],
+            "pages_per_batch": config["pages_per_batch"],
+            "translator": translator.as_dict(),
+            "ocr": ocr.as_dict(),
+        }
+    }
+    with tempfile.TemporaryDirectory(prefix="bench-pipeline-", dir=config.get("workdir")) as tmp:
+        text_pdf = synthetic.make_pdf(Path(tmp) / "text_layer.pdf", config["pages"],
+                                      seed=config["seed"])
+        image_pdf = synthetic.make_pdf(Path(tmp) / "image_only.pdf", config["pages"],
+                                       image_only=True, seed=config["seed"])
+        with Pool(
+            config["ocr_workers"],
+            initializer=fakes.init_fake_ocr,
+            initargs=(ocr, synthetic.page_text_fn(config["seed"])),
+        ) as pool:
+            results["checks"] = {"shared_pool": check_shared_pool(pool)}
+            results["stages"] = {
+                "rasterize": bench_rasterize(image_pdf),
+                "ocr": bench_ocr_stage(pool, config["pages"]),
+                "translate": bench_translate_stage(config, translator),
+            }
+            results["end_to_end"] = {}
+            for label, pdf_path in (("text_layer", text_pdf), ("image_only", image_pdf)):
+                summary, texts = bench_end_to_end(config, pdf_path, pool, translator)
+                results["end_to_end"][label] = summary
+            results["stages"]["overlay"] = bench_overlay(image_pdf, texts, tmp)
+    results["peak_rss_mb"] = peak_rss_mb()
+    return results
@@ -0,0 +1,244 @@
+"""Backend scheduler against a local server that throttles with 429s and slows down under load.
+
+:func:`run_checks` asserts the scheduler's contract against the same server
+(429 retries, deadlines, lane order) and fails the run when it breaks.
+"""
+
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import fakes
+from benchmarks.common import Stopwatch, check, rate
+from core.rate_limiter import (
+    BULK, FATAL, INTERACTIVE, BackendScheduler, RetryPolicy, classify, priority_lane,
+)
+
+# 우선순위 측정: 일괄 요청이 동시 슬롯을 채운 뒤 화면 요청을 몇 번 끼워 넣는다.
+INTERACTIVE_CALLS = 10
+INTERACTIVE_INTERVAL = 0.05
+# 검사용 서버: 초당 요청 수가 작고 Retry-After 가 길어 재시도와 마감 시간이 눈에 띈다.
+CHECK_RPS = 2
+CHECK_RETRY_AFTER = 0.5
+CHECK_LATENCY = 0.2
+_WORDS = ("rate", "limit", "request", "server", "token", "bucket", "retry", "window", "latency",
+          "backend", "queue", "page", "sentence", "cache")
+
+
+def _texts(config, count):
+    # PDF 가 필요 없는 벤치마크라 synthetic 대신 단어를 직접 섞는다.
+    rng = random.Random(config["seed"])
+    return [f"{i} " + " ".join(rng.choices(_WORDS, k=8)) for i in range(count)]
+
+
+def _server(options, seed):
+    return fakes.FakeTranslateServer(
+        requests_per_second=options["server_rps"],
+        max_concurrency=options["server_concurrency"],
+        retry_after=options["retry_after"],
+        error_rate=options["error_rate"],
+        profile=fakes.BackendProfile(
+            base=options["latency"], jitter=options["latency"] / 2, seed=seed
+        ),
+        latency_per_request=options["latency_per_request"],
+        seed=seed,
+    )
+
+
+def _retry(options, attempts=None):
+    return RetryPolicy(
+        max_attempts=attempts or options["max_attempts"], base_delay=options["retry_after"] / 2,
+        max_delay=options["retry_after"] * 4,
+    )
+
+
+def _drive(server, scheduler, texts, workers):
+    client = fakes.FakeHttpTranslator(server.url)
+
+    def _one(text):
+        try:
+            return scheduler.call(client.translate, text, chars=len(text))
+        except Exception:
+            return None
+
+    with Stopwatch() as watch, ThreadPoolExecutor(workers) as pool:
+        results = list(pool.map(_one, texts))
+    done = len(results) - results.count(None)
+    state = scheduler.snapshot()
+    return {
+        "calls": len(texts),
+        "failed": len(texts) - done,
+        "success_rate": round(done / len(texts), 4),
+        "seconds": round(watch.seconds, 3),
+        "translations_per_second": rate(done, watch.seconds),
+        "server_requests": server.stats["requests"],
+        "server_throttled": server.stats["throttled"],
+        "server_errors": server.stats["errors"],
+        "server_max_in_flight": server.stats["max_in_flight"],
+        "retries": state["retries"],
+        "final_concurrency_limit": state["concurrency_limit"],
+    }
+
+
+def bench_throughput(config):
+    """The same burst without a scheduler, with AIMD only and with AIMD plus a request rate."""
+    options = config["rate_limit"]
+    texts = _texts(config, options["requests"])
+    workers = options["workers"]
+    scenarios = {
+        # 재시도도 한도도 없이 보내기만 하는 기존 동작
+        "unscheduled": lambda: BackendScheduler("fake", retry=_retry(options, attempts=1)),
+        "adaptive": lambda: BackendScheduler(
+            "fake", max_concurrency=workers, retry=_retry(options)
+        ),
+        "rate_limited": lambda: BackendScheduler(
+            "fake", requests_per_second=options["server_rps"] * 0.9, max_concurrency=workers,
+            retry=_retry(options),
+        ),
+    }
+    results = {}
+    for name, make in scenarios.items():
+        with _server(options, config["seed"]) as server:
+            results[name] = _drive(server, make(), texts, workers)
+    return results
+
+
+def _median_ms(seconds):
+    return round(statistics.median(seconds) * 1e3, 3) if seconds else None
+
+
+def bench_priority(config):
+    """Latency of interactive calls sent while bulk calls keep every slot busy."""
+    options = config["rate_limit"]
+    texts = _texts(config, options["requests"])
+    with _server(options, config["seed"]) as server:
+        client = fakes.FakeHttpTranslator(server.url)
+        scheduler = BackendScheduler(
+            "fake", max_concurrency=2, initial_concurrency=2, retry=_retry(options)
+        )
+        bulk = []
+        interactive = []
+
+        def _timed(samples, priority, text):
+            started = time.perf_counter()
+            try:
+                scheduler.call(client.translate, text, chars=len(text), priority=priority)
+            except Exception:
+                return
+            samples.append(time.perf_counter() - started)
+
+        threads = []
+        with ThreadPoolExecutor(options["workers"]) as pool:
+            for text in texts:
+                pool.submit(_timed, bulk, BULK, text)
+            for i in range(INTERACTIVE_CALLS):
+                time.sleep(INTERACTIVE_INTERVAL)
+                thread = threading.Thread(target=_timed, args=(interactive, INTERACTIVE, f"ui {i}"))
+                thread.start()
+                threads.append(thread)
+            for thread in threads:
+                thread.join()
+    return {
+        "bulk_calls": len(bulk),
+        "interactive_calls": len(interactive),
+        "bulk_latency_ms": _median_ms(bulk),
+        "interactive_latency_ms": _median_ms(interactive),
+    }
+
+
+def check_retry_429():
+    """Calls beyond the server's rate get a 429 and succeed after ``Retry-After``."""
+    with fakes.FakeTranslateServer(
+        requests_per_second=CHECK_RPS, retry_after=CHECK_RETRY_AFTER
+    ) as server:
+        client = fakes.FakeHttpTranslator(server.url)
+        scheduler = BackendScheduler(
+            "check", retry=RetryPolicy(max_attempts=6, base_delay=0.05, max_delay=2.0)
+        )
+        # 1초 창 두 개에 걸쳐도 일부는 반드시 429 를 받는다.
+        texts = [f"retry {i}" for i in range(CHECK_RPS * 3)]
+        with ThreadPoolExecutor(len(texts)) as pool:
+            results = list(pool.map(lambda text: scheduler.call(client.translate, text), texts))
+        state = scheduler.snapshot()
+        check(len(results) == len(texts) and all(results), "429 retry: some calls failed")
+        check(server.stats["throttled"] > 0, "429 retry: the server never throttled")
+        check(state["throttled"] == server.stats["throttled"],
+               f"429 retry: scheduler saw {state['throttled']} of "
+               f"{server.stats['throttled']} 429s")
+        check(server.stats["ok"] == len(texts),
+               f"429 retry: {server.stats['ok']} accepted requests for {len(texts)} calls")
+    # 상태 코드가 있는 4xx 는 본문에 429/500 이 있어도 재시도하지 않는다.
+    check(classify(RuntimeError("Google API error (HTTP 400): quota 429, 500")) == FATAL,
+           "429 retry: a 400 with 429 in its body was classified as retryable")
+    return {"calls": len(texts), "server_throttled": server.stats["throttled"]}
+
+
+def check_deadline():
+    """A throttled call gives up at its deadline instead of waiting out ``Retry-After``."""
+    # 초당 0건: 모든 요청이 긴 Retry-After 와 함께 429 를 받는다.
+    with fakes.FakeTranslateServer(
+        requests_per_second=0, retry_after=CHECK_RETRY_AFTER * 4
+    ) as server:
+        client = fakes.FakeHttpTranslator(server.url)
+        scheduler = BackendScheduler("check", retry=RetryPolicy(max_attempts=6, base_delay=0.05))
+        timeout = CHECK_RETRY_AFTER / 2
+        started = time.perf_counter()
+        try:
+            scheduler.call(client.translate, "late", timeout=timeout)
+        except Exception:
+            pass
+        else:
+            raise AssertionError("deadline: the throttled call succeeded within its deadline")
+        elapsed = time.perf_counter() - started
+        check(elapsed < CHECK_RETRY_AFTER * 2,
+               f"deadline: gave up after {elapsed:.2f}s with a {timeout:.2f}s deadline")
+        check(server.stats["requests"] == 1, "deadline: the call was retried past its deadline")
+    return {"timeout_s": timeout, "elapsed_s": round(elapsed, 3)}
+
+
+def check_lane_order():
+    """With one slot busy, a queued interactive call runs before every queued bulk call."""
+    with fakes.FakeTranslateServer(
+        profile=fakes.BackendProfile(base=CHECK_LATENCY, seed=0)
+    ) as server:
+        client = fakes.FakeHttpTranslator(server.url)
+        scheduler = BackendScheduler("check", max_concurrency=1, initial_concurrency=1)
+        order = []
+
+        def _send(label):
+            order.append(label)
+            return client.translate(label)
+
+        def _call(label, lane):
+            # GUI 처럼 priority 를 넘기지 않고 priority_lane 으로만 정한다.
+            with priority_lane(lane):
+                scheduler.call(_send, label)
+
+        threads = [threading.Thread(target=_call, args=(f"bulk {i}", BULK)) for i in range(4)]
+        threads.append(threading.Thread(target=_call, args=("ui", INTERACTIVE)))
+        for thread in threads:
+            thread.start()
+            # 앞 스레드가 먼저 줄을 서도록 간격을 둔다 (첫 요청은 아직 진행 중).
+            time.sleep(CHECK_LATENCY / 10)
+        for thread in threads:
+            thread.join()
+    check(order.index("ui") == 1, f"lane order: interactive call ran at {order}")
+    return {"order": order}
+
+
+def run_checks():
+    return {
+        "retry_429": check_retry_429(),
+        "deadline": check_deadline(),
+        "lane_order": check_lane_order(),
+    }
+
+
+def run(config):
+    return {
+        "checks": run_checks(),
+        "throughput": bench_throughput(config),
+        "priority": bench_priority(config),
+    }
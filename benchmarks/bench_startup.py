@@ -0,0 +1,89 @@
+"""Cold import time of the entry points and per-document OCR pool overhead."""
+
+import json
+import statistics
+import subprocess
+import sys
+from multiprocessing import Pool
+
+from benchmarks.common import Stopwatch
+from core.document_engine import init_ocr_worker
+from core.worker_pool import create_ocr_pool, shutdown_ocr_pools
+
+# 새 인터프리터에서 import 시간을 잴 진입점
+ENTRY_MODULES = ("core.document_engine", "core.batch_cli", "core.translate")
+# GUI 없는 경로에서 import 되면 안 되거나 처음 쓸 때까지 미뤄야 하는 모듈
+HEAVY_MODULES = ("PySide6", "kivy", "fitz", "pytesseract", "PIL", "translate.manager")
+
+_IMPORT_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - started
+print(json.dumps({{"seconds": seconds, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def _import_once(module):
+    completed = subprocess.run(
+        [sys.executable, "-c", _IMPORT_PROBE.format(module=module, heavy=HEAVY_MODULES)],
+        capture_output=True, text=True,
+    )
+    if completed.returncode != 0:
+        lines = completed.stderr.strip().splitlines()
+        return {"error": lines[-1] if lines else f"exit status {completed.returncode}"}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def bench_imports(repeats):
+    """Median cold import time per entry point and the heavy modules it pulled in."""
+    results = {}
+    for module in ENTRY_MODULES:
+        runs = [_import_once(module) for _ in range(repeats)]
+        failed = [run for run in runs if "error" in run]
+        if failed:
+            results[module] = failed[0]
+            continue
+        results[module] = {
+            "import_ms": round(statistics.median(run["seconds"] for run in runs) * 1e3, 3),
+            "heavy_modules": runs[0]["loaded"],
+        }
+    return results
+
+
+def _job(_):
+    return 0
+
+
+def bench_pool_reuse(size, documents):
+    """Back-to-back documents: a fresh pool per document versus one shared pool."""
+    with Stopwatch() as fresh:
+        for _ in range(documents):
+            with Pool(size, initializer=init_ocr_worker, initargs=(False,)) as pool:
+                pool.map(_job, range(size), chunksize=1)
+    with Stopwatch() as shared:
+        pool = create_ocr_pool(size, cache_enabled=False)
+        try:
+            for _ in range(documents):
+                pool.map(_job, range(size), chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+    return {
+        "documents": documents,
+        "pool_size": size,
+        "per_document_pool_seconds": round(fresh.seconds, 3),
+        "shared_pool_seconds": round(shared.seconds, 3),
+        "per_document_overhead_ms": round(fresh.seconds / documents * 1e3, 3),
+        "shared_overhead_ms": round(shared.seconds / documents * 1e3, 3),
+    }
+
+
+def run(config):
+    try:
+        return {
+            "imports": bench_imports(config.get("startup_repeats", 3)),
+            "pool": bench_pool_reuse(config["ocr_workers"], config.get("startup_documents", 5)),
+        }
+    finally:
+        shutdown_ocr_pools()
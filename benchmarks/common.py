@@ -0,0 +1,138 @@
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# 비교 시 이 비율 이상 나빠지면 회귀로 표시
+DEFAULT_REGRESSION_THRESHOLD = 0.10
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of *values* (``pct`` in 0-100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def latency_summary(seconds, unit=1e3):
+    """p50/p99/mean/max of *seconds*, scaled by *unit* (milliseconds by default)."""
+    if not seconds:
+        return {"count": 0, "p50": 0.0, "p99": 0.0, "mean": 0.0, "max": 0.0}
+    return {
+        "count": len(seconds),
+        "p50": round(percentile(seconds, 50) * unit, 4),
+        "p99": round(percentile(seconds, 99) * unit, 4),
+        "mean": round(sum(seconds) / len(seconds) * unit, 4),
+        "max": round(max(seconds) * unit, 4),
+    }
+
+
+def check(condition, message):
+    """Fail the benchmark run with *message* unless *condition* holds."""
+    # python -O 에서도 검사가 빠지지 않도록 assert 문 대신 직접 던진다.
+    if not condition:
+        raise AssertionError(message)
+
+
+def rate(count, seconds):
+    return round(count / seconds, 3) if seconds > 0 else 0.0
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process and of its reaped children."""
+    # Linux 는 KB, macOS 는 바이트 단위로 보고한다.
+    scale = 1 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale
+    return {
+        "self": round(own / (1024 * 1024), 1),
+        "children": round(children / (1024 * 1024), 1),
+    }
+
+
+class Stopwatch:
+    def __enter__(self):
+        self.started = time.perf_counter()
+        self.seconds = 0.0
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds = time.perf_counter() - self.started
+        return False
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "git_revision": _git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def save_results(results, path):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding="utf-8")
+    return path
+
+
+def _flatten(data, prefix=""):
+    flat = {}
+    for key, value in data.items():
+        name = f"{prefix}.{key}" if prefix else str(key)
+        if isinstance(value, dict):
+            flat.update(_flatten(value, name))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def _lower_is_better(metric):
+    leaf = metric.rsplit(".", 1)[-1]
+    return (
+        leaf in ("p50", "p99", "mean", "seconds", "self", "children")
+        or leaf.endswith("_seconds")
+        or leaf.endswith("_ms")
+        or leaf.endswith("_us")
+    )
+
+
+def _higher_is_better(metric):
+    leaf = metric.rsplit(".", 1)[-1]
+    return leaf.endswith("_per_second") or leaf.endswith("hit_rate") or leaf == "success_rate"
+
+
+def compare_results(baseline, current, threshold=DEFAULT_REGRESSION_THRESHOLD):
+    """Return ``[(metric, old, new, change)]`` for metrics that got worse by more than *threshold*."""
+    old = _flatten(baseline.get("benchmarks", {}))
+    new = _flatten(current.get("benchmarks", {}))
+    regressions = []
+    for metric in sorted(old.keys() & new.keys()):
+        before, after = old[metric], new[metric]
+        if not before:
+            continue
+        change = (after - before) / abs(before)
+        if (_lower_is_better(metric) and change > threshold) or (
+            _higher_is_better(metric) and change < -threshold
+        ):
+            regressions.append((metric, before, after, round(change, 4)))
+    return regressions
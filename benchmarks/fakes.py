@@ -0,0 +1,377 @@
+"""Fake translator, OCR and LLM backends with seeded latency and failures.
+
+Every decision (latency and whether a call fails) is derived from the seed
+and the call's content, not from call order, so results do not depend on how
+threads or pool workers happen to be scheduled.  The exception is
+:class:`FakeTranslateServer`, whose 429 replies depend on how many requests
+arrive at once, which is what it is there to measure.
+"""
+
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import urllib.request
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from core.gpt_refiner import BATCH_INSTRUCTION, REFINE_INSTRUCTION, parse_numbered
+from core.page_source import SharedPixmap, attach_shared
+
+_NUMBERED_ITEM = re.compile(r"^\[\d+\]", re.M)
+
+
+class FakeBackendError(RuntimeError):
+    pass
+
+
+class BackendProfile:
+    """Latency model: ``base + per_item * items + U(0, jitter)`` seconds."""
+
+    def __init__(self, base=0.0, per_item=0.0, jitter=0.0, failure_rate=0.0, seed=0):
+        self.base = base
+        self.per_item = per_item
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.seed = seed
+
+    def _rng(self, key):
+        digest = hashlib.blake2b(f"{self.seed}\x00{key}".encode("utf-8"), digest_size=8).digest()
+        return random.Random(int.from_bytes(digest, "big"))
+
+    def simulate(self, key, items=1):
+        """Sleep for the modelled latency and raise on a simulated failure."""
+        rng = self._rng(key)
+        delay = self.base + self.per_item * items + self.jitter * rng.random()
+        if delay > 0:
+            time.sleep(delay)
+        if self.failure_rate and rng.random() < self.failure_rate:
+            raise FakeBackendError(f"simulated failure ({key[:32]!r})")
+        return delay
+
+    def as_dict(self):
+        return {
+            "base": self.base,
+            "per_item": self.per_item,
+            "jitter": self.jitter,
+            "failure_rate": self.failure_rate,
+            "seed": self.seed,
+        }
+
+
+def fake_translation(text, target):
+    return f"<{target}>{text}"
+
+
+class FakeTranslatorManager:
+    """Stand-in for ``translate.manager.TranslatorManager``."""
+
+    def __init__(self, profile, source=None, target="ko"):
+        self.profile = profile
+        self.source = source
+        self.target = target
+        self.calls = 0
+
+    def translate(self, text, target=None):
+        target = target or self.target
+        self.calls += 1
+        self.profile.simulate(f"{self.source}>{target}:{text}")
+        return fake_translation(text, target)
+
+    def translate_batch(self, texts, target=None):
+        target = target or self.target
+        self.calls += 1
+        self.profile.simulate(f"{self.source}>{target}:" + "\x1f".join(texts), len(texts))
+        return [fake_translation(text, target) for text in texts]
+
+    def close(self):
+        pass
+
+
+def manager_factory(profile):
+    """Return a ``manager_factory(source, target)`` for :class:`DocumentTranslator`."""
+    def _factory(source_lang, target_lang):
+        return FakeTranslatorManager(profile, source_lang, target_lang)
+    return _factory
+
+
+# --- OCR (풀 워커 안에서 실행되므로 모듈 전역으로 설정) ---
+_ocr_profile = None
+_ocr_text_fn = None
+
+
+def init_fake_ocr(profile, text_fn):
+    """``Pool`` initializer for :func:`fake_ocr_page`."""
+    global _ocr_profile, _ocr_text_fn
+    _ocr_profile = profile
+    _ocr_text_fn = text_fn
+
+
+def fake_ocr_page(args):
+    """Drop-in for ``ocr_page_timed``: pass text layers through, "recognize" pixmaps.
+
+    The shared-memory pixels are hashed so the cost of handing a page to the
+    worker is still paid; the recognized text comes from ``text_fn(index)``.
+    """
+    i, payload, _cache_enabled = args
+    started = time.perf_counter()
+    if isinstance(payload, str):
+        return (i, payload, time.perf_counter() - started)
+    try:
+        if isinstance(payload, SharedPixmap):
+            shm = attach_shared(payload.shm_name)
+            try:
+                hashlib.blake2b(shm.buf[: payload.stride * payload.height]).digest()
+            finally:
+                shm.close()
+        _ocr_profile.simulate(f"ocr:{i}")
+        text = _ocr_text_fn(i)
+    except FakeBackendError as e:
+        text = f"[Page {i+1}] OCR 실패: {e}"
+    return (i, text, time.perf_counter() - started)
+
+
+def sleep_ocr_page(args):
+    """OCR stand-in that sleeps and reports when it ran: ``(index, document, start, end)``."""
+    document, i, seconds = args
+    started = time.monotonic()
+    time.sleep(seconds)
+    return (i, document, started, time.monotonic())
+
+
+class _FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeGeminiModel:
+    """Stand-in for ``genai.GenerativeModel`` accepted by ``GeminiOCRTranslate(model=...)``.
+
+    JSON-mode requests are answered in the shapes the batch prompts ask for:
+    a string array for text batches and ``{"pages": [...]}`` for page batches.
+    """
+
+    def __init__(self, profile, target="ko"):
+        self.profile = profile
+        self.target = target
+        self.calls = 0
+        self.prompt_chars = 0
+
+    def generate_content(self, contents, generation_config=None):
+        self.calls += 1
+        parts = contents if isinstance(contents, list) else [contents]
+        texts = [part for part in parts if isinstance(part, str)]
+        images = [part for part in parts if isinstance(part, dict)]
+        self.prompt_chars += sum(len(text) for text in texts)
+        self.profile.simulate("\x1f".join(texts) + f"|{len(images)}", max(len(images), 1))
+
+        json_mode = bool(generation_config) and (
+            generation_config.get("response_mime_type") == "application/json"
+        )
+        if not json_mode:
+            return _FakeResponse(fake_translation(texts[-1] if texts else "", self.target))
+        if images:
+            pages = [
+                {"page": int(text[len("[page "):-1]), "text": fake_translation(text, self.target)}
+                for text in texts
+                if text.startswith("[page ")
+            ]
+            return _FakeResponse(json.dumps({"pages": pages}, ensure_ascii=False))
+        prompt = texts[-1]
+        items = json.loads(prompt[prompt.rindex("["):])
+        return _FakeResponse(
+            json.dumps([fake_translation(item, self.target) for item in items], ensure_ascii=False)
+        )
+
+
+def fake_refinement(text):
+    return f"~{text}"
+
+
+class FakeChatClient:
+    """Stand-in for the chat client of :class:`core.gpt_refiner.GptRefiner`.
+
+    Numbered batch prompts are answered item by item; ``mismatch_rate`` of
+    them (decided per prompt content) drop their last item, so the refiner's
+    per-segment fallback gets exercised.
+    """
+
+    def __init__(self, profile, mismatch_rate=0.0):
+        self.profile = profile
+        self.mismatch_rate = mismatch_rate
+        self.calls = 0
+        self.prompt_chars = 0
+
+    def complete(self, prompt, temperature=None):
+        self.calls += 1
+        self.prompt_chars += len(prompt)
+        if prompt.startswith(BATCH_INSTRUCTION):
+            body = prompt[len(BATCH_INSTRUCTION) + len(":\n\n"):]
+            items = parse_numbered(body, len(_NUMBERED_ITEM.findall(body))) or []
+            self.profile.simulate(f"refine:{body}", max(len(items), 1))
+            if items and self.profile._rng(f"mismatch:{body}").random() < self.mismatch_rate:
+                items = items[:-1]
+            return "\n".join(
+                f"[{number}] {fake_refinement(item)}" for number, item in enumerate(items, 1)
+            )
+        text = prompt[len(REFINE_INSTRUCTION) + len(":\n\n"):]
+        self.profile.simulate(f"refine:{text}")
+        return fake_refinement(text)
+
+
+class FakeTranslateServer:
+    """Local HTTP stand-in for the Cloud Translation v3 ``translateText`` endpoint.
+
+    Accepts ``{"contents": [...], "targetLanguageCode": ...}`` and answers
+    ``{"translations": [{"translatedText": ...}]}``, so it also serves
+    ``TranslateCallerClient(endpoint=server.url)``.  A request beyond
+    ``requests_per_second`` (per one-second window) or ``max_concurrency``
+    requests in flight gets a 429 with ``Retry-After: retry_after``; of the
+    rest, ``error_rate`` (decided per body and repeat count) get a 503.
+    Accepted requests sleep ``profile`` latency plus ``latency_per_request``
+    for every other request in flight, so overload also shows up as latency.
+    """
+
+    def __init__(self, requests_per_second=None, max_concurrency=None, retry_after=1.0,
+                 error_rate=0.0, profile=None, latency_per_request=0.0, seed=0):
+        self.requests_per_second = requests_per_second
+        self.max_concurrency = max_concurrency
+        self.retry_after = retry_after
+        self.error_rate = error_rate
+        self.profile = profile or BackendProfile(seed=seed)
+        self.latency_per_request = latency_per_request
+        self.stats = {"requests": 0, "throttled": 0, "errors": 0, "ok": 0, "max_in_flight": 0}
+        self._in_flight = 0
+        self._window = (None, 0)
+        self._seen = Counter()
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v3/translateText"
+
+    def _admit(self, body):
+        """HTTP status for a new request; 200 counts it as in flight."""
+        with self._lock:
+            self.stats["requests"] += 1
+            second = int(time.monotonic())
+            window, count = self._window
+            count = count + 1 if window == second else 1
+            self._window = (second, count)
+            if (self.requests_per_second is not None and count > self.requests_per_second) or (
+                self.max_concurrency is not None and self._in_flight >= self.max_concurrency
+            ):
+                self.stats["throttled"] += 1
+                return 429, 0
+            self._seen[body] += 1
+            rng = self.profile._rng(f"{self._seen[body]}:{body}")
+            if self.error_rate and rng.random() < self.error_rate:
+                self.stats["errors"] += 1
+                return 503, 0
+            self._in_flight += 1
+            self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self._in_flight)
+            return 200, self._in_flight - 1
+
+    def _handle(self, handler):
+        body = handler.rfile.read(int(handler.headers.get("Content-Length") or 0)).decode("utf-8")
+        status, others = self._admit(body)
+        if status != 200:
+            handler.send_response(status)
+            if status == 429:
+                handler.send_header("Retry-After", str(self.retry_after))
+            handler.send_header("Content-Length", "0")
+            handler.end_headers()
+            return
+        try:
+            request = json.loads(body)
+            contents = request.get("contents") or []
+            if self.latency_per_request * others > 0:
+                time.sleep(self.latency_per_request * others)
+            self.profile.simulate(body, len(contents))
+            reply = json.dumps({"translations": [
+                {"translatedText": fake_translation(text, request.get("targetLanguageCode"))}
+                for text in contents
+            ]}, ensure_ascii=False).encode("utf-8")
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+        with self._lock:
+            self.stats["ok"] += 1
+        handler.send_response(200)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(reply)))
+        handler.end_headers()
+        handler.wfile.write(reply)
+
+    def start(self):
+        fake = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                fake._handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="fake-translate-server", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
+
+
+class FakeHttpTranslator:
+    """Translator-manager-shaped client of :class:`FakeTranslateServer`.
+
+    Calls the server directly (one request per call, no retries); HTTP errors
+    surface as ``urllib.error.HTTPError`` with the status and ``Retry-After``
+    header, as a real client library would report them.
+    """
+
+    def __init__(self, url, target="ko", timeout=10.0):
+        self.url = url
+        self.target = target
+        self.timeout = timeout
+        self.calls = 0
+
+    def translate_batch(self, texts, target=None):
+        self.calls += 1
+        body = json.dumps(
+            {"contents": list(texts), "targetLanguageCode": target or self.target},
+            ensure_ascii=False,
+        ).encode("utf-8")
+        request = urllib.request.Request(
+            self.url, data=body, headers={"Content-Type": "application/json"}
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            reply = json.loads(response.read().decode("utf-8"))
+        return [item["translatedText"] for item in reply["translations"]]
+
+    def translate(self, text, target=None):
+        return self.translate_batch([text], target)[0]
+
+    def close(self):
+        pass
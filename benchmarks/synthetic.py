@@ -0,0 +1,75 @@
+"""Seeded synthetic corpora and PDFs for the benchmarks."""
+
+import random
+from functools import partial
+
+import fitz
+
+_WORDS = (
+    "the contract shall remain in force until either party gives written notice "
+    "payment is due within thirty days of the invoice date and late fees apply "
+    "all shipments are inspected on arrival and damaged goods must be reported "
+    "this report summarizes quarterly revenue operating costs and staff changes "
+    "the committee reviewed the proposal and approved the revised budget"
+).split()
+
+# 반복되는 머리말/꼬리말 (캐시 적중을 만드는 상용구)
+_BOILERPLATE = (
+    "Confidential document for internal use only.",
+    "All rights reserved.",
+    "Please refer to the appendix for details.",
+)
+
+
+def _sentence(rng):
+    words = [rng.choice(_WORDS) for _ in range(rng.randint(6, 16))]
+    return " ".join(words).capitalize() + "."
+
+
+def page_text(index, seed=0, sentences=12, boilerplate_ratio=0.25):
+    """Deterministic English text for page *index*.
+
+    About ``boilerplate_ratio`` of the sentences repeat across pages.
+    """
+    rng = random.Random(f"{seed}:{index}")
+    lines = []
+    for _ in range(sentences):
+        if rng.random() < boilerplate_ratio:
+            lines.append(rng.choice(_BOILERPLATE))
+        else:
+            lines.append(_sentence(rng))
+    return " ".join(lines)
+
+
+def page_text_fn(seed=0, sentences=12, boilerplate_ratio=0.25):
+    """Picklable ``index -> text`` callable for pool workers."""
+    return partial(page_text, seed=seed, sentences=sentences, boilerplate_ratio=boilerplate_ratio)
+
+
+def make_pdf(path, pages, image_only=False, seed=0, sentences=12, dpi=100):
+    """Write a synthetic PDF with *pages* pages of :func:`page_text`.
+
+    With ``image_only`` every page is a rendered bitmap without a text layer,
+    so the engine has to rasterize and OCR it.
+    """
+    source = fitz.open()
+    for index in range(pages):
+        page = source.new_page(width=595, height=842)
+        page.insert_textbox(
+            fitz.Rect(50, 50, 545, 792), page_text(index, seed, sentences), fontsize=11
+        )
+    if not image_only:
+        source.save(str(path))
+        source.close()
+        return path
+
+    output = fitz.open()
+    for page in source:
+        pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+        target = output.new_page(width=page.rect.width, height=page.rect.height)
+        target.insert_image(target.rect, pixmap=pix)
+    output.save(str(path), deflate=True)
+    output.close()
+    source.close()
+    return path
+
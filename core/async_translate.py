@@ -0,0 +1,107 @@
+import asyncio
+
+from core.batch_translate import (
+    DEFAULT_MAX_CHARS,
+    DEFAULT_MAX_SEGMENTS,
+    ManagerPool,
+    translate_batch,
+)
+from core.rate_limiter import TRANSLATOR_BACKEND, get_scheduler
+
+DEFAULT_MAX_DELAY = 0.01
+DEFAULT_CONCURRENCY = 4
+
+
+class AsyncBatchTranslator:
+    """Coalesces concurrent translation requests into batched calls.
+
+    Callers awaiting :meth:`translate` at the same time for the same language
+    pair are gathered for up to ``max_delay`` seconds (or until
+    ``max_segments`` texts are waiting) and sent as one batch.  At most
+    ``concurrency`` batches are in flight at once.  Managers that provide
+    ``translate_batch_async`` are awaited directly; blocking managers run on a
+    worker thread, each in-flight batch with its own manager instance.
+    Both go through *scheduler* (default: the shared ``"translator"``
+    backend scheduler).
+    """
+
+    def __init__(self, manager_factory, max_delay=DEFAULT_MAX_DELAY,
+                 max_segments=DEFAULT_MAX_SEGMENTS, max_chars=DEFAULT_MAX_CHARS,
+                 concurrency=DEFAULT_CONCURRENCY, scheduler=None):
+        self.managers = ManagerPool(manager_factory)
+        self.scheduler = scheduler
+        self.max_delay = max_delay
+        self.max_segments = max_segments
+        self.max_chars = max_chars
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._pending = {}
+        self._timers = {}
+
+    async def translate(self, text, target, source=None):
+        key = (source, target)
+        future = asyncio.get_running_loop().create_future()
+        waiting = self._pending.setdefault(key, [])
+        waiting.append((text, future))
+        if len(waiting) >= self.max_segments:
+            self._schedule_flush(key, 0)
+        elif key not in self._timers:
+            self._schedule_flush(key, self.max_delay)
+        return await future
+
+    def _schedule_flush(self, key, delay):
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        loop = asyncio.get_running_loop()
+        self._timers[key] = loop.call_later(
+            delay, lambda: asyncio.ensure_future(self._flush(key))
+        )
+
+    async def _flush(self, key):
+        self._timers.pop(key, None)
+        waiting = self._pending.pop(key, [])
+        if not waiting:
+            return
+        texts = [text for text, _ in waiting]
+        try:
+            async with self._semaphore:
+                results = await self._call(key, texts)
+        except Exception as exc:
+            for _, future in waiting:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for (_, future), result in zip(waiting, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def _call(self, key, texts):
+        source, target = key
+        scheduler = self.scheduler or get_scheduler(TRANSLATOR_BACKEND)
+        with self.managers.acquire(source, target) as manager:
+            batch_async = getattr(manager, "translate_batch_async", None)
+            if batch_async is not None:
+                results = list(await scheduler.acall(
+                    batch_async, texts, target=target, chars=sum(len(text) for text in texts)
+                ))
+                if len(results) == len(texts):
+                    return results
+            return await asyncio.to_thread(
+                translate_batch,
+                manager,
+                texts,
+                target,
+                max_chars=self.max_chars,
+                max_segments=self.max_segments,
+                scheduler=scheduler,
+            )
+
+    def close(self):
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        for waiting in self._pending.values():
+            for _, future in waiting:
+                future.cancel()
+        self._pending.clear()
+        self.managers.close()
@@ -0,0 +1,244 @@
+"""Headless batch translation of PDF documents.
+
+Example::
+
+    python -m core.batch_cli docs/ "scans/**/*.pdf" report.pdf --jobs 4 -o out.jsonl
+
+Per-page results are written as JSON lines as soon as they are ready and a
+throughput summary is printed to stderr at the end.  Documents run on a thread
+pool; they share one OCR process pool, the in-memory caches, the page dedup
+index and (with ``--cache-dir``) the persistent translation cache.
+``--fuzzy-threshold`` also reuses translations of near-identical sentences
+from a fuzzy translation memory next to that cache.  With
+``--overlay-dir`` each document is also written as ``<stem>.translated.pdf``
+with the translation laid over the original blocks.
+"""
+
+import argparse
+import glob
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from config import TARGET_LANG
+from core import metrics
+from core.cache_handler import TranslationCacheManager
+from core.document_engine import DocumentTranslator
+from core.fuzzy_tm import FuzzyTranslationMemory
+from core.memory_cache import shared_cache_stats
+from core.page_fingerprint import PageDedupIndex
+from core.pdf_overlay import PdfOverlayWriter
+from core.worker_pool import default_pool_size, get_ocr_pool
+
+_GLOB_CHARS = set("*?[")
+
+
+def expand_inputs(inputs, pattern="*.pdf"):
+    """Resolve files, directories (searched recursively) and glob patterns."""
+    seen = set()
+    files = []
+    for item in inputs:
+        if _GLOB_CHARS & set(item):
+            matches = sorted(Path(p) for p in glob.glob(item, recursive=True))
+        elif os.path.isdir(item):
+            matches = sorted(Path(item).rglob(pattern))
+        else:
+            matches = [Path(item)]
+        for path in matches:
+            if path.is_file() and path.resolve() not in seen:
+                seen.add(path.resolve())
+                files.append(path)
+    return files
+
+
+class JsonlWriter:
+    def __init__(self, stream):
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    def write(self, record):
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            self.stream.write(line + "\n")
+            self.stream.flush()
+
+
+def _hit_rate(hits, misses):
+    total = hits + misses
+    return round(hits / total, 4) if total else 0.0
+
+
+def run_batch(files, writer, lang=TARGET_LANG, jobs=2, ocr_workers=None, cache_dir=None,
+              ordered=False, resume=True, dedup=True, overlay_dir=None, fuzzy_threshold=None,
+              pool_start=None):
+    """Translate *files* concurrently and return the throughput summary."""
+    totals = Counter()
+    totals_lock = threading.Lock()
+    persistent_cache = TranslationCacheManager(base_dir=cache_dir) if cache_dir else None
+    page_dedup = PageDedupIndex() if dedup else None
+    fuzzy_tm = (
+        FuzzyTranslationMemory(Path(cache_dir or "cache") / "fuzzy_tm.db", fuzzy_threshold)
+        if fuzzy_threshold is not None else None
+    )
+    ocr_workers = ocr_workers or default_pool_size()
+    started = time.perf_counter()
+
+    def _translate_file(path, pool):
+        engine = DocumentTranslator(
+            str(path),
+            lang=lang,
+            persistent_cache=persistent_cache,
+            page_dedup=page_dedup,
+            resume=resume,
+            pool=pool,
+            layout=overlay_dir is not None,
+            fuzzy_tm=fuzzy_tm,
+        )
+        engine.emit_out_of_order = not ordered
+        engine.cache_enabled = page_dedup is not None
+        overlay = None
+        if overlay_dir is not None:
+            Path(overlay_dir).mkdir(parents=True, exist_ok=True)
+            overlay = PdfOverlayWriter(path, Path(overlay_dir) / f"{path.stem}.translated.pdf")
+
+        def _on_page(index, result):
+            if overlay is not None:
+                overlay.add_result(index, result, engine.pop_layout(index))
+            writer.write({"file": str(path), "page": index, "result": result})
+
+        doc_started = time.perf_counter()
+        try:
+            engine.process(_on_page)
+        finally:
+            if overlay is not None:
+                overlay.close()
+        with totals_lock:
+            totals.update(engine.stats)
+            totals["documents"] += 1
+        writer.write(
+            {
+                "file": str(path),
+                "event": "document_done",
+                "seconds": round(time.perf_counter() - doc_started, 3),
+                "stats": dict(engine.stats),
+            }
+        )
+
+    try:
+        pool = get_ocr_pool(ocr_workers, dedup, pool_start)
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            futures = {executor.submit(_translate_file, path, pool): path for path in files}
+            for future in as_completed(futures):
+                try:
+                    future.result()
+                except Exception as exc:
+                    logging.error(f"{futures[future]} 처리 실패: {exc}")
+                    writer.write(
+                        {"file": str(futures[future]), "event": "document_failed", "error": str(exc)}
+                    )
+                    with totals_lock:
+                        totals["failed_documents"] += 1
+    finally:
+        if persistent_cache is not None:
+            persistent_cache.close_all()
+        dedup_stats = page_dedup.stats() if page_dedup is not None else {}
+        if page_dedup is not None:
+            page_dedup.close()
+        if fuzzy_tm is not None:
+            fuzzy_tm.close()
+
+    elapsed = time.perf_counter() - started
+    pages = totals["pages"] + totals["replayed_pages"]
+    return {
+        "documents": totals["documents"],
+        "failed_documents": totals["failed_documents"],
+        "pages": pages,
+        "replayed_pages": totals["replayed_pages"],
+        "sentences": totals["sentences"],
+        "seconds": round(elapsed, 3),
+        "pages_per_second": round(pages / elapsed, 3) if elapsed else 0.0,
+        "sentences_per_second": round(totals["sentences"] / elapsed, 3) if elapsed else 0.0,
+        "sentence_cache_hit_rate": _hit_rate(
+            totals["memory_hits"] + totals["persistent_hits"], totals["translated_sentences"]
+        ),
+        "fuzzy_hits": totals["fuzzy_hits"],
+        "fuzzy_hit_rate": _hit_rate(totals["fuzzy_hits"], totals["fuzzy_misses"]),
+        "page_dedup": dedup_stats,
+        "memory_caches": {
+            name: {key: stats[key] for key in ("entries", "hits", "misses", "hit_rate")}
+            for name, stats in shared_cache_stats().items()
+        },
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Translate PDF documents without the GUI")
+    parser.add_argument("inputs", nargs="+", help="files, directories or glob patterns")
+    parser.add_argument("--lang", default=TARGET_LANG, help="target language")
+    parser.add_argument("--pattern", default="*.pdf", help="file pattern for directories")
+    parser.add_argument("-j", "--jobs", type=int, default=2, help="documents processed at once")
+    parser.add_argument("--ocr-workers", type=int, default=None, help="shared OCR process count")
+    parser.add_argument(
+        "--pool-start", choices=("fork", "spawn", "forkserver"), default=None,
+        help="multiprocessing start method of the OCR pool",
+    )
+    parser.add_argument("--cache-dir", default=None, help="persistent translation cache directory")
+    parser.add_argument("-o", "--output", default="-", help="JSONL output file ('-' for stdout)")
+    parser.add_argument("--ordered", action="store_true", help="emit pages in page order")
+    parser.add_argument("--no-resume", action="store_true", help="ignore job journals")
+    parser.add_argument("--no-dedup", action="store_true", help="disable OCR caches and page dedup")
+    parser.add_argument("--overlay-dir", default=None, help="write translated PDFs here")
+    parser.add_argument(
+        "--fuzzy-threshold", type=float, default=None,
+        help="reuse translations of sentences at least this similar (e.g. 0.9)",
+    )
+    parser.add_argument("--trace", default=None, help="write a Chrome trace JSON file")
+    parser.add_argument("--prometheus", default=None, help="write metrics in Prometheus text format")
+    args = parser.parse_args(argv)
+    if args.trace or args.prometheus:
+        metrics.enable()
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    files = expand_inputs(args.inputs, args.pattern)
+    if not files:
+        parser.error("no input documents found")
+
+    stream = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        summary = run_batch(
+            files,
+            JsonlWriter(stream),
+            lang=args.lang,
+            jobs=args.jobs,
+            ocr_workers=args.ocr_workers,
+            cache_dir=args.cache_dir,
+            ordered=args.ordered,
+            resume=not args.no_resume,
+            dedup=not args.no_dedup,
+            overlay_dir=args.overlay_dir,
+            fuzzy_threshold=args.fuzzy_threshold,
+            pool_start=args.pool_start,
+        )
+    finally:
+        if stream is not sys.stdout:
+            stream.close()
+
+    recorder = metrics.get_recorder()
+    if recorder is not None:
+        summary["metrics"] = recorder.summary()
+        if args.trace:
+            recorder.write_chrome_trace(args.trace)
+        if args.prometheus:
+            recorder.write_prometheus(args.prometheus)
+    print(json.dumps(summary, ensure_ascii=False, indent=2), file=sys.stderr)
+    return 1 if summary["failed_documents"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+import logging
+import threading
+from contextlib import contextmanager
+
+from core import metrics
+from core.rate_limiter import TRANSLATOR_BACKEND, get_scheduler
+
+# Google Cloud Translation v3 권장 한도(요청당 30k 코드포인트, 1024 세그먼트)보다 여유 있게 잡는다.
+DEFAULT_MAX_CHARS = 5000
+DEFAULT_MAX_BYTES = 20_000
+DEFAULT_MAX_SEGMENTS = 128
+
+# translate_batch 가 없어 한 문장씩 보내는 매니저 종류 (종류마다 한 번만 경고한다)
+_unbatched_types = set()
+_unbatched_lock = threading.Lock()
+
+
+def pack_batches(texts, max_chars=DEFAULT_MAX_CHARS, max_bytes=DEFAULT_MAX_BYTES,
+                 max_segments=DEFAULT_MAX_SEGMENTS):
+    """Split *texts* into request-sized groups, preserving order.
+
+    Returns a list of index lists.  A group closes when adding the next text
+    would exceed any of the character, UTF-8 byte or segment limits; a single
+    text larger than the budget is sent on its own.
+    """
+    batches = []
+    current = []
+    chars = 0
+    size = 0
+    for index, text in enumerate(texts):
+        text_chars = len(text)
+        text_bytes = len(text.encode("utf-8"))
+        if current and (
+            len(current) >= max_segments
+            or chars + text_chars > max_chars
+            or size + text_bytes > max_bytes
+        ):
+            batches.append(current)
+            current = []
+            chars = 0
+            size = 0
+        current.append(index)
+        chars += text_chars
+        size += text_bytes
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _translate_one(manager, text, target, scheduler):
+    if metrics.enabled():
+        metrics.count("translator_requests", kind="single")
+        metrics.count("translator_bytes_sent", len(text.encode("utf-8")))
+    with metrics.span("translator.request", segments=1):
+        return scheduler.call(manager.translate, text, target=target, chars=len(text))
+
+
+def _warn_unbatched(manager):
+    name = f"{type(manager).__module__}.{type(manager).__qualname__}"
+    with _unbatched_lock:
+        if name in _unbatched_types:
+            return
+        _unbatched_types.add(name)
+    logging.warning(f"{name} 에 translate_batch 가 없어 문장마다 요청을 따로 보냅니다")
+
+
+def translate_batch(manager, texts, target, max_chars=DEFAULT_MAX_CHARS,
+                    max_bytes=DEFAULT_MAX_BYTES, max_segments=DEFAULT_MAX_SEGMENTS,
+                    scheduler=None):
+    """Translate *texts* with as few requests as the limits allow.
+
+    Uses ``manager.translate_batch(list, target=...)`` when the manager offers
+    it and falls back to one ``manager.translate`` call per text otherwise
+    (logged once per manager type), or for any request whose response does
+    not line up with its input.  The
+    result list is index-aligned with *texts*.  Every request goes through
+    *scheduler* (default: the shared ``"translator"`` backend scheduler, see
+    :mod:`core.rate_limiter`).
+    """
+    texts = list(texts)
+    if scheduler is None:
+        scheduler = get_scheduler(TRANSLATOR_BACKEND)
+    results = [None] * len(texts)
+    batch_fn = getattr(manager, "translate_batch", None)
+    if batch_fn is None and texts:
+        _warn_unbatched(manager)
+    for indices in pack_batches(texts, max_chars, max_bytes, max_segments):
+        chunk = [texts[i] for i in indices]
+        translated = None
+        if batch_fn is not None:
+            if metrics.enabled():
+                metrics.count("translator_requests", kind="batch")
+                metrics.count(
+                    "translator_bytes_sent", sum(len(text.encode("utf-8")) for text in chunk)
+                )
+            with metrics.span("translator.request", segments=len(chunk)):
+                translated = list(scheduler.call(
+                    batch_fn, chunk, target=target, chars=sum(len(text) for text in chunk)
+                ))
+            if len(translated) != len(chunk):
+                logging.warning(
+                    f"일괄 번역 결과 개수 불일치 ({len(translated)} != {len(chunk)}), 개별 번역으로 대체"
+                )
+                translated = None
+        if translated is None:
+            translated = [_translate_one(manager, text, target, scheduler) for text in chunk]
+        for i, value in zip(indices, translated):
+            results[i] = value
+    return results
+
+
+class ManagerPool:
+    """Reusable translator managers keyed by language pair.
+
+    A manager is handed to one caller at a time, so concurrent threads each
+    get their own instance while sequential work keeps reusing the same one.
+    ``factory(source, target)`` creates a manager; ``source`` may be ``None``
+    for auto-detection.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._idle = {}
+        self._all = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def acquire(self, source, target):
+        key = (source, target)
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            manager = idle.pop() if idle else None
+        if manager is None:
+            manager = self._factory(source, target)
+            with self._lock:
+                self._all.append(manager)
+        try:
+            yield manager
+        finally:
+            with self._lock:
+                self._idle.setdefault(key, []).append(manager)
+
+    def close(self):
+        with self._lock:
+            managers = list(self._all)
+            self._all.clear()
+            self._idle.clear()
+        for manager in managers:
+            try:
+                manager.close()
+            except Exception:
+                logging.exception("TranslatorManager 종료 중 오류 발생")
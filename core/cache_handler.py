@@ -1,69 +1,404 @@
-
-
+import argparse
+import hashlib
+import logging
+import math
 import sqlite3
+import threading
 from pathlib import Path
 import os
 
+from core.memory_cache import MISSING, get_shared_cache
+from core.sqlite_store import SQLiteKVStore, WriteBehindQueue
+from core.tm_pack import close_packs, default_packs, open_packs, pack_lookup, pack_lookup_many
+
+# 해시 라우팅 레이아웃 식별자. 각 샤드의 cache_meta 테이블에 기록된다.
+SHARD_LAYOUT = "hash-v1"
+DEFAULT_SHARD_COUNT = 8
+
+
+def shard_index_for_key(key, shard_count):
+    """Return the shard a *key* belongs to.
+
+    ``hash()`` is salted per process, so a keyed digest is used instead to keep
+    the routing stable across runs and machines.
+    """
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % shard_count
+
+
+def shard_file_name(base_name, index, shard_count):
+    width = max(2, len(str(shard_count - 1)))
+    return f"{base_name}{index:0{width}d}.db"
+
+
+class BloomFilter:
+    """Fixed-size bloom filter used to skip legacy shards on lookups."""
+
+    def __init__(self, capacity, error_rate=0.01):
+        capacity = max(int(capacity), 1)
+        bit_count = int(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+        self.bit_count = max(bit_count, 64)
+        self.hash_count = max(1, round(self.bit_count / capacity * math.log(2)))
+        self.bits = bytearray((self.bit_count + 7) // 8)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:], "big") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.bit_count
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+def _initialize_db(conn):
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT)"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS cache_meta (name TEXT PRIMARY KEY, value TEXT)"
+    )
+    conn.commit()
+
+
+def _read_meta(conn):
+    rows = conn.execute("SELECT name, value FROM cache_meta").fetchall()
+    return dict(rows)
+
+
+def _write_layout_meta(conn, index, shard_count):
+    conn.executemany(
+        "INSERT OR REPLACE INTO cache_meta (name, value) VALUES (?, ?)",
+        [
+            ("layout", SHARD_LAYOUT),
+            ("shard_index", str(index)),
+            ("shard_count", str(shard_count)),
+        ],
+    )
+    conn.commit()
+
+
 class TranslationCacheManager:
-    def __init__(self, base_dir="cache", base_name="translation_cache", max_items=1_000_000):
+    """Key/value translation cache spread over several SQLite files.
+
+    New cache directories use a fixed number of shards and route every key to
+    exactly one of them by hash, so a lookup touches a single database and an
+    insert never has to count rows.  Directories written by the older
+    fill-until-full scheme are still readable: each shard gets a bloom filter
+    built once at open time so misses skip the shards that cannot hold the key.
+    Run ``python -m core.cache_handler rebalance`` to convert them.
+
+    With ``write_behind=True`` single inserts are queued and flushed in batches
+    (one transaction per shard) by a background thread; pending entries remain
+    visible to lookups until they land on disk.
+
+    Lookups go through a bounded in-memory LRU first.  By default every manager
+    on the same directory shares one process-wide tier, so it survives across
+    documents; pass a :class:`~core.memory_cache.MemoryLRUCache` to use a
+    dedicated one or ``memory_cache=False`` to disable it.
+
+    ``packs`` lists read-only translation memory packs (paths, directories of
+    ``*.tmpack`` files or open :class:`~core.tm_pack.TMPack` objects) that are
+    consulted after the memory tier and before SQLite; see ``core.tm_pack``.
+    Without it the packs in ``$OCR_TRANSLATE_TM_PACKS`` are used; pass
+    ``packs=()`` to open none.
+    """
+
+    def __init__(self, base_dir="cache", base_name="translation_cache", max_items=1_000_000,
+                 shard_count=DEFAULT_SHARD_COUNT, write_behind=False, flush_batch_size=500,
+                 flush_interval=1.0, memory_cache=None, packs=None):
         self.base_dir = Path(base_dir)
         self.base_name = base_name
         self.max_items = max_items
-        self.db_paths = self.load_db_list()
-        self.connections = {path: sqlite3.connect(path) for path in self.db_paths}
-        for conn in self.connections.values():
-            self._initialize_db(conn)
-
-    def _initialize_db(self, conn):
-        conn.execute(
-            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT)"
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        if memory_cache is None:
+            memory_cache = get_shared_cache(f"translation:{(self.base_dir / base_name).resolve()}")
+        self.memory = memory_cache if memory_cache is not False else None
+        self._pack_args = list(default_packs() if packs is None else packs)
+        self.packs = open_packs(self._pack_args)
+        self.db_paths = self.load_db_list(shard_count)
+        self.stores = {path: SQLiteKVStore(path) for path in self.db_paths}
+        for store in self.stores.values():
+            with store.lock:
+                _initialize_db(store.conn)
+
+        self.shard_count = self._detect_hashed_layout()
+        self.hashed = self.shard_count is not None
+        self._shards = list(self.stores.items())
+        self._row_counts = {}
+        self._blooms = {}
+        self._route_lock = threading.Lock()
+        if not self.hashed:
+            logging.info(
+                f"{self.base_name}: 레거시 샤드 레이아웃 감지 ({len(self._shards)}개), 블룸 필터 사용"
+            )
+            self._load_legacy_state()
+        self._write_queue = (
+            WriteBehindQueue(self._write_many, flush_batch_size, flush_interval)
+            if write_behind else None
         )
-        conn.commit()
 
-    def load_db_list(self):
+    def load_db_list(self, shard_count=DEFAULT_SHARD_COUNT):
         db_files = sorted(self.base_dir.glob(f"{self.base_name}*.db"))
         if not db_files:
-            default_path = self.base_dir / f"{self.base_name}00.db"
-            default_path.touch()
-            return [default_path]
+            # 빈 디렉터리는 처음부터 해시 레이아웃으로 만든다.
+            db_files = []
+            for index in range(shard_count):
+                path = self.base_dir / shard_file_name(self.base_name, index, shard_count)
+                conn = sqlite3.connect(path)
+                _initialize_db(conn)
+                _write_layout_meta(conn, index, shard_count)
+                conn.close()
+                db_files.append(path)
         return db_files
 
+    def _detect_hashed_layout(self):
+        expected = None
+        for position, store in enumerate(self.stores.values()):
+            meta = _read_meta(store.conn)
+            if meta.get("layout") != SHARD_LAYOUT:
+                return None
+            count = int(meta["shard_count"])
+            if expected is None:
+                expected = count
+            if count != expected or int(meta["shard_index"]) != position:
+                return None
+        if expected != len(self.stores):
+            return None
+        return expected
+
+    def _load_legacy_state(self):
+        for path, store in self._shards:
+            count = store.count()
+            self._row_counts[path] = count
+            bloom = BloomFilter(max(count, self.max_items))
+            for (key,) in store.conn.execute("SELECT key FROM cache"):
+                bloom.add(key)
+            self._blooms[path] = bloom
+
+    def _shard_for_key(self, key):
+        return self._shards[shard_index_for_key(key, self.shard_count)]
+
     def get_total_items(self):
-        total = 0
-        for conn in self.connections.values():
-            cursor = conn.execute("SELECT COUNT(*) FROM cache")
-            total += cursor.fetchone()[0]
-        return total
-
-    def detect_db_for_insert(self):
-        for path, conn in self.connections.items():
-            cursor = conn.execute("SELECT COUNT(*) FROM cache")
-            if cursor.fetchone()[0] < self.max_items:
-                return path, conn
-
-        index = len(self.connections)
+        if self._write_queue is not None:
+            self._write_queue.flush()
+        return sum(store.count() for store in self.stores.values())
+
+    def detect_db_for_insert(self, key=None):
+        if self.hashed:
+            if key is None:
+                raise ValueError("hashed shard layout needs the key to pick a shard")
+            return self._shard_for_key(key)
+
+        # 레거시 레이아웃: 열 때 센 행 수를 메모리에서 관리해 COUNT(*)를 피한다.
+        for path, store in self._shards:
+            if self._row_counts[path] < self.max_items:
+                return path, store
+
+        index = len(self.stores)
         new_db_path = self.base_dir / f"{self.base_name}{index:02d}.db"
-        new_conn = sqlite3.connect(new_db_path)
-        self._initialize_db(new_conn)
-        self.connections[new_db_path] = new_conn
-        return new_db_path, new_conn
+        new_store = SQLiteKVStore(new_db_path)
+        with new_store.lock:
+            _initialize_db(new_store.conn)
+        self.stores[new_db_path] = new_store
+        self._shards.append((new_db_path, new_store))
+        self._row_counts[new_db_path] = 0
+        self._blooms[new_db_path] = BloomFilter(self.max_items)
+        return new_db_path, new_store
+
+    def _write_many(self, items):
+        batches = {}
+        with self._route_lock:
+            for key, value in items:
+                path, store = self.detect_db_for_insert(key)
+                batches.setdefault(path, (store, []))[1].append((key, value))
+                if not self.hashed:
+                    self._row_counts[path] += 1
+                    self._blooms[path].add(key)
+        for path, (store, rows) in batches.items():
+            try:
+                store.put_many(rows)
+            except Exception as e:
+                print(f"Insert error in {path.name}: {e}")
 
     def add_entry(self, key, value):
-        path, conn = self.detect_db_for_insert()
-        try:
-            conn.execute("INSERT OR REPLACE INTO cache (key, value) VALUES (?, ?)", (key, value))
-            conn.commit()
-        except Exception as e:
-            print(f"Insert error in {path.name}: {e}")
+        if self.memory is not None:
+            self.memory.set(key, value)
+        if self._write_queue is not None:
+            self._write_queue.put(key, value)
+            return
+        self._write_many([(key, value)])
+
+    def put_many(self, items):
+        """Store ``(key, value)`` pairs (or a dict) with one transaction per shard."""
+        items = list(items.items()) if isinstance(items, dict) else list(items)
+        if self.memory is not None:
+            self.memory.set_many(items)
+        if self._write_queue is not None:
+            self._write_queue.put_many(items)
+        else:
+            self._write_many(items)
 
     def get_entry(self, key):
-        for path, conn in self.connections.items():
-            cursor = conn.execute("SELECT value FROM cache WHERE key=?", (key,))
-            row = cursor.fetchone()
-            if row:
-                return row[0]
+        if self.memory is not None:
+            value = self.memory.get(key, MISSING)
+            if value is not MISSING:
+                return value
+        if self.packs:
+            # 팩은 mmap 조회라 충분히 빨라 메모리 계층에 올리지 않는다.
+            value = pack_lookup(self.packs, key)
+            if value is not None:
+                return value
+        value = self._lookup(key)
+        if value is not None and self.memory is not None:
+            self.memory.set(key, value)
+        return value
+
+    def _lookup(self, key):
+        if self._write_queue is not None:
+            pending = self._write_queue.get(key)
+            if pending is not None:
+                return pending
+
+        if self.hashed:
+            _, store = self._shard_for_key(key)
+            return store.get(key)
+
+        for path, store in self._shards:
+            if key not in self._blooms[path]:
+                continue
+            value = store.get(key)
+            if value is not None:
+                return value
         return None
 
+    def get_many(self, keys):
+        """Return ``{key: value}`` for every cached key, one query per shard."""
+        keys = list(dict.fromkeys(keys))
+        found = self.memory.get_many(keys) if self.memory is not None else {}
+        remaining = [key for key in keys if key not in found]
+        if remaining and self.packs:
+            found.update(pack_lookup_many(self.packs, remaining))
+            remaining = [key for key in remaining if key not in found]
+        if not remaining:
+            return found
+        loaded = self._lookup_many(remaining)
+        if self.memory is not None:
+            self.memory.set_many(loaded)
+        found.update(loaded)
+        return found
+
+    def _lookup_many(self, keys):
+        found = self._write_queue.get_many(keys) if self._write_queue is not None else {}
+        remaining = [key for key in keys if key not in found]
+
+        if self.hashed:
+            by_shard = {}
+            for key in remaining:
+                by_shard.setdefault(shard_index_for_key(key, self.shard_count), []).append(key)
+            for index, shard_keys in by_shard.items():
+                found.update(self._shards[index][1].get_many(shard_keys))
+            return found
+
+        for path, store in self._shards:
+            candidates = [key for key in remaining if key in self._blooms[path]]
+            if candidates:
+                found.update(store.get_many(candidates))
+                remaining = [key for key in remaining if key not in found]
+        return found
+
+    def flush(self):
+        if self._write_queue is not None:
+            self._write_queue.flush()
+
     def close_all(self):
-        for conn in self.connections.values():
-            conn.close()
\ No newline at end of file
+        if self._write_queue is not None:
+            self._write_queue.close()
+        for store in self.stores.values():
+            store.close()
+        close_packs(self.packs, keep=self._pack_args)
+
+
+def rebalance_shards(base_dir="cache", base_name="translation_cache",
+                     shard_count=DEFAULT_SHARD_COUNT, batch_size=10_000, keep_legacy=True):
+    """Rewrite the shards under *base_dir* into the hashed layout.
+
+    Works for legacy fill-until-full directories as well as hashed layouts with
+    a different shard count.  Old files are renamed to ``*.db.legacy`` (or
+    removed when ``keep_legacy`` is false) only after every new shard has been
+    written, so an interrupted run leaves the original cache untouched.
+    Returns the number of rows copied.
+    """
+    base_dir = Path(base_dir)
+    old_paths = sorted(base_dir.glob(f"{base_name}*.db"))
+    tmp_paths = [
+        base_dir / (shard_file_name(base_name, index, shard_count) + ".rebalance")
+        for index in range(shard_count)
+    ]
+    for tmp in tmp_paths:
+        if tmp.exists():
+            tmp.unlink()
+
+    new_conns = [sqlite3.connect(tmp) for tmp in tmp_paths]
+    copied = 0
+    try:
+        for index, conn in enumerate(new_conns):
+            conn.execute("PRAGMA journal_mode=OFF")
+            conn.execute("PRAGMA synchronous=OFF")
+            _initialize_db(conn)
+            _write_layout_meta(conn, index, shard_count)
+
+        # 레거시 조회는 앞쪽 샤드가 우선이므로 뒤에서부터 덮어써 같은 결과를 유지한다.
+        for old_path in reversed(old_paths):
+            old_conn = sqlite3.connect(old_path)
+            try:
+                cursor = old_conn.execute("SELECT key, value FROM cache")
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    buckets = [[] for _ in range(shard_count)]
+                    for key, value in rows:
+                        buckets[shard_index_for_key(key, shard_count)].append((key, value))
+                    for conn, bucket in zip(new_conns, buckets):
+                        if bucket:
+                            conn.executemany(
+                                "INSERT OR REPLACE INTO cache (key, value) VALUES (?, ?)", bucket
+                            )
+                    copied += len(rows)
+            finally:
+                old_conn.close()
+        for conn in new_conns:
+            conn.commit()
+    finally:
+        for conn in new_conns:
+            conn.close()
+
+    for old_path in old_paths:
+        if keep_legacy:
+            old_path.rename(old_path.with_name(old_path.name + ".legacy"))
+        else:
+            os.remove(old_path)
+    for tmp in tmp_paths:
+        tmp.rename(tmp.with_name(tmp.name[: -len(".rebalance")]))
+    logging.info(f"{base_name}: {copied}개 항목을 {shard_count}개 샤드로 재배치")
+    return copied
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Translation cache shard tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rebalance = sub.add_parser("rebalance", help="migrate shards to the hashed layout")
+    rebalance.add_argument("--base-dir", default="cache")
+    rebalance.add_argument("--base-name", default="translation_cache")
+    rebalance.add_argument("--shards", type=int, default=DEFAULT_SHARD_COUNT)
+    rebalance.add_argument("--drop-legacy", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    rebalance_shards(args.base_dir, args.base_name, args.shards, keep_legacy=not args.drop_legacy)
@@ -0,0 +1,763 @@
+import asyncio
+import hashlib
+import html
+import io
+import json
+import logging
+import threading
+import time
+from collections import Counter
+from typing import Dict
+
+from config import OCR_LANG, OCR_PSM, TARGET_LANG
+from core import metrics
+from core.async_translate import AsyncBatchTranslator
+from core.batch_translate import (
+    DEFAULT_MAX_CHARS,
+    DEFAULT_MAX_SEGMENTS,
+    ManagerPool,
+    translate_batch,
+)
+from core.fuzzy_tm import FUZZY_TM_VERSION
+from core.job_journal import JobJournal
+from core.memory_cache import MISSING, get_shared_cache
+from core.page_fingerprint import fingerprint_pixmap
+from core.pdf_overlay import ocr_blocks, text_layer_blocks
+from core.page_source import (
+    SharedPixmap,
+    attach_shared,
+    publish_pixmap,
+    release_shared,
+    text_layer_is_usable,
+)
+from core.pipeline import DEFAULT_MAX_IN_FLIGHT, DEFAULT_TRANSLATE_CONCURRENCY, run_page_pipeline
+from core.rate_limiter import TRANSLATOR_BACKEND, get_scheduler
+from core.script_detect import PageLanguageDetector
+from core.utils_text import SEGMENTER_VERSION, split_into_sentences
+from core.worker_pool import get_ocr_pool
+
+# fitz, pytesseract, PIL, 번역기와 통계 언어 감지기는 처음 쓸 때 불러온다.  OCR 풀 워커는
+# OCR 모듈만, GUI 없는 경로는 Qt 없이 이 모듈을 불러올 수 있어 시작이 빨라진다.
+
+ALLOWED_SOURCE_LANGS = {"en", "zh", "zh-cn", "zh-tw", "ja", "fr", "de", "es"}
+# 감지 방식이 바뀌면 작업 저널도 새로 시작하도록 설정값에 포함한다.
+LANGUAGE_DETECTOR_VERSION = "script-v1"
+# OCR 용 래스터화 해상도 (OCR 상자를 PDF 좌표로 바꿀 때도 쓴다)
+OCR_DPI = 200
+
+
+def _translate_text_sync(text, target_lang, source_lang=None):
+    """Translate *text* synchronously.
+
+    The previous implementation accidentally called ``translate_text`` from
+    within itself via the asynchronous wrapper which resulted in infinite
+    recursion.  To keep the synchronous implementation reusable by both the
+    public synchronous and asynchronous helpers we perform the actual work in
+    this internal helper.
+    """
+
+    detected_lang = source_lang or detect_text_language(text)
+
+    manager = _create_manager(detected_lang, target_lang)
+    try:
+        return get_scheduler(TRANSLATOR_BACKEND).call(
+            manager.translate, text, target=target_lang, chars=len(text)
+        )
+    finally:
+        # ``TranslatorManager`` exposes ``close`` to release any network or
+        # process resources.  Always close it even if translation fails so the
+        # caller does not leak resources.
+        manager.close()
+
+
+def detect_language_safe(text):
+    from core.lang_utils import detect_language_safe as detect
+
+    return detect(text)
+
+
+_text_detector = PageLanguageDetector(detect_language_safe)
+
+
+def detect_text_language(text):
+    """Detect the language of one standalone text (script ranges first)."""
+    return _text_detector.detect(text)
+
+
+def _create_manager(source_lang, target_lang):
+    from translate.manager import TranslatorManager
+
+    manager_kwargs = {"target": target_lang}
+    if source_lang:
+        manager_kwargs["source"] = source_lang
+    return TranslatorManager(**manager_kwargs)
+
+
+def translate_text(text, target_lang, source_lang=None):
+    """Blocking translation helper used by the rest of the code base."""
+    return _translate_text_sync(text, target_lang, source_lang)
+
+
+def _persistent_key(source_lang, target_lang, sentence):
+    return f"{source_lang}>{target_lang}\t{sentence}"
+
+
+# 워커 프로세스마다 한 번만 만드는 OCR 캐시 (Pool initializer 에서 설정)
+_worker_ocr_cache = None
+
+
+def init_ocr_worker(cache_enabled=True):
+    """``Pool`` initializer: import the OCR modules, open the OCR cache and locate tesseract once."""
+    global _worker_ocr_cache
+    # 초기화 함수가 예외를 내면 Pool 이 워커를 끝없이 다시 띄우므로 실패는 기록만 한다.
+    try:
+        _worker_ocr_cache = _open_ocr_cache() if cache_enabled else None
+    except Exception:
+        logging.warning("OCR 캐시 열기 실패", exc_info=True)
+        _worker_ocr_cache = None
+    try:
+        import pytesseract
+        from PIL import Image  # noqa: F401
+
+        pytesseract.get_tesseract_version()
+    except Exception:
+        logging.warning("tesseract 초기화 실패", exc_info=True)
+
+
+def _open_ocr_cache():
+    from core.ocr_cache import OcrCache
+
+    return OcrCache()
+
+
+def _ocr_cache_for(cache_enabled):
+    global _worker_ocr_cache
+    if not cache_enabled:
+        return None
+    if _worker_ocr_cache is None:
+        _worker_ocr_cache = _open_ocr_cache()
+    return _worker_ocr_cache
+
+
+def _recognize(img, layout):
+    """OCR text of *img*, or its paragraph blocks serialized as JSON when *layout* is set."""
+    import pytesseract
+
+    if not layout:
+        return pytesseract.image_to_string(img, lang=OCR_LANG, config=f"--psm {OCR_PSM}")
+    data = pytesseract.image_to_data(
+        img, lang=OCR_LANG, config=f"--psm {OCR_PSM}", output_type=pytesseract.Output.DICT
+    )
+    return json.dumps(ocr_blocks(data, 72 / OCR_DPI), ensure_ascii=False)
+
+
+def _ocr_result(value, layout):
+    return json.loads(value) if layout else value
+
+
+def _ocr_shared_pixmap(pixmap: SharedPixmap, ocr_cache, layout=False):
+    shm = attach_shared(pixmap.shm_name)
+    buf = shm.buf[: pixmap.stride * pixmap.height]
+    try:
+        # 픽셀 원본의 해시를 캐시 키로 사용 (JPEG 인코딩 차이에 영향받지 않음)
+        cache_key = (b"layout:" if layout else b"gray:") + hashlib.blake2b(
+            buf, digest_size=32
+        ).digest()
+        if ocr_cache is not None:
+            cached = ocr_cache.get_text(cache_key)
+            if cached:
+                return _ocr_result(cached, layout)
+
+        from PIL import Image
+
+        img = Image.frombuffer(
+            "L", (pixmap.width, pixmap.height), buf, "raw", "L", pixmap.stride, 1
+        )
+        try:
+            text = _recognize(img, layout)
+        finally:
+            del img
+
+        if ocr_cache is not None:
+            ocr_cache.save_text(cache_key, text)
+        return _ocr_result(text, layout)
+    finally:
+        buf.release()
+        shm.close()
+
+
+def ocr_single_page(args, layout=False):
+    """OCR one page inside a pool worker.
+
+    The payload is either the page's text layer (``str``, or a list of
+    ``(rect, text)`` blocks in layout mode, returned as is), a
+    :class:`~core.page_source.SharedPixmap` pointing at raw grayscale pixels
+    in shared memory, or encoded image bytes.  With *layout* the OCR result
+    is a list of ``(rect, text)`` paragraph blocks in PDF points.
+    """
+    i, payload, cache_enabled = args
+    if isinstance(payload, (str, list)):
+        return (i, payload)
+    ocr_cache = _ocr_cache_for(cache_enabled)
+
+    try:
+        if isinstance(payload, SharedPixmap):
+            return (i, _ocr_shared_pixmap(payload, ocr_cache, layout))
+
+        cache_key = b"layout:" + payload if layout else payload
+        if ocr_cache is not None:
+            cached = ocr_cache.get_text(cache_key)
+            if cached:
+                return (i, _ocr_result(cached, layout))
+
+        from PIL import Image
+
+        img = Image.open(io.BytesIO(payload))
+        text = _recognize(img, layout)
+
+        if ocr_cache is not None:
+            ocr_cache.save_text(cache_key, text)
+
+        return (i, _ocr_result(text, layout))
+    except Exception as e:
+        return (i, f"[Page {i+1}] OCR 실패: {e}")
+
+
+def _is_failed_result(result):
+    return "[번역 실패:" in result or "OCR 실패:" in result
+
+
+def ocr_page_timed(args):
+    """:func:`ocr_single_page` that also reports the seconds spent in the worker."""
+    started = time.perf_counter()
+    i, text = ocr_single_page(args)
+    return (i, text, time.perf_counter() - started)
+
+
+def ocr_layout_page_timed(args):
+    """:func:`ocr_page_timed` returning paragraph blocks with their page positions."""
+    started = time.perf_counter()
+    i, blocks = ocr_single_page(args, layout=True)
+    return (i, blocks, time.perf_counter() - started)
+
+
+class DocumentTranslator:
+    """Engine responsible for extracting text and performing translations.
+
+    It has no GUI dependency: :meth:`process` reports each page through a
+    plain callback, so the same engine backs the Qt ``TranslateWorker`` and
+    the headless batch CLI.  Pass ``pool`` to use a specific OCR process
+    pool; otherwise the process-wide pool of :func:`core.worker_pool.get_ocr_pool`
+    (``pool_size`` workers) is created on first use and reused by every
+    later document.
+
+    The previous implementation instantiated a new ``TranslatorManager`` for
+    every page/language combination which is unnecessarily expensive.  A single
+    PDF may contain hundreds of sentences in the same language which means the
+    creation/teardown of the manager dominated the translation time.  We now
+    keep the managers alive for the lifetime of the worker and reuse
+    translations for identical sentences which significantly reduces repeated
+    RPC calls.
+
+    Sentence translations and language detection results live in bounded,
+    process-wide memory caches so repeated boilerplate (headers, footers, legal
+    text) is resolved from memory across documents.  An optional
+    ``persistent_cache`` (a ``TranslationCacheManager``) sits behind the memory
+    tier and is consulted before the network; after it, an optional
+    ``fuzzy_tm`` (a :class:`~core.fuzzy_tm.FuzzyTranslationMemory`) reuses
+    the translation of a near-identical sentence, so OCR noise does not cost
+    another request.  Fuzzy hits are counted apart from exact ones
+    (``fuzzy_hits`` / ``fuzzy_misses``) and never enter the exact tiers.  Cache misses are sent as
+    size-bounded batch requests per page (or per ``pages_per_batch`` pages).
+
+    OCR and translation run as overlapping stages (see
+    :func:`core.pipeline.run_page_pipeline`): pages are OCR'd out of order,
+    up to ``translate_concurrency`` pages are translated at once and
+    ``page_done`` is still emitted in page order unless ``emit_out_of_order``
+    is set.
+
+    When a ``page_dedup`` index (a :class:`~core.page_fingerprint.PageDedupIndex`)
+    is passed, each page rasterized for OCR is first looked up by a lossless
+    digest of its pixels, so pages that render identically (repeated covers,
+    letterheads) are OCR'd once per corpus.  Near-duplicate matching is up to
+    the index's ``max_distance``; nothing is deduplicated without an index.
+
+    With ``resume`` enabled every finished page is written to a
+    :class:`~core.job_journal.JobJournal` keyed by the file's hash, the target
+    language and the engine settings.  A rerun replays those pages at once and
+    only processes the rest.  ``page_range`` (``(start, stop)``, half-open)
+    limits the run to part of the document and is journaled as its own job.
+
+    ``manager_factory(source, target)`` and ``ocr_fn`` replace the translator
+    and the pool-side OCR function (which must be picklable and return
+    ``(index, text, seconds)``); the benchmarks plug fake backends in here.
+
+    With ``layout`` enabled, pages are read as positioned blocks (text-layer
+    blocks or OCR paragraphs) and translated block by block.  Page results
+    then separate blocks with blank lines, and :meth:`pop_layout` returns the
+    ``(rect, translation)`` blocks of a page for
+    :class:`~core.pdf_overlay.PdfOverlayWriter`.  Page dedup is skipped in
+    this mode because it only stores text.  The journal keeps each page's
+    blocks, so pages replayed from it keep their layout too.
+    """
+
+    def __init__(self, file_path, lang=TARGET_LANG, persistent_cache=None,
+                 page_dedup=None, page_range=None, resume=True, pool=None,
+                 manager_factory=None, ocr_fn=None, layout=False, fuzzy_tm=None):
+        self.file_path = file_path
+        self.lang = lang
+        self.pool = pool
+        # 전역 OCR 풀 크기 (None 이면 OCR_TRANSLATE_POOL_SIZE 또는 기본값)
+        self.pool_size = None
+        self.stats = Counter()
+        self._stats_lock = threading.Lock()
+        self.cache_enabled = True
+        self.persistent_cache = persistent_cache
+        self.fuzzy_tm = fuzzy_tm
+        self._managers = ManagerPool(manager_factory or _create_manager)
+        self.layout = layout
+        self.ocr_fn = ocr_fn or (ocr_layout_page_timed if layout else ocr_page_timed)
+        self._layouts = {}
+        self._sentence_cache = get_shared_cache("sentence_translation")
+        self._language_detection_cache = get_shared_cache("language_detection")
+        self._language_detector = PageLanguageDetector(self._detect_statistical)
+        # 번역 요청 묶음 크기: 몇 페이지를 모아 한 번에 보낼지, 요청당 글자/세그먼트 한도
+        self.pages_per_batch = 1
+        self.batch_max_chars = DEFAULT_MAX_CHARS
+        self.batch_max_segments = DEFAULT_MAX_SEGMENTS
+        self.translate_concurrency = DEFAULT_TRANSLATE_CONCURRENCY
+        self.max_pages_in_flight = DEFAULT_MAX_IN_FLIGHT
+        self.emit_out_of_order = False
+        # 텍스트 레이어가 있는 페이지는 OCR 없이 처리
+        self.use_text_layer = True
+        self._shared_pages = {}
+        self.page_dedup = page_dedup
+        self._page_fingerprints = {}
+        self.page_range = page_range
+        self.resume = resume
+        self._journal = None
+        self.metrics_summary = None
+
+    def _engine_settings(self):
+        """Settings that change page results; a change starts a fresh journal."""
+        return {
+            "ocr_lang": OCR_LANG,
+            "ocr_psm": OCR_PSM,
+            "use_text_layer": self.use_text_layer,
+            "language_detector": LANGUAGE_DETECTOR_VERSION,
+            "segmenter": SEGMENTER_VERSION,
+            "layout": self.layout,
+            "fuzzy_tm": (
+                f"{FUZZY_TM_VERSION}:{self.fuzzy_tm.threshold}" if self.fuzzy_tm is not None else None
+            ),
+            "allowed_source_langs": sorted(ALLOWED_SOURCE_LANGS),
+        }
+
+    def _count(self, **increments):
+        with self._stats_lock:
+            self.stats.update(increments)
+
+    def process(self, on_page):
+        """Translate the document, calling ``on_page(index, result)`` per page.
+
+        When :mod:`core.metrics` is enabled, the stage timings and counters of
+        this run are left in ``self.metrics_summary``.
+        """
+        import fitz
+
+        metrics_mark = metrics.mark()
+        try:
+            with fitz.open(self.file_path) as doc:
+                total_pages = len(doc)
+                start, stop = self.page_range or (0, total_pages)
+                page_order = range(max(start, 0), min(stop, total_pages))
+
+                completed = {}
+                if self.resume:
+                    self._journal = JobJournal(
+                        self.file_path, self.lang, self._engine_settings(), self.page_range
+                    )
+                    completed = {
+                        i: result
+                        for i, result in self._journal.completed().items()
+                        if i in page_order
+                    }
+                    if completed:
+                        logging.info(
+                            f"작업 재개: {len(completed)}/{len(page_order)} 페이지 완료됨"
+                        )
+                        if self.layout:
+                            # 재생한 페이지도 pop_layout 으로 블록 위치를 돌려준다.
+                            self._layouts.update(
+                                (i, blocks)
+                                for i, blocks in self._journal.layouts().items()
+                                if i in completed
+                            )
+                todo = [i for i in page_order if i not in completed]
+
+                def _page_image_iter():
+                    for page_index in todo:
+                        page = doc.load_page(page_index)
+                        # 텍스트 레이어가 쓸 만하면 래스터화/OCR 을 건너뛴다.
+                        if self.use_text_layer:
+                            with metrics.span("text_layer", page=page_index) as span:
+                                text = page.get_text("text")
+                                usable = text_layer_is_usable(text)
+                                span.set(usable=usable)
+                            if usable:
+                                metrics.count("pages", source="text_layer")
+                                if self.layout:
+                                    text = text_layer_blocks(page)
+                                yield (page_index, text, self.cache_enabled)
+                                continue
+
+                        with metrics.span("rasterize", page=page_index):
+                            pix = page.get_pixmap(dpi=OCR_DPI, colorspace=fitz.csGRAY, alpha=False)
+
+                        # 픽셀까지 같은 페이지는 이미 OCR 한 결과를 재사용
+                        if self.page_dedup is not None and not self.layout:
+                            with metrics.span("page_dedup.lookup", page=page_index):
+                                fingerprint = fingerprint_pixmap(
+                                    pix, near=self.page_dedup.max_distance > 0
+                                )
+                                cached = self.page_dedup.lookup(fingerprint)
+                            metrics.count(
+                                "cache_lookups",
+                                tier="page_dedup",
+                                result="miss" if cached is None else "hit",
+                            )
+                            if cached is not None:
+                                metrics.count("pages", source="page_dedup")
+                                yield (page_index, cached, self.cache_enabled)
+                                continue
+                            self._page_fingerprints[page_index] = fingerprint
+
+                        # 그레이스케일 원시 픽셀을 공유 메모리로 전달 (인코딩/디코딩 없음)
+                        with metrics.span("rasterize.publish", page=page_index):
+                            shm, descriptor = publish_pixmap(pix)
+                        metrics.count("pages", source="ocr")
+                        metrics.count("ocr_bytes_shared", pix.stride * pix.height)
+                        self._shared_pages[page_index] = shm
+                        yield (page_index, descriptor, self.cache_enabled)
+
+                def _run_pipeline(pool):
+                    asyncio.run(
+                        run_page_pipeline(
+                            _page_image_iter(),
+                            self.ocr_fn,
+                            pool,
+                            self._translate_pages_async,
+                            on_page,
+                            page_order=page_order,
+                            concurrency=self.translate_concurrency,
+                            max_in_flight=self.max_pages_in_flight,
+                            pages_per_batch=self.pages_per_batch,
+                            ordered=not self.emit_out_of_order,
+                            prefilled=completed,
+                        )
+                    )
+
+                # 스트리밍 처리: 래스터화/OCR 과 번역을 겹쳐 실행.
+                # 풀을 받지 않았으면 문서마다 새로 띄우지 않고 프로세스 전역 풀을 재사용한다.
+                _run_pipeline(
+                    self.pool if self.pool is not None
+                    else get_ocr_pool(self.pool_size, self.cache_enabled)
+                )
+                self._count(replayed_pages=len(completed))
+                if (
+                    self._journal is not None
+                    and self._journal.first_incomplete(page_order) is None
+                ):
+                    self._journal.mark_finished()
+        finally:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+            self._release_shared_pages(list(self._shared_pages))
+            self._page_fingerprints.clear()
+            self._layouts.clear()
+            if self.page_dedup is not None:
+                logging.info(f"페이지 중복 제거: {self.page_dedup.stats()}")
+            self._close_managers()
+            self.metrics_summary = metrics.summary(metrics_mark)
+
+    def _release_shared_pages(self, indexes):
+        for index in indexes:
+            shm = self._shared_pages.pop(index, None)
+            if shm is not None:
+                release_shared(shm)
+
+    def _prepare_page(self, text, page=None):
+        """Split OCR *text* into ``(lang, sentence)`` pairs; ``None`` if empty."""
+        # 줄바꿈/하이픈/한중일 줄 이음 교정과 문장 분리를 한 번에 처리한다.
+        sentences = split_into_sentences(text)
+        if not sentences:
+            return None
+
+        # 페이지 전체의 문자 체계로 한 번에 판정하고, 라틴 문자만 통계 감지기로 보낸다.
+        with metrics.span("detect_language", page=page, sentences=len(sentences)):
+            langs = self._language_detector.detect_page(sentences)
+        return list(zip(langs, sentences))
+
+    def _prepare_blocks(self, blocks, page=None):
+        """Layout variant of :meth:`_prepare_page`: ``[(rect, pairs), ...]`` per non-empty block."""
+        split = [(rect, split_into_sentences(text)) for rect, text in blocks]
+        split = [(rect, sentences) for rect, sentences in split if sentences]
+        if not split:
+            return None
+
+        flat = [sentence for _, sentences in split for sentence in sentences]
+        # 블록이 나뉘어 있어도 언어는 페이지 단위로 한 번에 판정한다.
+        with metrics.span("detect_language", page=page, sentences=len(flat)):
+            langs = iter(self._language_detector.detect_page(flat))
+        return [
+            (rect, [(next(langs), sentence) for sentence in sentences])
+            for rect, sentences in split
+        ]
+
+    def pop_layout(self, index):
+        """``[(rect, translation), ...]`` of a page translated in layout mode, or ``None``."""
+        return self._layouts.pop(index, None)
+
+    def _detect_statistical(self, text):
+        """Statistical detection for Latin-script text, memoized process-wide."""
+        lang = self._language_detection_cache.get(text, MISSING)
+        metrics.count(
+            "cache_lookups", tier="language_memory", result="miss" if lang is MISSING else "hit"
+        )
+        if lang is MISSING:
+            with metrics.span("detect_language.statistical", chars=len(text)):
+                lang = detect_language_safe(text)
+            self._language_detection_cache.set(text, lang)
+        return lang
+
+    async def _translate_pages_async(self, ocr_results):
+        self._release_shared_pages([i for i, _, _ in ocr_results])
+        return await asyncio.to_thread(self._translate_ocr_results, ocr_results)
+
+    def _translate_ocr_results(self, ocr_results):
+        for i, text, seconds in ocr_results:
+            # OCR 은 풀 워커에서 돌았으므로 보고된 시간으로 방금 끝난 구간을 기록한다.
+            metrics.add_span("ocr", seconds, page=i)
+            fingerprint = self._page_fingerprints.pop(i, None)
+            if fingerprint is None or self.page_dedup is None:
+                continue
+            if text.startswith(f"[Page {i+1}] OCR 실패"):
+                continue
+            try:
+                self.page_dedup.record(fingerprint, text, seconds)
+            except Exception:
+                logging.exception("페이지 지문 저장 실패")
+        results = self._translate_pages([(i, text) for i, text, _ in ocr_results])
+        if self._journal is not None:
+            for i, result in results:
+                # 실패한 페이지는 기록하지 않아 다음 실행에서 다시 시도한다.
+                if not _is_failed_result(result):
+                    self._journal.record(i, result, self._layouts.get(i))
+        return results
+
+    def _translate_pages(self, pages):
+        """Translate a group of OCR'd pages with batched requests.
+
+        *pages* holds ``(index, text)`` or, in layout mode, ``(index, blocks)``.
+        Returns ``[(index, result), ...]`` in the order of *pages*; failures are
+        reported in the page text rather than raised.
+        """
+        prepared = {}
+        wanted: Dict[str, Dict[str, None]] = {}
+        for i, content in pages:
+            try:
+                if isinstance(content, str):
+                    items = self._prepare_page(content, page=i)
+                    prepared[i] = [(None, items)] if items else None
+                else:
+                    prepared[i] = self._prepare_blocks(content, page=i)
+            except Exception as exc:
+                prepared[i] = exc
+                continue
+            for _, items in prepared[i] or ():
+                for lang, sentence in items:
+                    if lang in ALLOWED_SOURCE_LANGS:
+                        wanted.setdefault(lang, {})[sentence] = None
+
+        translations = {}
+        failures = {}
+        for lang, sentences in wanted.items():
+            try:
+                translations[lang] = self._translate_sentences(lang, list(sentences))
+            except Exception as exc:
+                failures[lang] = exc
+
+        results = []
+        for i, _ in pages:
+            blocks = prepared[i]
+            if blocks is None:
+                results.append((i, f"[Page {i+1}]\n[빈 페이지 또는 인식 실패]"))
+                continue
+            try:
+                if isinstance(blocks, Exception):
+                    raise blocks
+
+                translated_blocks = []
+                for rect, items in blocks:
+                    translated_sentences = []
+                    for lang, sentence in items:
+                        if lang in ALLOWED_SOURCE_LANGS:
+                            if lang in failures:
+                                raise failures[lang]
+                            translated_sentences.append(translations[lang][sentence])
+                        else:
+                            translated_sentences.append(sentence)  # 허용 외 언어는 원문 유지
+                    translated_blocks.append(
+                        (rect, html.unescape(" ".join(translated_sentences).strip()))
+                    )
+
+                result = f"[Page {i+1}]\n" + "\n\n".join(text for _, text in translated_blocks)
+                if blocks[0][0] is not None:
+                    self._layouts[i] = translated_blocks
+            except Exception as exc:
+                logging.error(f"Page {i+1} 처리 실패: {exc}")
+                result = f"[Page {i+1}]\n[번역 실패: {exc}]"
+
+            results.append((i, result))
+
+        self._count(
+            pages=len(pages),
+            sentences=sum(
+                len(items)
+                for blocks in prepared.values()
+                if isinstance(blocks, list)
+                for _, items in blocks
+            ),
+        )
+        return results
+
+    def _translate_sentences(self, lang: str, sentences) -> Dict[str, str]:
+        """Translate *sentences* from *lang*, consulting the cache tiers first.
+
+        Only sentences missing from both the memory tier and the persistent
+        cache reach the translator, packed into size-bounded batch requests.
+        """
+        cache_keys = {sentence: (lang, self.lang, sentence) for sentence in sentences}
+        cached = self._sentence_cache.get_many(cache_keys.values())
+        results = {
+            sentence: cached[key] for sentence, key in cache_keys.items() if key in cached
+        }
+        missing = [sentence for sentence in sentences if sentence not in results]
+        self._count(memory_hits=len(results))
+        metrics.count("cache_lookups", len(results), tier="memory", result="hit")
+        metrics.count("cache_lookups", len(missing), tier="memory", result="miss")
+
+        if missing and self.persistent_cache is not None:
+            persistent_keys = {
+                _persistent_key(lang, self.lang, sentence): sentence for sentence in missing
+            }
+            with metrics.span("cache.persistent_lookup", lang=lang, keys=len(missing)):
+                stored = self.persistent_cache.get_many(persistent_keys)
+            metrics.count("cache_lookups", len(stored), tier="persistent", result="hit")
+            metrics.count(
+                "cache_lookups", len(missing) - len(stored), tier="persistent", result="miss"
+            )
+            for key, value in stored.items():
+                sentence = persistent_keys[key]
+                results[sentence] = value
+                self._sentence_cache.set(cache_keys[sentence], value)
+            missing = [sentence for sentence in missing if sentence not in results]
+            self._count(persistent_hits=len(stored))
+
+        scope = f"{lang}>{self.lang}"
+        if missing and self.fuzzy_tm is not None:
+            with metrics.span("cache.fuzzy_lookup", lang=lang, keys=len(missing)):
+                matches = self.fuzzy_tm.lookup_many(scope, missing)
+            metrics.count("cache_lookups", len(matches), tier="fuzzy", result="hit")
+            metrics.count("cache_lookups", len(missing) - len(matches), tier="fuzzy", result="miss")
+            for sentence, match in matches.items():
+                # 근사 일치는 이번 호출에만 쓴다.  캐시 계층에 넣으면 다음 조회 때
+                # 정확한 memory_hits 로 잡히므로 캐시에는 정확한 번역만 남긴다.
+                results[sentence] = match.value
+            self._count(fuzzy_hits=len(matches), fuzzy_misses=len(missing) - len(matches))
+            missing = [sentence for sentence in missing if sentence not in results]
+
+        if not missing:
+            return results
+        self._count(translated_sentences=len(missing))
+
+        with self._managers.acquire(lang, self.lang) as manager, metrics.span(
+            "translate", lang=lang, sentences=len(missing)
+        ):
+            translated = translate_batch(
+                manager,
+                missing,
+                self.lang,
+                max_chars=self.batch_max_chars,
+                max_segments=self.batch_max_segments,
+            )
+        fresh = dict(zip(missing, translated))
+        results.update(fresh)
+        self._sentence_cache.set_many(
+            (cache_keys[sentence], value) for sentence, value in fresh.items()
+        )
+        if self.persistent_cache is not None:
+            self.persistent_cache.put_many(
+                (_persistent_key(lang, self.lang, sentence), value)
+                for sentence, value in fresh.items()
+            )
+        if self.fuzzy_tm is not None:
+            self.fuzzy_tm.add_many(scope, fresh)
+        return results
+
+    def _translate_sentence(self, lang: str, sentence: str) -> str:
+        return self._translate_sentences(lang, [sentence])[sentence]
+
+    def _close_managers(self) -> None:
+        self._managers.close()
+
+
+# id(loop) -> (loop, translator).  번역기의 세마포어와 타이머가 루프를 강하게 잡고 있어
+# 약한 참조 키로는 항목이 사라지지 않으므로, 닫힌 루프의 항목은 직접 정리한다.
+_async_translators = {}
+_async_translators_lock = threading.Lock()
+
+
+def _close_async_translator(translator):
+    try:
+        translator.close()
+    except Exception:
+        logging.exception("비동기 번역기 종료 중 오류 발생")
+
+
+def _async_translator() -> AsyncBatchTranslator:
+    loop = asyncio.get_running_loop()
+    with _async_translators_lock:
+        closed = [key for key, (owner, _) in _async_translators.items() if owner.is_closed()]
+        stale = [_async_translators.pop(key)[1] for key in closed]
+        entry = _async_translators.get(id(loop))
+        if entry is None:
+            entry = _async_translators[id(loop)] = (loop, AsyncBatchTranslator(_create_manager))
+    # 이미 끝난 루프(asyncio.run 종료 등)의 번역기는 여기서 매니저를 닫는다.
+    for translator in stale:
+        _close_async_translator(translator)
+    return entry[1]
+
+
+async def translate_text_async(text, target_lang, source_lang=None):
+    """Translate *text* without blocking the event loop.
+
+    Calls made concurrently on the same event loop share long-lived managers
+    and are coalesced into batched requests, so ``asyncio.gather`` over many
+    texts costs a few round-trips instead of one blocking call per text.
+    """
+    detected_lang = source_lang or detect_text_language(text)
+    return await _async_translator().translate(text, target_lang, detected_lang or None)
+
+
+def close_async_translator() -> None:
+    """Release the managers used by :func:`translate_text_async` on this loop.
+
+    Translators of loops that have since closed are released on the next
+    :func:`translate_text_async` call from any loop.
+    """
+    with _async_translators_lock:
+        entry = _async_translators.pop(id(asyncio.get_running_loop()), None)
+    if entry is not None:
+        _close_async_translator(entry[1])
@@ -0,0 +1,316 @@
+"""Approximate translation memory for OCR-noisy near-duplicate sentences.
+
+OCR output for the same sentence differs by a character or a space between
+pages and scans, so exact-key caches miss.  :class:`FuzzyTranslationMemory`
+indexes cached source sentences by MinHash locality-sensitive hashing over
+character n-grams: each sentence gets ``NUM_PERM`` MinHash values, split into
+``BANDS`` bands, and every band hashes to a bucket stored in an indexed SQLite
+table.  A lookup reads only the entries that share a bucket with the query
+(so it stays sublinear as the memory grows), then verifies the best few with
+a bounded edit distance.  A translation is reused only when the similarity
+``1 - distance / max(len)`` reaches ``threshold`` and both sentences contain
+the same numbers; the numbers are part of the bucket ids, so templated
+sentences that differ only in numbers never even become candidates.
+"""
+
+import argparse
+import logging
+import re
+import sqlite3
+import struct
+import sys
+import threading
+from collections import namedtuple
+from functools import lru_cache
+from hashlib import blake2b, shake_128
+from pathlib import Path
+
+from core.sqlite_store import open_cache_connection
+from core.tm_pack import iter_sqlite_items
+from core.translation_cache_crosslink import normalize_key
+
+# 인덱스 형식이 바뀌면 작업 저널도 새로 시작하도록 엔진 설정값에 포함한다.
+FUZZY_TM_VERSION = "minhash-v1"
+DEFAULT_THRESHOLD = 0.9
+NGRAM = 3
+# 120개 MinHash 를 6개씩 20 밴드로 나눈다 (자카드 유사도 약 0.6 부터 후보가 된다).
+NUM_PERM = 120
+BANDS = 20
+# 이보다 짧은 문장은 글자 하나가 의미를 바꾸기 쉬워 색인하지 않는다.
+MIN_CHARS = 12
+
+
+def _fuzzy_key(text):
+    # 근사 일치는 대소문자 차이도 OCR 잡음으로 보고 무시한다 (정확 일치 캐시와 다름).
+    return normalize_key(text).casefold()
+# 편집 거리로 검증할 후보 수 (버킷 충돌이 많은 순)
+MAX_CANDIDATES = 8
+
+_ROWS = NUM_PERM // BANDS
+# n-gram 하나를 NUM_PERM 개의 32비트 해시로 펼쳐, 순열마다 최솟값을 고른다.
+_HASHES = struct.Struct(f"<{NUM_PERM}I")
+_BAND = struct.Struct(f"<{_ROWS}I")
+_DIGITS = re.compile(r"\d+")
+
+FuzzyMatch = namedtuple("FuzzyMatch", "value similarity")
+
+
+def shingles(norm, n=NGRAM):
+    """Character n-grams of *norm* with whitespace removed."""
+    compact = "".join(norm.split())
+    if len(compact) <= n:
+        return {compact}
+    return {compact[i:i + n] for i in range(len(compact) - n + 1)}
+
+
+@lru_cache(maxsize=1 << 16)
+def _gram_hashes(gram):
+    # 같은 n-gram 은 문장마다 반복되므로 펼친 해시를 캐시한다.
+    return _HASHES.unpack(shake_128(gram.encode("utf-8")).digest(_HASHES.size))
+
+
+def minhash(norm):
+    """``NUM_PERM`` MinHash values of *norm*'s n-grams."""
+    return list(map(min, zip(*map(_gram_hashes, shingles(norm)))))
+
+
+def band_buckets(scope, signature, numbers=()):
+    """One signed 64-bit bucket id per band, namespaced by *scope* and *numbers*."""
+    prefix = "\x1f".join((scope, *numbers)).encode("utf-8") + b"\x1e"
+    buckets = []
+    for band in range(BANDS):
+        rows = _BAND.pack(*signature[band * _ROWS:(band + 1) * _ROWS])
+        digest = blake2b(prefix + bytes((band,)) + rows, digest_size=8).digest()
+        buckets.append(int.from_bytes(digest, "little", signed=True))
+    return buckets
+
+
+def bounded_edit_distance(a, b, limit):
+    """Levenshtein distance of *a* and *b*, or ``limit + 1`` once it exceeds *limit*.
+
+    Only the diagonal band of width ``2 * limit + 1`` is computed.
+    """
+    if len(a) > len(b):
+        a, b = b, a
+    n, m = len(a), len(b)
+    over = limit + 1
+    if m - n > limit:
+        return over
+    previous = [j if j <= limit else over for j in range(m + 1)]
+    for i in range(1, n + 1):
+        low, high = max(1, i - limit), min(m, i + limit)
+        current = [over] * (m + 1)
+        if low == 1 and i <= limit:
+            current[0] = i
+        best = current[0] if low == 1 else over
+        char = a[i - 1]
+        for j in range(low, high + 1):
+            value = previous[j - 1] + (char != b[j - 1])
+            if previous[j] + 1 < value:
+                value = previous[j] + 1
+            if current[j - 1] + 1 < value:
+                value = current[j - 1] + 1
+            if value > over:
+                value = over
+            current[j] = value
+            if value < best:
+                best = value
+        if best > limit:
+            return over
+        previous = current
+    return previous[m]
+
+
+def similarity(a, b, threshold=0.0):
+    """``1 - distance / max(len)``; 0.0 when it falls below *threshold*."""
+    longest = max(len(a), len(b))
+    if not longest:
+        return 1.0
+    limit = int((1.0 - threshold) * longest)
+    distance = bounded_edit_distance(a, b, limit)
+    return 0.0 if distance > limit else 1.0 - distance / longest
+
+
+def _initialize_db(conn):
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS fuzzy_entries ("
+        "id INTEGER PRIMARY KEY, scope TEXT NOT NULL, norm TEXT NOT NULL, value TEXT NOT NULL, "
+        "UNIQUE (scope, norm))"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS fuzzy_bands ("
+        "bucket INTEGER NOT NULL, entry_id INTEGER NOT NULL, PRIMARY KEY (bucket, entry_id)"
+        ") WITHOUT ROWID"
+    )
+    conn.commit()
+
+
+class FuzzyTranslationMemory:
+    """Near-duplicate sentence translations in ``fuzzy_tm.db`` (see the module docstring).
+
+    Entries are grouped by ``scope``; the engine uses ``"<source>><target>"``
+    so only translations into the same language pair are reused.  Sentences
+    shorter than ``min_chars`` are neither indexed nor looked up.  ``stats()``
+    reports fuzzy lookups and hits separately from the exact-key caches.
+    """
+
+    _EXACT_SQL = "SELECT value FROM fuzzy_entries WHERE scope = ? AND norm = ?"
+    _CANDIDATES_SQL = (
+        "SELECT entry_id FROM fuzzy_bands WHERE bucket IN ({}) "
+        "GROUP BY entry_id ORDER BY COUNT(*) DESC LIMIT ?"
+    ).format(", ".join("?" * BANDS))
+    _ENTRIES_SQL = "SELECT norm, value FROM fuzzy_entries WHERE scope = ? AND id IN ({})"
+
+    def __init__(self, db_path="cache/fuzzy_tm.db", threshold=DEFAULT_THRESHOLD,
+                 min_chars=MIN_CHARS, max_candidates=MAX_CANDIDATES):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.threshold = threshold
+        self.min_chars = min_chars
+        self.max_candidates = max_candidates
+        self.conn = open_cache_connection(self.db_path)
+        self._lock = threading.Lock()
+        with self._lock:
+            _initialize_db(self.conn)
+        self.lookups = 0
+        self.hits = 0
+
+    def add_many(self, scope, pairs):
+        """Index ``(source, translation)`` pairs in one transaction; returns how many were new."""
+        rows = {}
+        for source, value in pairs.items() if isinstance(pairs, dict) else pairs:
+            if source and value:
+                norm = _fuzzy_key(source)
+                if len(norm) >= self.min_chars:
+                    rows[norm] = value
+        if not rows:
+            return 0
+        signatures = {
+            norm: band_buckets(scope, minhash(norm), _DIGITS.findall(norm)) for norm in rows
+        }
+        added = 0
+        with self._lock, self.conn:
+            for norm, value in rows.items():
+                try:
+                    entry_id = self.conn.execute(
+                        "INSERT INTO fuzzy_entries (scope, norm, value) VALUES (?, ?, ?)",
+                        (scope, norm, value),
+                    ).lastrowid
+                except sqlite3.IntegrityError:
+                    self.conn.execute(
+                        "UPDATE fuzzy_entries SET value = ? WHERE scope = ? AND norm = ?",
+                        (value, scope, norm),
+                    )
+                    continue
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO fuzzy_bands (bucket, entry_id) VALUES (?, ?)",
+                    [(bucket, entry_id) for bucket in signatures[norm]],
+                )
+                added += 1
+        return added
+
+    def add(self, scope, source, value):
+        return self.add_many(scope, [(source, value)])
+
+    def lookup(self, scope, text):
+        """Best :class:`FuzzyMatch` for *text* at or above the threshold, or ``None``."""
+        norm = _fuzzy_key(text)
+        if len(norm) < self.min_chars:
+            return None
+        numbers = _DIGITS.findall(norm)
+        buckets = band_buckets(scope, minhash(norm), numbers)
+        with self._lock:
+            self.lookups += 1
+            row = self.conn.execute(self._EXACT_SQL, (scope, norm)).fetchone()
+            if row:
+                self.hits += 1
+                return FuzzyMatch(row[0], 1.0)
+            ids = [
+                entry_id for (entry_id,) in self.conn.execute(
+                    self._CANDIDATES_SQL, (*buckets, self.max_candidates)
+                )
+            ]
+            candidates = self.conn.execute(
+                self._ENTRIES_SQL.format(", ".join("?" * len(ids))), (scope, *ids)
+            ).fetchall() if ids else []
+        best = None
+        for candidate, value in candidates:
+            if _DIGITS.findall(candidate) != numbers:
+                continue
+            score = similarity(norm, candidate, self.threshold)
+            if score >= self.threshold and (best is None or score > best.similarity):
+                best = FuzzyMatch(value, score)
+        if best is not None:
+            with self._lock:
+                self.hits += 1
+        return best
+
+    def lookup_many(self, scope, texts):
+        """``{text: FuzzyMatch}`` for the *texts* that have a close enough match."""
+        found = {}
+        for text in dict.fromkeys(texts):
+            match = self.lookup(scope, text)
+            if match is not None:
+                found[text] = match
+        return found
+
+    def stats(self):
+        with self._lock:
+            return {
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "hit_rate": round(self.hits / self.lookups, 4) if self.lookups else 0.0,
+            }
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+def index_translation_cache(memory, db_paths, batch_size=5_000):
+    """Index the ``"<source>><target>\\t<sentence>"`` rows of translation cache shards."""
+    added = 0
+    batch = {}
+    for key, value in iter_sqlite_items(db_paths):
+        languages, _, sentence = key.partition("\t")
+        if ">" in languages and sentence:
+            batch.setdefault(languages, []).append((sentence, value))
+            if len(batch[languages]) >= batch_size:
+                added += memory.add_many(languages, batch.pop(languages))
+    for scope, pairs in batch.items():
+        added += memory.add_many(scope, pairs)
+    return added
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fuzzy translation memory tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="index an existing translation cache directory")
+    build.add_argument("--base-dir", default="cache")
+    build.add_argument("--base-name", default="translation_cache")
+    build.add_argument("--db", default=None, help="fuzzy index path (default <base-dir>/fuzzy_tm.db)")
+    lookup = sub.add_parser("lookup", help="find the closest cached translation")
+    lookup.add_argument("scope", help='language pair, e.g. "en>ko"')
+    lookup.add_argument("text")
+    lookup.add_argument("--db", default="cache/fuzzy_tm.db")
+    lookup.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "build":
+        memory = FuzzyTranslationMemory(args.db or Path(args.base_dir) / "fuzzy_tm.db")
+        try:
+            paths = sorted(Path(args.base_dir).glob(f"{args.base_name}*.db"))
+            added = index_translation_cache(memory, paths)
+            logging.info(f"{memory.db_path}: {added}개 문장 색인")
+        finally:
+            memory.close()
+    else:
+        memory = FuzzyTranslationMemory(args.db, threshold=args.threshold)
+        try:
+            match = memory.lookup(args.scope, args.text)
+        finally:
+            memory.close()
+        if match is None:
+            sys.exit(1)
+        print(f"{match.similarity:.3f}\t{match.value}")
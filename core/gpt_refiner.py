@@ -1,33 +1,292 @@
-import os
-import openai
+"""GPT rewriting of translated text.
+
+:class:`GptRefiner` refines many segments at once: duplicates and cached
+segments are resolved with one bulk :class:`RewriteCacheManager` lookup, the
+misses are packed into numbered multi-segment prompts under a token budget
+and sent with bounded concurrency, and the results are cached in bulk.  A
+reply whose numbering does not match its prompt is retried one segment per
+request.  Requests go through the shared ``"openai"`` backend scheduler
+(:mod:`core.rate_limiter`), which spaces them out and retries 429 / 5xx
+replies.  The chat client is injectable (``complete(prompt, temperature)``
+and optionally ``async acomplete(prompt, temperature)``), so the stage runs
+offline against a fake.
+"""
+
+import asyncio
 import logging
-from cache.rewrite_cache_manager import RewriteCacheManager
-from config import KEYS
+import os
+import re
+
+from core import metrics
+from core.rate_limiter import OPENAI_BACKEND, get_scheduler
+from core.rewrite_cache_manager import RewriteCacheManager
+from core.utils_text import estimate_tokens
 
 REWRITE_ENGINE = os.getenv("GPT_REWRITE_ENGINE", "gpt-4.1-mini")
-OPENAI_API_KEY = KEYS.get("OPENAI")
+DEFAULT_TEMPERATURE = 0.4
+# 요청 하나에 담을 세그먼트 토큰 합 / 세그먼트 수, 동시에 보내는 요청 수
+DEFAULT_MAX_PROMPT_TOKENS = 1500
+DEFAULT_MAX_SEGMENTS = 32
+DEFAULT_CONCURRENCY = 4
+# 세그먼트마다 번호 표식과 줄바꿈에 드는 토큰
+_SEGMENT_OVERHEAD_TOKENS = 4
+
+REFINE_INSTRUCTION = "다음 문장을 더 자연스럽고 부드럽게 다듬어줘. 의미는 유지하고 문장 표현만 개선해줘"
+BATCH_INSTRUCTION = (
+    REFINE_INSTRUCTION
+    + ". 각 항목을 따로 다듬고, 같은 번호 형식([1], [2], ...)으로 항목 수와 순서를 그대로 유지해 "
+    "다듬은 문장만 답해줘"
+)
+_MARKER = re.compile(r"^\[(\d+)\][ \t]*", re.M)
+_LETTER = re.compile(r"[^\W\d_]")
+
+
+def should_refine(text, min_chars=0):
+    """Skip heuristic: empty text, text without letters and text shorter than *min_chars*."""
+    stripped = text.strip() if text else ""
+    if not stripped or not _LETTER.search(stripped):
+        return False
+    return len(stripped) >= min_chars
+
+
+def single_prompt(text):
+    return f"{REFINE_INSTRUCTION}:\n\n{text}"
+
 
-openai.api_key = OPENAI_API_KEY
+def batch_prompt(texts):
+    numbered = "\n".join(f"[{number}] {text}" for number, text in enumerate(texts, 1))
+    return f"{BATCH_INSTRUCTION}:\n\n{numbered}"
 
-cache = RewriteCacheManager()
 
-def rewrite_with_gpt(text, temperature=0.4):
-    cached = cache.get(text)
-    if cached:
-        logging.info("리라이팅 캐시 적중")
-        return cached
+def parse_numbered(reply, count):
+    """Split a ``[1] ... [n]`` reply into *count* segments; ``None`` if it does not line up."""
+    markers = list(_MARKER.finditer(reply or ""))
+    if [int(marker.group(1)) for marker in markers] != list(range(1, count + 1)):
+        return None
+    ends = [marker.start() for marker in markers[1:]] + [len(reply)]
+    segments = [reply[marker.end():end].strip() for marker, end in zip(markers, ends)]
+    return segments if all(segments) else None
 
-    prompt = f"다음 문장을 더 자연스럽고 부드럽게 다듬어줘. 의미는 유지하고 문장 표현만 개선해줘:\n\n{text}"
 
-    try:
-        response = openai.ChatCompletion.create(
-            model=REWRITE_ENGINE,
+def pack_segments(texts, max_tokens=DEFAULT_MAX_PROMPT_TOKENS, max_segments=DEFAULT_MAX_SEGMENTS):
+    """Group *texts* into prompts of at most *max_tokens* / *max_segments*; returns index lists."""
+    batches = []
+    current = []
+    tokens = 0
+    for index, text in enumerate(texts):
+        cost = estimate_tokens(text) + _SEGMENT_OVERHEAD_TOKENS
+        if current and (len(current) >= max_segments or tokens + cost > max_tokens):
+            batches.append(current)
+            current = []
+            tokens = 0
+        current.append(index)
+        tokens += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+class OpenAIChatClient:
+    """Default client on the ``openai.ChatCompletion`` API."""
+
+    def __init__(self, model=REWRITE_ENGINE, api_key=None):
+        import openai
+
+        if api_key is None:
+            try:
+                from config import KEYS
+                api_key = KEYS.get("OPENAI")
+            except ImportError:
+                api_key = os.getenv("OPENAI_API_KEY")
+        openai.api_key = api_key
+        self._openai = openai
+        self.model = model
+
+    def complete(self, prompt, temperature=DEFAULT_TEMPERATURE):
+        response = self._openai.ChatCompletion.create(
+            model=self.model,
             messages=[{"role": "user", "content": prompt}],
             temperature=temperature,
         )
-        rewritten = response.choices[0].message.content.strip()
-        cache.add(text, rewritten)
-        return rewritten
-    except Exception as e:
-        logging.warning(f"GPT 리라이팅 실패: {e}")
-        return text
\ No newline at end of file
+        return response.choices[0].message.content.strip()
+
+
+class GptRefiner:
+    """Batched, cached GPT rewriting (see the module docstring).
+
+    ``min_chars`` turns on the skip heuristic: segments shorter than that,
+    or without letters, are returned unchanged without a lookup or request.
+    Requests that still fail after the scheduler's retries leave their
+    segments unchanged and uncached; they are logged and counted as
+    ``llm_failed_segments``.
+    """
+
+    def __init__(self, client=None, cache=None, model=REWRITE_ENGINE,
+                 temperature=DEFAULT_TEMPERATURE, max_prompt_tokens=DEFAULT_MAX_PROMPT_TOKENS,
+                 max_segments=DEFAULT_MAX_SEGMENTS, concurrency=DEFAULT_CONCURRENCY, min_chars=0,
+                 scheduler=None):
+        self._client = client
+        self.scheduler = scheduler
+        self.cache = cache if cache is not None else RewriteCacheManager()
+        self.model = model
+        self.temperature = temperature
+        self.max_prompt_tokens = max_prompt_tokens
+        self.max_segments = max_segments
+        self.concurrency = concurrency
+        self.min_chars = min_chars
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = OpenAIChatClient(self.model)
+        return self._client
+
+    def refine_many(self, texts, temperature=None):
+        """Blocking :meth:`refine_many_async`.
+
+        Called from a thread whose event loop is running (where
+        ``asyncio.run`` would fail), the requests are sent one at a time with
+        the client's blocking ``complete``.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.refine_many_async(texts, temperature))
+        texts = list(texts)
+        temperature = self.temperature if temperature is None else temperature
+        refined, chunks = self._lookup(texts)
+        replies = [self._refine_chunk_sync(chunk, temperature) for chunk in chunks]
+        return self._merge(texts, refined, chunks, replies)
+
+    async def refine_many_async(self, texts, temperature=None):
+        """Refined version of every text in *texts*, index-aligned."""
+        texts = list(texts)
+        temperature = self.temperature if temperature is None else temperature
+        refined, chunks = self._lookup(texts)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        replies = await asyncio.gather(
+            *(self._refine_chunk(chunk, temperature, semaphore) for chunk in chunks)
+        )
+        return self._merge(texts, refined, chunks, replies)
+
+    def _lookup(self, texts):
+        """Cached refinements of *texts* and the prompt chunks of the misses."""
+        wanted = list(dict.fromkeys(text for text in texts if should_refine(text, self.min_chars)))
+        if not wanted:
+            return {}, []
+        with metrics.span("cache.rewrite_lookup", keys=len(wanted)):
+            refined = self.cache.get_many(wanted)
+        misses = [text for text in wanted if text not in refined]
+        metrics.count("cache_lookups", len(refined), tier="rewrite", result="hit")
+        metrics.count("cache_lookups", len(misses), tier="rewrite", result="miss")
+        chunks = [
+            [misses[i] for i in indices]
+            for indices in pack_segments(misses, self.max_prompt_tokens, self.max_segments)
+        ]
+        return refined, chunks
+
+    def _merge(self, texts, refined, chunks, replies):
+        fresh = {}
+        for chunk, reply in zip(chunks, replies):
+            fresh.update((text, value) for text, value in zip(chunk, reply) if value is not None)
+        if fresh:
+            self.cache.put_many(fresh)
+        refined.update(fresh)
+        return [refined.get(text, text) for text in texts]
+
+    async def _refine_chunk(self, chunk, temperature, semaphore):
+        """Refined values for *chunk* (``None`` where the request failed)."""
+        if len(chunk) == 1:
+            return [await self._refine_single(chunk[0], temperature, semaphore)]
+        try:
+            async with semaphore:
+                reply = await self._complete(batch_prompt(chunk), temperature, len(chunk))
+        except Exception as e:
+            logging.warning(f"GPT 리라이팅 실패 ({len(chunk)}개 항목, 원문 유지): {e}")
+            metrics.count("llm_failed_segments", len(chunk), model=self.model)
+            return [None] * len(chunk)
+        segments = parse_numbered(reply, len(chunk))
+        if segments is not None:
+            return segments
+        logging.warning(f"리라이팅 응답 항목 수 불일치 ({len(chunk)}개 요청), 항목별 요청으로 대체")
+        metrics.count("llm_batch_fallbacks", model=self.model)
+        return await asyncio.gather(
+            *(self._refine_single(text, temperature, semaphore) for text in chunk)
+        )
+
+    def _refine_chunk_sync(self, chunk, temperature):
+        """Blocking :meth:`_refine_chunk`."""
+        if len(chunk) > 1:
+            try:
+                reply = self._complete_sync(batch_prompt(chunk), temperature, len(chunk))
+            except Exception as e:
+                logging.warning(f"GPT 리라이팅 실패 ({len(chunk)}개 항목, 원문 유지): {e}")
+                metrics.count("llm_failed_segments", len(chunk), model=self.model)
+                return [None] * len(chunk)
+            segments = parse_numbered(reply, len(chunk))
+            if segments is not None:
+                return segments
+            logging.warning(f"리라이팅 응답 항목 수 불일치 ({len(chunk)}개 요청), 항목별 요청으로 대체")
+            metrics.count("llm_batch_fallbacks", model=self.model)
+        results = []
+        for text in chunk:
+            try:
+                reply = self._complete_sync(single_prompt(text), temperature, 1)
+            except Exception as e:
+                logging.warning(f"GPT 리라이팅 실패 (원문 유지): {e}")
+                metrics.count("llm_failed_segments", model=self.model)
+                reply = ""
+            results.append(reply.strip() or None)
+        return results
+
+    async def _refine_single(self, text, temperature, semaphore):
+        try:
+            async with semaphore:
+                reply = await self._complete(single_prompt(text), temperature, 1)
+        except Exception as e:
+            logging.warning(f"GPT 리라이팅 실패 (원문 유지): {e}")
+            metrics.count("llm_failed_segments", model=self.model)
+            return None
+        return reply.strip() or None
+
+    def _count_request(self, prompt):
+        if metrics.enabled():
+            metrics.count("llm_requests", model=self.model)
+            metrics.count("llm_bytes_sent", len(prompt.encode("utf-8")), model=self.model)
+
+    def _complete_sync(self, prompt, temperature, segments):
+        self._count_request(prompt)
+        scheduler = self.scheduler or get_scheduler(OPENAI_BACKEND)
+        with metrics.span("rewrite_with_gpt", segments=segments, chars=len(prompt)):
+            return scheduler.call(self.client.complete, prompt, temperature, chars=len(prompt))
+
+    async def _complete(self, prompt, temperature, segments):
+        self._count_request(prompt)
+        client = self.client
+        scheduler = self.scheduler or get_scheduler(OPENAI_BACKEND)
+        with metrics.span("rewrite_with_gpt", segments=segments, chars=len(prompt)):
+            acomplete = getattr(client, "acomplete", None)
+            if acomplete is not None:
+                return await scheduler.acall(acomplete, prompt, temperature, chars=len(prompt))
+            return await asyncio.to_thread(
+                scheduler.call, client.complete, prompt, temperature, chars=len(prompt)
+            )
+
+
+_default_refiner = None
+
+
+def get_refiner():
+    """Process-wide :class:`GptRefiner` on the default cache and OpenAI client."""
+    global _default_refiner
+    if _default_refiner is None:
+        _default_refiner = GptRefiner()
+    return _default_refiner
+
+
+def rewrite_with_gpt(text, temperature=DEFAULT_TEMPERATURE):
+    return get_refiner().refine_many([text], temperature)[0]
+
+
+def rewrite_many_with_gpt(texts, temperature=DEFAULT_TEMPERATURE):
+    return get_refiner().refine_many(texts, temperature)
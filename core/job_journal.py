@@ -0,0 +1,128 @@
+import hashlib
+import json
+import threading
+from pathlib import Path
+
+from core.sqlite_store import open_cache_connection
+
+DEFAULT_JOURNAL_DIR = "cache/jobs"
+
+
+def file_digest(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def job_key(file_hash, target_lang, settings=None, page_range=None):
+    """Identify a job by document content, target language, engine settings and range."""
+    payload = json.dumps(
+        {
+            "file": file_hash,
+            "target": target_lang,
+            "settings": settings or {},
+            "range": list(page_range) if page_range else None,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+class JobJournal:
+    """Durable record of the pages a document job has already finished.
+
+    One SQLite file per job under ``journal_dir``.  Each finished page is
+    committed as soon as it is recorded, so a crash or a killed app loses at
+    most the pages that were in flight.  A rerun with the same document,
+    target language, engine settings and page range reopens the same journal.
+    Pages translated in layout mode also keep their ``(rect, translation)``
+    blocks, so replayed pages can still be placed on the PDF.
+    """
+
+    def __init__(self, file_path, target_lang, settings=None, page_range=None,
+                 journal_dir=DEFAULT_JOURNAL_DIR):
+        self.file_path = Path(file_path)
+        self.page_range = tuple(page_range) if page_range else None
+        self.key = job_key(file_digest(self.file_path), target_lang, settings, self.page_range)
+        journal_dir = Path(journal_dir)
+        journal_dir.mkdir(parents=True, exist_ok=True)
+        self.path = journal_dir / f"{self.key}.db"
+        self.conn = open_cache_connection(self.path)
+        self._lock = threading.Lock()
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                "page_index INTEGER PRIMARY KEY, result TEXT, layout TEXT)"
+            )
+            # 배치 정보 열이 생기기 전에 만든 저널
+            columns = {row[1] for row in self.conn.execute("PRAGMA table_info(pages)")}
+            if "layout" not in columns:
+                self.conn.execute("ALTER TABLE pages ADD COLUMN layout TEXT")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS job_meta (name TEXT PRIMARY KEY, value TEXT)"
+            )
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO job_meta (name, value) VALUES (?, ?)",
+                [
+                    ("file", str(self.file_path)),
+                    ("target_lang", target_lang),
+                    ("settings", json.dumps(settings or {}, sort_keys=True)),
+                    ("page_range", json.dumps(self.page_range)),
+                ],
+            )
+
+    def completed(self):
+        """Return ``{page_index: result}`` for every recorded page."""
+        with self._lock:
+            return dict(self.conn.execute("SELECT page_index, result FROM pages"))
+
+    def layouts(self):
+        """Return ``{page_index: [(rect, text), ...]}`` for pages recorded with a layout."""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT page_index, layout FROM pages WHERE layout IS NOT NULL"
+            ).fetchall()
+        return {
+            index: [(tuple(rect), text) for rect, text in json.loads(layout)]
+            for index, layout in rows
+        }
+
+    def record(self, page_index, result, layout=None):
+        layout = (
+            json.dumps([[list(rect), text] for rect, text in layout], ensure_ascii=False)
+            if layout else None
+        )
+        with self._lock:
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO pages (page_index, result, layout) VALUES (?, ?, ?)",
+                    (page_index, result, layout),
+                )
+
+    def first_incomplete(self, page_order):
+        done = self.completed()
+        for index in page_order:
+            if index not in done:
+                return index
+        return None
+
+    def mark_finished(self):
+        with self._lock:
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO job_meta (name, value) VALUES ('finished', '1')"
+                )
+
+    def is_finished(self):
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT value FROM job_meta WHERE name = 'finished'"
+            ).fetchone()
+        return bool(row and row[0] == "1")
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
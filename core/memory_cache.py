@@ -0,0 +1,138 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+# 프로세스 단위 공유 캐시 기본 한도
+DEFAULT_MAX_ENTRIES = 200_000
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# get() 기본값으로 넘겨 "값이 None 인 항목"과 "항목 없음"을 구분할 때 사용
+MISSING = object()
+
+
+def _estimate_size(obj):
+    if isinstance(obj, tuple):
+        return sys.getsizeof(obj) + sum(_estimate_size(item) for item in obj)
+    return sys.getsizeof(obj)
+
+
+class MemoryLRUCache:
+    """Thread-safe LRU cache bounded by entry count and approximate bytes.
+
+    Entries optionally expire ``ttl`` seconds after they were written.  Sizes
+    are estimated with ``sys.getsizeof`` on the key and value, which is close
+    enough for the short strings stored here to keep memory flat.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES, ttl=None,
+                 name="cache"):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (value, size, expires_at)
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, size, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.current_bytes -= size
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def get_many(self, keys):
+        """Return ``{key: value}`` for the *keys* that are cached."""
+        found = {}
+        for key in keys:
+            value = self.get(key, MISSING)
+            if value is not MISSING:
+                found[key] = value
+        return found
+
+    def set(self, key, value):
+        size = _estimate_size(key) + _estimate_size(value)
+        if size > self.max_bytes:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old[1]
+            self._data[key] = (value, size, expires_at)
+            self.current_bytes += size
+            while len(self._data) > self.max_entries or self.current_bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self._data.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+
+    def set_many(self, items):
+        items = items.items() if isinstance(items, dict) else items
+        for key, value in items:
+            self.set(key, value)
+
+    def __contains__(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            return entry is not None and (entry[2] is None or entry[2] > time.monotonic())
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.current_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "entries": len(self._data),
+                "bytes": self.current_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+_shared_caches = {}
+_shared_lock = threading.Lock()
+
+
+def get_shared_cache(name, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES, ttl=None):
+    """Return the process-wide cache called *name*, creating it on first use.
+
+    Limits only apply when the cache is created; later callers share it as is.
+    """
+    with _shared_lock:
+        cache = _shared_caches.get(name)
+        if cache is None:
+            cache = MemoryLRUCache(max_entries, max_bytes, ttl, name=name)
+            _shared_caches[name] = cache
+        return cache
+
+
+def shared_cache_stats():
+    with _shared_lock:
+        caches = list(_shared_caches.values())
+    return {cache.name: cache.stats() for cache in caches}
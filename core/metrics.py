@@ -0,0 +1,301 @@
+"""Lightweight spans, counters and histograms for the translation pipeline.
+
+Instrumentation is off by default and then costs one global lookup per call:
+:func:`span` returns a shared no-op context manager and :func:`count` /
+:func:`observe` return immediately.  Call :func:`enable` (or set
+``OCR_TRANSLATE_METRICS=1``) to start recording into a process-wide
+:class:`MetricsRecorder`, which exports a Chrome trace (``chrome://tracing``,
+Perfetto) and Prometheus text.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+DEFAULT_MAX_SPANS = 100_000
+# 단계별 소요 시간 히스토그램 경계 (초)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+METRIC_PREFIX = "ocr_translate_"
+# 설정하면 TranslateWorker 가 작업마다 trace/Prometheus 파일을 이 디렉터리에 남긴다.
+TRACE_DIR_ENV = "OCR_TRANSLATE_TRACE_DIR"
+
+_recorder = None
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("recorder", "name", "attrs", "started")
+
+    def __init__(self, recorder, name, attrs):
+        self.recorder = recorder
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def set(self, **attrs):
+        """Attach attributes known only inside the span (result sizes, hit/miss)."""
+        self.attrs.update(attrs)
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.recorder.add_span(
+            self.name, self.started, time.perf_counter() - self.started, self.attrs
+        )
+        return False
+
+
+def _label_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(label_key, extra=()):
+    pairs = list(label_key) + list(extra)
+    if not pairs:
+        return ""
+    body = ",".join(
+        '{}="{}"'.format(key, value.replace("\\", "\\\\").replace('"', '\\"')) for key, value in pairs
+    )
+    return "{" + body + "}"
+
+
+def _percentile(ordered, pct):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class MetricsRecorder:
+    """Thread-safe store of spans, counters and histograms.
+
+    Spans live in a ring of ``max_spans`` entries; every span duration is also
+    observed into the ``stage_seconds{stage=...}`` histogram, which is never
+    truncated.  :meth:`mark` / :meth:`summary` report what happened between
+    two points in time, e.g. one document run.
+    """
+
+    def __init__(self, max_spans=DEFAULT_MAX_SPANS, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.origin = time.perf_counter()
+        self.spans = deque(maxlen=max_spans)
+        self.counters = {}
+        self.histograms = {}
+        self._seq = 0
+        self._thread_names = {}
+        self._lock = threading.Lock()
+
+    def add_span(self, name, started, duration, attrs=None):
+        """Record a finished span; ``started`` is a ``time.perf_counter()`` value."""
+        thread = threading.current_thread()
+        with self._lock:
+            self._seq += 1
+            self._thread_names.setdefault(thread.ident, thread.name)
+            self.spans.append((self._seq, name, started, duration, thread.ident, attrs or {}))
+            self._observe("stage_seconds", duration, (("stage", name),))
+
+    def count(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        with self._lock:
+            self._observe(name, value, _label_key(labels))
+
+    def _observe(self, name, value, label_key):
+        entry = self.histograms.get((name, label_key))
+        if entry is None:
+            entry = self.histograms[(name, label_key)] = [[0] * len(self.buckets), 0.0, 0]
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                entry[0][index] += 1
+        entry[1] += value
+        entry[2] += 1
+
+    # --- 구간 요약 ---
+    def mark(self):
+        with self._lock:
+            return self._seq, dict(self.counters)
+
+    def summary(self, since=None):
+        """Per-stage latency and counter deltas since *since* (a :meth:`mark`)."""
+        seq, counters_before = since or (0, {})
+        with self._lock:
+            spans = [span for span in self.spans if span[0] > seq]
+            counters = dict(self.counters)
+        durations = {}
+        for _, name, _, duration, _, _ in spans:
+            durations.setdefault(name, []).append(duration)
+        stages = {}
+        for name, values in sorted(durations.items()):
+            values.sort()
+            stages[name] = {
+                "count": len(values),
+                "total_seconds": round(sum(values), 4),
+                "p50_ms": round(_percentile(values, 50) * 1e3, 3),
+                "p99_ms": round(_percentile(values, 99) * 1e3, 3),
+                "max_ms": round(values[-1] * 1e3, 3),
+            }
+        deltas = {}
+        for (name, label_key), value in sorted(counters.items()):
+            delta = value - counters_before.get((name, label_key), 0)
+            if delta:
+                deltas[name + _format_labels(label_key)] = delta
+        return {"stages": stages, "counters": deltas}
+
+    # --- 내보내기 ---
+    def chrome_trace(self):
+        """Trace Event Format dict (complete events, microseconds)."""
+        pid = os.getpid()
+        with self._lock:
+            spans = list(self.spans)
+            thread_names = dict(self._thread_names)
+        events = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+            for tid, name in thread_names.items()
+        ]
+        for _, name, started, duration, tid, attrs in spans:
+            events.append(
+                {
+                    "name": name,
+                    "cat": name.split(".", 1)[0],
+                    "ph": "X",
+                    "ts": round((started - self.origin) * 1e6, 1),
+                    "dur": round(duration * 1e6, 1),
+                    "pid": pid,
+                    "tid": tid,
+                    "args": attrs,
+                }
+            )
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def prometheus_text(self, prefix=METRIC_PREFIX):
+        """Prometheus text exposition format (counters and histograms)."""
+        with self._lock:
+            counters = dict(self.counters)
+            histograms = {key: (list(b), s, c) for key, (b, s, c) in self.histograms.items()}
+        lines = []
+        for name in sorted({name for name, _ in counters}):
+            metric = f"{prefix}{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for (counter_name, label_key), value in sorted(counters.items()):
+                if counter_name == name:
+                    lines.append(f"{metric}{_format_labels(label_key)} {value}")
+        for name in sorted({name for name, _ in histograms}):
+            metric = f"{prefix}{name}"
+            lines.append(f"# TYPE {metric} histogram")
+            for (hist_name, label_key), (buckets, total, count) in sorted(histograms.items()):
+                if hist_name != name:
+                    continue
+                for bound, bucket_count in zip(self.buckets, buckets):
+                    labels = _format_labels(label_key, (("le", repr(float(bound))),))
+                    lines.append(f"{metric}_bucket{labels} {bucket_count}")
+                lines.append(f"{metric}_bucket{_format_labels(label_key, (('le', '+Inf'),))} {count}")
+                lines.append(f"{metric}_sum{_format_labels(label_key)} {total}")
+                lines.append(f"{metric}_count{_format_labels(label_key)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def write_chrome_trace(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.chrome_trace(), ensure_ascii=False), encoding="utf-8")
+        return path
+
+    def write_prometheus(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(self.prometheus_text(), encoding="utf-8")
+        return path
+
+
+def enable(recorder=None):
+    """Start recording into *recorder* (a new one by default) and return it."""
+    global _recorder
+    _recorder = recorder or MetricsRecorder()
+    return _recorder
+
+
+def disable():
+    global _recorder
+    _recorder = None
+
+
+def get_recorder():
+    return _recorder
+
+
+def enabled():
+    return _recorder is not None
+
+
+def span(name, **attrs):
+    recorder = _recorder
+    if recorder is None:
+        return _NULL_SPAN
+    return _Span(recorder, name, attrs)
+
+
+def add_span(name, duration, **attrs):
+    """Record a span measured elsewhere (e.g. in a pool worker) as ending now."""
+    recorder = _recorder
+    if recorder is not None:
+        recorder.add_span(name, time.perf_counter() - duration, duration, attrs)
+
+
+def count(name, value=1, **labels):
+    recorder = _recorder
+    if recorder is not None:
+        recorder.count(name, value, **labels)
+
+
+def observe(name, value, **labels):
+    recorder = _recorder
+    if recorder is not None:
+        recorder.observe(name, value, **labels)
+
+
+def mark():
+    recorder = _recorder
+    return recorder.mark() if recorder is not None else None
+
+
+def summary(since=None):
+    recorder = _recorder
+    return recorder.summary(since) if recorder is not None else None
+
+
+def export_run(directory, name):
+    """Write ``<name>.trace.json`` and ``<name>.prom`` under *directory*; no-op when disabled."""
+    recorder = _recorder
+    if recorder is None or not directory:
+        return None
+    directory = Path(directory)
+    return (
+        recorder.write_chrome_trace(directory / f"{name}.trace.json"),
+        recorder.write_prometheus(directory / f"{name}.prom"),
+    )
+
+
+if os.getenv("OCR_TRANSLATE_METRICS", "").lower() in ("1", "true", "yes") or os.getenv(TRACE_DIR_ENV):
+    enable()
@@ -0,0 +1,168 @@
+import hashlib
+import threading
+from collections import namedtuple
+from pathlib import Path
+
+from core.sqlite_store import open_cache_connection
+
+# 정확 일치 키의 형식 표식: 예전 썸네일 양자화 지문으로 저장된 행과 섞이지 않게 한다.
+DIGEST_PREFIX = "px1:"
+# 지각 해시(dHash) 64비트를 16비트 밴드 4개로 나눠 근사 검색 후보를 찾는다.
+_BANDS = 4
+_BAND_BITS = 16
+
+PageFingerprint = namedtuple("PageFingerprint", "digest phash")
+
+
+def _grid_means(samples, width, height, stride, cols, rows):
+    """Area-average a grayscale buffer down to ``rows x cols`` cell means."""
+    x_edges = [width * c // cols for c in range(cols + 1)]
+    y_edges = [height * r // rows for r in range(rows + 1)]
+    means = []
+    for r in range(rows):
+        sums = [0] * cols
+        y0, y1 = y_edges[r], max(y_edges[r + 1], y_edges[r] + 1)
+        for y in range(y0, min(y1, height)):
+            row = samples[y * stride: y * stride + width]
+            for c in range(cols):
+                sums[c] += sum(row[x_edges[c]:max(x_edges[c + 1], x_edges[c] + 1)])
+        for c in range(cols):
+            area = (y1 - y0) * max(x_edges[c + 1] - x_edges[c], 1)
+            means.append(sums[c] / area)
+    return means
+
+
+def pixel_digest(samples, width, height, stride=None):
+    """Lossless digest of a grayscale raster: its size and every pixel, without row padding."""
+    stride = stride or width
+    samples = memoryview(samples)
+    digest = hashlib.blake2b(f"{width}x{height}|".encode(), digest_size=16)
+    if stride == width:
+        digest.update(samples[:width * height])
+    else:
+        for y in range(height):
+            digest.update(samples[y * stride: y * stride + width])
+    return DIGEST_PREFIX + digest.hexdigest()
+
+
+def difference_hash(samples, width, height, stride=None):
+    """64-bit difference hash (9x8 cell means) for near-duplicate matching."""
+    small = _grid_means(samples, width, height, stride or width, 9, 8)
+    phash = 0
+    for r in range(8):
+        for c in range(8):
+            phash = (phash << 1) | (small[r * 9 + c] > small[r * 9 + c + 1])
+    return phash
+
+
+def fingerprint_pixels(samples, width, height, stride=None, near=False):
+    """Fingerprint a grayscale page raster.
+
+    ``digest`` is :func:`pixel_digest`, so only pixel-identical renderings
+    share it.  ``phash`` (:func:`difference_hash`) is computed only with
+    *near*, for an index that also matches near duplicates; otherwise ``None``.
+    """
+    digest = pixel_digest(samples, width, height, stride)
+    phash = difference_hash(samples, width, height, stride) if near else None
+    return PageFingerprint(digest, phash)
+
+
+def fingerprint_pixmap(pix, near=False):
+    """:func:`fingerprint_pixels` of a grayscale fitz pixmap (the one rasterized for OCR)."""
+    samples = pix.samples_mv if hasattr(pix, "samples_mv") else pix.samples
+    return fingerprint_pixels(samples, pix.width, pix.height, pix.stride, near)
+
+
+def _signed64(value):
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+class PageDedupIndex:
+    """Content-addressed store of OCR results keyed by page fingerprint.
+
+    Exact matches use the lossless pixel digest of the page as rasterized
+    for OCR, so a page is reused only when it renders identically.  Near
+    duplicates are opt-in: with ``max_distance`` > 0 a page whose difference
+    hash is within that Hamming distance of a known page also counts (pass
+    fingerprints made with ``near=True``); keep it small, since slides that
+    share a template but differ in text can sit only a few bits apart.
+    Counters report how many pages were served from the index and the OCR
+    time that saved.
+    """
+
+    def __init__(self, db_path="cache/page_ocr.db", max_distance=0):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_distance = max_distance
+        self.conn = open_cache_connection(self.db_path)
+        self._lock = threading.Lock()
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            "digest TEXT PRIMARY KEY, phash INTEGER, text TEXT, ocr_seconds REAL)"
+        )
+        self.conn.commit()
+        self.deduped_pages = 0
+        self.ocr_seconds_saved = 0.0
+        self._bands = [{} for _ in range(_BANDS)]
+        if max_distance > 0:
+            for digest, phash in self.conn.execute(
+                "SELECT digest, phash FROM pages WHERE phash IS NOT NULL AND digest LIKE ?",
+                (DIGEST_PREFIX + "%",),
+            ):
+                self._index_phash(digest, phash & ((1 << 64) - 1))
+
+    def _index_phash(self, digest, phash):
+        for band in range(_BANDS):
+            key = (phash >> (band * _BAND_BITS)) & ((1 << _BAND_BITS) - 1)
+            self._bands[band].setdefault(key, []).append((phash, digest))
+
+    def _near_digest(self, phash):
+        best = None
+        for band in range(_BANDS):
+            key = (phash >> (band * _BAND_BITS)) & ((1 << _BAND_BITS) - 1)
+            for candidate, digest in self._bands[band].get(key, ()):
+                distance = bin(candidate ^ phash).count("1")
+                if distance <= self.max_distance and (best is None or distance < best[0]):
+                    best = (distance, digest)
+        return best[1] if best else None
+
+    def lookup(self, fingerprint):
+        """Return the cached OCR text for *fingerprint*, or ``None``."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT text, ocr_seconds FROM pages WHERE digest = ?", (fingerprint.digest,)
+            ).fetchone()
+            if row is None and self.max_distance > 0 and fingerprint.phash is not None:
+                near = self._near_digest(fingerprint.phash)
+                if near is not None:
+                    row = self.conn.execute(
+                        "SELECT text, ocr_seconds FROM pages WHERE digest = ?", (near,)
+                    ).fetchone()
+            if row is None:
+                return None
+            self.deduped_pages += 1
+            self.ocr_seconds_saved += row[1] or 0.0
+            return row[0]
+
+    def record(self, fingerprint, text, ocr_seconds):
+        phash = _signed64(fingerprint.phash) if fingerprint.phash is not None else None
+        with self._lock:
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO pages (digest, phash, text, ocr_seconds) "
+                    "VALUES (?, ?, ?, ?)",
+                    (fingerprint.digest, phash, text, ocr_seconds),
+                )
+            if self.max_distance > 0 and fingerprint.phash is not None:
+                self._index_phash(fingerprint.digest, fingerprint.phash)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "deduped_pages": self.deduped_pages,
+                "ocr_seconds_saved": round(self.ocr_seconds_saved, 3),
+            }
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,85 @@
+import sys
+import threading
+import unicodedata
+from collections import namedtuple
+from multiprocessing import resource_tracker, shared_memory
+
+# 텍스트 레이어를 신뢰하기 위한 최소 글자 수 / 정상 문자 비율 / 깨진 문자 비율
+MIN_TEXT_LAYER_CHARS = 20
+MIN_TEXT_LAYER_GOOD_RATIO = 0.8
+MAX_TEXT_LAYER_BAD_RATIO = 0.02
+
+# 워커에 넘기는 그레이스케일 픽스맵 위치 정보 (픽셀 자체는 공유 메모리에 있다)
+SharedPixmap = namedtuple("SharedPixmap", "shm_name width height stride")
+
+_attach_lock = threading.Lock()
+
+
+def text_layer_is_usable(text, min_chars=MIN_TEXT_LAYER_CHARS):
+    """Decide whether a page's embedded text can replace OCR.
+
+    Scanned PDFs often carry an empty layer or a garbage one (replacement
+    characters, private-use glyphs from unmapped fonts); those fall back to
+    OCR.
+    """
+    chars = "".join(text.split())
+    if len(chars) < min_chars:
+        return False
+    good = 0
+    bad = 0
+    for ch in chars:
+        category = unicodedata.category(ch)
+        if ch == "�" or category in ("Co", "Cc", "Cn", "Cs"):
+            bad += 1
+        elif category[0] in ("L", "N", "P"):
+            good += 1
+    return (
+        bad / len(chars) <= MAX_TEXT_LAYER_BAD_RATIO
+        and good / len(chars) >= MIN_TEXT_LAYER_GOOD_RATIO
+    )
+
+
+def publish_pixmap(pix):
+    """Copy a grayscale pixmap into shared memory for an OCR worker.
+
+    Returns ``(shm, descriptor)``; the caller owns ``shm`` and must
+    ``close()`` and ``unlink()`` it once the worker has answered.
+    """
+    size = pix.stride * pix.height
+    shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    shm.buf[:size] = pix.samples_mv if hasattr(pix, "samples_mv") else pix.samples
+    return shm, SharedPixmap(shm.name, pix.width, pix.height, pix.stride)
+
+
+def _skip_register(name, rtype):
+    pass
+
+
+def attach_shared(name):
+    """Open the segment *name* in a worker without tracking it there.
+
+    The publisher owns the segment and unlinks it.  Before Python 3.13 merely
+    attaching registers it with the worker's resource tracker, which then
+    reports it as leaked (and tries to unlink it again) when the worker exits.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    # 붙은 뒤 unregister 하면 부모와 같은 추적기를 쓰는 워커(spawn 등)에서 부모의 등록까지
+    # 지워지므로, 아예 등록하지 않는다.
+    with _attach_lock:
+        register = resource_tracker.register
+        resource_tracker.register = _skip_register
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+def release_shared(shm):
+    try:
+        shm.close()
+    finally:
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            pass
@@ -1,18 +1,310 @@
-import fitz  # PyMuPDF
+"""Write translations back onto a copy of the source PDF.
+
+:class:`PdfOverlayWriter` places each translated block at the position of
+its source block (text-layer blocks or OCR paragraphs, see
+:func:`text_layer_blocks` / :func:`ocr_blocks`), with the largest font size
+that fits the box.  Pages can be written in any order as results arrive; the
+output is a copy of the input that is saved incrementally every
+``flush_every`` pages, so finished pages reach the disk while the job runs.
+All text goes through one ``fitz.Font`` and the document stays open between
+saves: MuPDF keeps its embedded font per open document, so the font file is
+stored once, not once per page or per save.
+"""
+
+import logging
+import re
+import shutil
 from pathlib import Path
 
-def write_text_on_pdf(input_pdf, texts_by_page, output_pdf):
-    doc = fitz.open(input_pdf)
-    for i, page in enumerate(doc):
-        if i in texts_by_page:
-            text = texts_by_page[i]
-            rect = fitz.Rect(50, 50, 550, 750)  # 여백 포함 전체
-            page.insert_textbox(rect, text, fontsize=9, color=(0, 0, 0), overlay=True)
-    doc.save(output_pdf)
+# 블록 글꼴 크기 범위와 줄 간격 (글꼴 크기 배수)
+MAX_FONTSIZE = 14.0
+MIN_FONTSIZE = 4.0
+FONTSIZE_STEP = 0.5
+LINE_HEIGHT = 1.2
+# 몇 페이지마다 증분 저장할지 (문서는 다시 열지 않는다. 다시 열면 글꼴이 또 포함된다.)
+DEFAULT_FLUSH_EVERY = 50
+# 위치 정보가 없는 페이지의 본문 여백 (pt)
+PAGE_MARGIN = 36
+COVER_COLOR = (1, 1, 1)
+TEXT_COLOR = (0, 0, 0)
+
+# 띄어쓰기 없이 글자 단위로 줄을 바꿀 수 있는 한중일 문자
+_CJK_CLASS = (
+    "\u2e80-\u2fff\u3001-\u303f\u3040-\u30ff\u3100-\u312f\u31a0-\u31ff"
+    "\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uff01-\uff9f"
+)
+# 줄바꿈 단위: 한중일 글자 하나, 공백 없는 단어, 공백
+_UNITS = re.compile(f"[{_CJK_CLASS}]|[^\\s{_CJK_CLASS}]+|\\s+")
+# 글자 폭 캐시가 이보다 커지면 비운다.
+MAX_MEASURE_CACHE = 100_000
+_PAGE_HEADER = re.compile(r"\A\[Page \d+\]\n")
+
+
+def text_layer_blocks(page):
+    """``[((x0, y0, x1, y1), text), ...]`` for the text blocks of a page's text layer."""
+    return [
+        (tuple(block[:4]), block[4].strip())
+        for block in page.get_text("blocks", sort=True)
+        if block[6] == 0 and block[4].strip()
+    ]
+
+
+def ocr_blocks(data, scale=1.0):
+    """Group ``pytesseract.image_to_data(..., output_type=DICT)`` words into paragraphs.
+
+    Boxes are multiplied by *scale* (``72 / dpi`` gives PDF points).  Lines of
+    a paragraph are joined with ``\\n`` so the text segments like
+    ``image_to_string`` output.
+    """
+    paragraphs = {}
+    for index, word in enumerate(data["text"]):
+        if not word.strip() or float(data["conf"][index]) < 0:
+            continue
+        key = (data["block_num"][index], data["par_num"][index])
+        left, top = data["left"][index], data["top"][index]
+        right, bottom = left + data["width"][index], top + data["height"][index]
+        entry = paragraphs.get(key)
+        if entry is None:
+            entry = paragraphs[key] = [left, top, right, bottom, {}]
+        else:
+            entry[0], entry[1] = min(entry[0], left), min(entry[1], top)
+            entry[2], entry[3] = max(entry[2], right), max(entry[3], bottom)
+        entry[4].setdefault(data["line_num"][index], []).append(word.strip())
+    blocks = []
+    for left, top, right, bottom, lines in paragraphs.values():
+        text = "\n".join(" ".join(words) for _, words in sorted(lines.items()))
+        blocks.append(((left * scale, top * scale, right * scale, bottom * scale), text))
+    return blocks
+
+
+def strip_page_header(result):
+    """Drop the ``[Page N]`` line that page results start with."""
+    return _PAGE_HEADER.sub("", result, count=1)
+
+
+def _wrap(units, widths, space_width, limit):
+    """Greedy line breaking of *units* (words, CJK characters, spaces) at width *limit*."""
+    lines = []
+    line = []
+    line_width = 0.0
+    for unit, width in zip(units, widths):
+        if unit.isspace():
+            if line:
+                line.append(" ")
+                line_width += space_width
+            continue
+        if line and line_width + width > limit:
+            while line and line[-1] == " ":
+                line.pop()
+            lines.append("".join(line))
+            line = []
+            line_width = 0.0
+        line.append(unit)
+        line_width += width
+    while line and line[-1] == " ":
+        line.pop()
+    if line:
+        lines.append("".join(line))
+    return lines
+
+
+def layout_text(text, width, height, measure, max_size=MAX_FONTSIZE, min_size=MIN_FONTSIZE,
+                line_height=LINE_HEIGHT):
+    """Largest font size at which *text* wraps into a ``width`` x ``height`` box.
+
+    ``measure(s)`` is the width of ``s`` at font size 1.  Returns
+    ``(size, lines)``; when even ``min_size`` overflows the lines are returned
+    at ``min_size`` and run past the box rather than being dropped.
+    """
+    units = []
+    for paragraph in text.split("\n"):
+        parts = _UNITS.findall(paragraph)
+        # 한 줄보다 긴 단어(긴 한글 어절, URL 등)는 글자 단위로 나눌 수 있게 쪼갠다.
+        for part in parts:
+            if not part.isspace() and measure(part) * min_size > width:
+                units.extend(part)
+            else:
+                units.append(part)
+        units.append("\n")
+    units.pop()
+    widths = [0.0 if unit == "\n" else measure(unit) for unit in units]
+    space_width = measure(" ")
+
+    def _lines(size):
+        lines = []
+        start = 0
+        for end in [i for i, unit in enumerate(units) if unit == "\n"] + [len(units)]:
+            lines.extend(_wrap(units[start:end], widths[start:end], space_width, width / size) or [""])
+            start = end + 1
+        return lines
+
+    size = max_size
+    while size > min_size:
+        lines = _lines(size)
+        if len(lines) * size * line_height <= height:
+            return size, lines
+        size -= FONTSIZE_STEP
+    return min_size, _lines(min_size)
+
+
+class PdfOverlayWriter:
+    """Stream translated pages onto a copy of *input_pdf* saved as *output_pdf*.
+
+    Use as a context manager.  :meth:`write_blocks` takes
+    ``[((x0, y0, x1, y1), text), ...]`` in PDF points; :meth:`write_text`
+    flows plain page text into the page margins; :meth:`add_result` accepts
+    the ``(index, result[, blocks])`` page results of ``DocumentTranslator``
+    / ``TranslateWorker`` as they arrive.  ``cover`` paints each source block
+    white before writing; text without source blocks is never covered, so the
+    original page stays visible under it.  ``fontfile`` defaults to MuPDF's built-in CJK
+    fallback font, which also covers Hangul and Latin.
+    """
+
+    def __init__(self, input_pdf, output_pdf, fontfile=None, flush_every=DEFAULT_FLUSH_EVERY,
+                 cover=True, max_fontsize=MAX_FONTSIZE, min_fontsize=MIN_FONTSIZE):
+        self.output_pdf = str(output_pdf)
+        self.flush_every = flush_every
+        self.cover = cover
+        self.max_fontsize = max_fontsize
+        self.min_fontsize = min_fontsize
+        # PyMuPDF 는 쓰는 쪽에서만 불러와 OCR 워커와 엔진 import 를 가볍게 둔다.
+        import fitz
+
+        self.font = fitz.Font(fontfile=str(fontfile)) if fontfile else fitz.Font("cjk")
+        self._widths = {}
+        self.pages_written = 0
+        self._dirty = 0
+
+        if Path(input_pdf).resolve() != Path(output_pdf).resolve():
+            shutil.copyfile(input_pdf, output_pdf)
+        self.doc = fitz.open(self.output_pdf)
+        # 암호화/복구된 문서는 증분 저장이 불가능하므로 마지막에 한 번 전체 저장한다.
+        self.incremental = self.doc.can_save_incrementally()
+        if not self.incremental:
+            logging.warning(f"증분 저장 불가, 종료 시 전체 저장: {self.output_pdf}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def _measure(self, text):
+        width = self._widths.get(text)
+        if width is None:
+            if len(self._widths) >= MAX_MEASURE_CACHE:
+                self._widths.clear()
+            width = self._widths[text] = self.font.text_length(text, fontsize=1)
+        return width
+
+    def write_blocks(self, index, blocks, cover=None):
+        """Write translated ``(rect, text)`` blocks onto page *index*.
+
+        *cover* overrides the writer's ``cover`` setting for these blocks.
+        """
+        import fitz
+
+        page = self.doc[index]
+        blocks = [(fitz.Rect(rect), text) for rect, text in blocks if text and text.strip()]
+        if not blocks:
+            return
+        if self.cover if cover is None else cover:
+            shape = page.new_shape()
+            for rect, _ in blocks:
+                shape.draw_rect(rect)
+            shape.finish(color=None, fill=COVER_COLOR, width=0)
+            shape.commit(overlay=True)
+
+        writer = fitz.TextWriter(page.rect, color=TEXT_COLOR)
+        ascender = self.font.ascender
+        for rect, text in blocks:
+            size, lines = layout_text(
+                text, rect.width, rect.height, self._measure,
+                max_size=self.max_fontsize, min_size=self.min_fontsize,
+            )
+            baseline = rect.y0 + size * ascender
+            for line in lines:
+                if line:
+                    writer.append((rect.x0, baseline), line, font=self.font, fontsize=size)
+                baseline += size * LINE_HEIGHT
+        writer.write_text(page)
+        self._page_done()
+
+    def write_text(self, index, text):
+        """Flow plain *text* into the margins of page *index* (no layout available).
+
+        There is no source block to replace, so nothing on the page is covered.
+        """
+        rect = self.doc[index].rect + (PAGE_MARGIN, PAGE_MARGIN, -PAGE_MARGIN, -PAGE_MARGIN)
+        self.write_blocks(index, [(rect, text)], cover=False)
+
+    def add_result(self, index, result, blocks=None):
+        """Accept a page result as emitted by the translation engine.
+
+        *blocks* (``DocumentTranslator.pop_layout``) places the translation
+        block by block; without it the result text is flowed over the page.
+        Failed pages are left untouched.
+        """
+        if blocks:
+            self.write_blocks(index, blocks)
+        elif "[번역 실패:" not in result and "OCR 실패:" not in result:
+            text = strip_page_header(result)
+            if text and not text.startswith("[빈 페이지"):
+                self.write_text(index, text)
+
+    def _page_done(self):
+        self.pages_written += 1
+        self._dirty += 1
+        if self.incremental and self._dirty >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        """Append pending changes to the output file, keeping the document (and its font) open."""
+        if not self._dirty or not self.incremental:
+            return
+        self.doc.saveIncr()
+        self._dirty = 0
+
+    def close(self):
+        if self.doc is None:
+            return
+        try:
+            if self.incremental:
+                if self._dirty:
+                    self.doc.saveIncr()
+            else:
+                temp = self.output_pdf + ".tmp"
+                self.doc.save(temp, garbage=3, deflate=True)
+                self.doc.close()
+                self.doc = None
+                Path(temp).replace(self.output_pdf)
+        finally:
+            if self.doc is not None:
+                self.doc.close()
+            self.doc = None
+
+
+def write_text_on_pdf(input_pdf, texts_by_page, output_pdf, blocks_by_page=None):
+    """Write ``{page_index: text}`` onto a copy of *input_pdf*.
+
+    Pages with an entry in *blocks_by_page* (``{page_index: [(rect, text)]}``)
+    are laid out block by block instead.
+    """
+    blocks_by_page = blocks_by_page or {}
+    with PdfOverlayWriter(input_pdf, output_pdf) as writer:
+        for index in sorted(set(texts_by_page) | set(blocks_by_page)):
+            if index >= len(writer.doc):
+                continue
+            if blocks_by_page.get(index):
+                writer.write_blocks(index, blocks_by_page[index])
+            else:
+                writer.write_text(index, texts_by_page.get(index, ""))
+
 
 if __name__ == "__main__":
     # 예시 실행
     test_pdf = "example.pdf"
     out_pdf = "translated_output.pdf"
     dummy_texts = {0: "첫 페이지 번역문입니다.", 1: "두 번째 페이지입니다."}
-    write_text_on_pdf(test_pdf, dummy_texts, out_pdf)
\ No newline at end of file
+    write_text_on_pdf(test_pdf, dummy_texts, out_pdf)
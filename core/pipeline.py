@@ -0,0 +1,161 @@
+import asyncio
+import threading
+
+# 동시에 번역 중인 페이지 수 / 래스터화 후 아직 번역 단계에 넘어가지 않은 페이지 수 기본값
+DEFAULT_TRANSLATE_CONCURRENCY = 4
+DEFAULT_MAX_IN_FLIGHT = 8
+
+_DONE = object()
+
+
+class _StageFailure:
+    def __init__(self, exc):
+        self.exc = exc
+
+
+class ReorderBuffer:
+    """Releases out-of-order results in a fixed index order.
+
+    ``push`` returns the ``(index, item)`` pairs that became releasable, which
+    is empty while an earlier index is still missing.
+    """
+
+    def __init__(self, order):
+        self._order = list(order)
+        self._position = 0
+        self._pending = {}
+
+    def push(self, index, item):
+        self._pending[index] = item
+        ready = []
+        while self._position < len(self._order) and self._order[self._position] in self._pending:
+            next_index = self._order[self._position]
+            ready.append((next_index, self._pending.pop(next_index)))
+            self._position += 1
+        return ready
+
+    def drain(self):
+        """Return whatever is still buffered, in index order."""
+        ready = sorted(self._pending.items())
+        self._pending.clear()
+        return ready
+
+    def __len__(self):
+        return len(self._pending)
+
+
+async def run_page_pipeline(page_source, ocr_fn, pool, translate_pages, emit, page_order,
+                            concurrency=DEFAULT_TRANSLATE_CONCURRENCY,
+                            max_in_flight=DEFAULT_MAX_IN_FLIGHT, pages_per_batch=1, ordered=True,
+                            prefilled=None):
+    """Run rasterize -> OCR -> translate -> emit as overlapping stages.
+
+    ``page_source`` yields OCR job arguments, each submitted to the process
+    ``pool`` as its own ``apply_async`` task; a semaphore stops it from
+    rasterizing more than ``max_in_flight`` pages ahead of the translate stage.
+    Per-page tasks (rather than one ``imap`` generator) let several documents
+    share one pool: its task thread drains a whole ``imap`` generator before
+    the next one, which would OCR the documents one after another.
+    OCR results flow through a bounded queue to ``concurrency`` translate
+    tasks.  Each task takes up to ``pages_per_batch`` ready OCR results (the
+    values returned by ``ocr_fn``, whose first item is the page index) and
+    awaits ``translate_pages(results)``, which must return
+    ``[(index, result), ...]`` and handle its own per-page errors.  ``emit`` is
+    called with ``(index, result)`` in ``page_order`` when ``ordered`` is true,
+    otherwise as soon as each page finishes.  ``prefilled`` maps indexes whose
+    results are already known (e.g. replayed from a job journal) to those
+    results; they are emitted right away and ``page_source`` must skip them.
+    """
+    loop = asyncio.get_running_loop()
+    # in_flight 세마포어가 이미 페이지 수를 제한하므로 큐에는 한도를 두지 않는다.
+    # (OCR 결과 콜백은 풀의 결과 스레드에서 불리므로 막히면 안 된다.)
+    ocr_queue = asyncio.Queue()
+    in_flight = threading.Semaphore(max_in_flight)
+    stop = threading.Event()
+    page_order = list(page_order)
+    reorder = ReorderBuffer(page_order)
+    for index in page_order:
+        if prefilled and index in prefilled:
+            if ordered:
+                for ready in reorder.push(index, prefilled[index]):
+                    emit(*ready)
+            else:
+                emit(index, prefilled[index])
+
+    def _throttled_source():
+        for item in page_source:
+            while not in_flight.acquire(timeout=0.1):
+                if stop.is_set():
+                    return
+            if stop.is_set():
+                return
+            yield item
+
+    def _put(item):
+        if not stop.is_set():
+            loop.call_soon_threadsafe(ocr_queue.put_nowait, item)
+
+    def _failed(exc):
+        _put(_StageFailure(exc))
+
+    def _ocr_stage():
+        pending = []
+        try:
+            for item in _throttled_source():
+                pending = [task for task in pending if not task.ready()]
+                pending.append(
+                    pool.apply_async(ocr_fn, (item,), callback=_put, error_callback=_failed)
+                )
+        except BaseException as exc:
+            _failed(exc)
+        finally:
+            # 콜백이 끝난 뒤에야 ready 가 되므로 _DONE 은 모든 결과 뒤에 들어간다.
+            for task in pending:
+                task.wait()
+            for _ in range(concurrency):
+                _put(_DONE)
+
+    async def _translate_stage():
+        while True:
+            item = await ocr_queue.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _StageFailure):
+                raise item.exc
+            batch = [item]
+            in_flight.release()
+            # 이미 OCR 이 끝난 페이지가 대기 중이면 함께 묶어 번역 요청 수를 줄인다.
+            while len(batch) < pages_per_batch:
+                try:
+                    extra = ocr_queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                if extra is _DONE or isinstance(extra, _StageFailure):
+                    ocr_queue.put_nowait(extra)
+                    break
+                batch.append(extra)
+                in_flight.release()
+
+            for index, result in await translate_pages(batch):
+                if ordered:
+                    for ready in reorder.push(index, result):
+                        emit(*ready)
+                else:
+                    emit(index, result)
+
+    ocr_thread = threading.Thread(target=_ocr_stage, name="ocr-stage", daemon=True)
+    ocr_thread.start()
+    workers = [asyncio.ensure_future(_translate_stage()) for _ in range(concurrency)]
+    try:
+        await asyncio.gather(*workers)
+        for ready in reorder.drain():
+            emit(*ready)
+    finally:
+        stop.set()
+        for worker in workers:
+            worker.cancel()
+        # OCR 스레드가 가득 찬 큐에 막혀 있을 수 있으므로 끝날 때까지 비워 준다.
+        while ocr_thread.is_alive():
+            while not ocr_queue.empty():
+                ocr_queue.get_nowait()
+            await asyncio.sleep(0.01)
@@ -0,0 +1,549 @@
+"""Rate limiting, adaptive concurrency and retries shared by the translation backends.
+
+Every outgoing request of a backend (``"translator"``, ``"translate_caller"``,
+``"gemini"``, ``"openai"``) goes through that backend's process-wide
+:class:`BackendScheduler` (:func:`get_scheduler`), so the engine, the batch
+CLI and the GUI draw from the same budget instead of each hammering the API:
+
+* two token buckets cap requests per second and characters per second;
+* an AIMD limiter caps requests in flight: the limit grows by about one per
+  round of successful requests, is halved on 429 / 5xx and shrinks slowly
+  while latency stays above ``target_latency``;
+* callers waiting for a slot are served by priority lane first
+  (:data:`INTERACTIVE` before :data:`BULK`, see :func:`priority_lane`), then
+  in arrival order;
+* throttling (429) and transient failures (5xx, timeouts, dropped
+  connections) are retried with full-jitter exponential backoff, honouring
+  ``Retry-After``, until ``max_attempts`` or the call's deadline runs out;
+  the last error is then raised, so callers see a failure instead of
+  silently getting the source text back.  Other errors are raised at once.
+
+Limits come from :data:`DEFAULT_LIMITS`, overridden per backend by the JSON
+in ``OCR_TRANSLATE_BACKEND_LIMITS`` (e.g. ``{"gemini": {"requests_per_second":
+1}}``) or :func:`configure_backend`.  Queue depth, waits, throttles, retries
+and the concurrency limit are recorded through :mod:`core.metrics`;
+:func:`snapshot` returns the current state of every scheduler.
+"""
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+
+from core import metrics
+
+INTERACTIVE = 0
+BULK = 1
+LANE_NAMES = {INTERACTIVE: "interactive", BULK: "bulk"}
+
+TRANSLATOR_BACKEND = "translator"
+CALLER_BACKEND = "translate_caller"
+GEMINI_BACKEND = "gemini"
+OPENAI_BACKEND = "openai"
+
+LIMITS_ENV = "OCR_TRANSLATE_BACKEND_LIMITS"
+# 백엔드별 기본 한도 (None 은 제한 없음). 유료 등급의 기본 할당량보다 조금 낮게 잡는다.
+DEFAULT_LIMITS = {
+    # Cloud Translation v3: 분당 600만 자
+    TRANSLATOR_BACKEND: {"chars_per_second": 90_000, "max_concurrency": 16},
+    CALLER_BACKEND: {"chars_per_second": 90_000, "max_concurrency": 16},
+    GEMINI_BACKEND: {"requests_per_second": 15, "max_concurrency": 8, "target_latency": 20.0},
+    # 문자 수는 토큰 한도(분당 20만 토큰)를 대략 글자 수로 환산한 값
+    OPENAI_BACKEND: {
+        "requests_per_second": 8, "chars_per_second": 10_000, "max_concurrency": 8,
+        "target_latency": 30.0,
+    },
+}
+
+THROTTLED = "throttled"
+TRANSIENT = "transient"
+FATAL = "fatal"
+# Go 데몬 오류 문자열은 "(HTTP 429)" 처럼 상태 코드를 담는다.
+_HTTP_STATUS_RE = re.compile(r"\bHTTP[ /]?(?:\d\.\d )?\(?(\d{3})\b", re.IGNORECASE)
+# 상태 코드가 전혀 없는 예외만 메시지의 단어로 판단한다.
+_THROTTLE_MARKERS = ("too many requests", "rate limit", "ratelimit", "resource_exhausted",
+                     "resource exhausted")
+_TRANSIENT_MARKERS = ("service unavailable", "bad gateway", "gateway timeout", "unavailable", "timed out", "timeout",
+                      "temporarily", "connection reset", "connection refused", "exited",
+                      "write failed")
+_TRANSIENT_TYPES = (TimeoutError, FutureTimeoutError, ConnectionError)
+
+# GUI 한 건 요청이 일괄 작업보다 오래 기다리거나 오래 재시도하지 않게 한다.
+INTERACTIVE_TIMEOUT = 15.0
+
+# (우선순위, 기본 마감 시간)
+_lane = contextvars.ContextVar("backend_lane", default=(BULK, None))
+
+
+class DeadlineExceeded(TimeoutError):
+    """The call's deadline passed while it was waiting for a slot or a token."""
+
+
+@contextmanager
+def priority_lane(priority, timeout=None):
+    """Send the backend requests made inside the block (and tasks started there) on *priority*.
+
+    *timeout* becomes the default deadline of each of those calls.
+    """
+    token = _lane.set((priority, timeout))
+    try:
+        yield
+    finally:
+        _lane.reset(token)
+
+
+def current_lane():
+    return _lane.get()[0]
+
+
+def _status_code(exc):
+    for source in (exc, getattr(exc, "response", None)):
+        for attr in ("status_code", "http_status", "status", "code"):
+            value = getattr(source, attr, None)
+            if isinstance(value, int) and 100 <= value < 600:
+                return value
+    match = _HTTP_STATUS_RE.search(str(exc))
+    if match and 100 <= int(match.group(1)) < 600:
+        return int(match.group(1))
+    return None
+
+
+def classify(exc):
+    """:data:`THROTTLED`, :data:`TRANSIENT` or :data:`FATAL` for a backend exception.
+
+    Exceptions with ``retryable = False`` are always fatal.
+    """
+    if getattr(exc, "retryable", True) is False:
+        return FATAL
+    status = _status_code(exc)
+    if status == 429:
+        return THROTTLED
+    if status is not None:
+        return TRANSIENT if status >= 500 or status == 408 else FATAL
+    if isinstance(exc, _TRANSIENT_TYPES):
+        return TRANSIENT
+    message = str(exc).lower()
+    if any(marker in message for marker in _THROTTLE_MARKERS):
+        return THROTTLED
+    if any(marker in message for marker in _TRANSIENT_MARKERS):
+        return TRANSIENT
+    return FATAL
+
+
+def retry_after(exc):
+    """Seconds from the exception's ``retry_after`` or ``Retry-After`` header, if any."""
+    value = getattr(exc, "retry_after", None)
+    if value is None:
+        response = getattr(exc, "response", None)
+        headers = getattr(exc, "headers", None) or getattr(response, "headers", None)
+        value = headers.get("Retry-After") if headers is not None else None
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """``rate`` tokens per second, up to ``capacity`` saved up; ``rate=None`` never runs dry.
+
+    :meth:`reserve` takes the tokens right away and returns how long the
+    caller must sleep before using them, so waiting callers keep their place
+    without holding a lock.  :meth:`pause` holds every reservation until a
+    given time (a server's ``Retry-After``), with or without a rate.
+    """
+
+    def __init__(self, rate=None, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self.tokens = self.capacity or 0.0
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def reserve(self, amount=1, max_wait=None):
+        """Seconds to wait before *amount* tokens are usable, or ``None`` past *max_wait*."""
+        if amount <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            wait = max(0.0, self.blocked_until - now)
+            tokens = None
+            if self.rate:
+                self._refill(now)
+                tokens = self.tokens - amount
+                wait = max(wait, self.updated - now + max(0.0, -tokens / self.rate))
+            if max_wait is not None and wait > max_wait:
+                return None
+            if tokens is not None:
+                self.tokens = tokens
+            return wait
+
+    def refund(self, amount=1):
+        if self.rate and amount > 0:
+            with self._lock:
+                self.tokens = min(self.capacity, self.tokens + amount)
+
+    def pause(self, seconds):
+        """Hand out nothing for *seconds*; a rated bucket then refills from empty."""
+        if seconds <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self.blocked_until = max(self.blocked_until, now + seconds)
+            if self.rate:
+                self._refill(now)
+                self.tokens = min(self.tokens, 0.0)
+                self.updated = max(self.updated, self.blocked_until)
+
+
+class AimdLimiter:
+    """Additive-increase / multiplicative-decrease limit on requests in flight.
+
+    Each success adds ``increase / limit`` (about ``increase`` per round of
+    ``limit`` requests); an overload (429, 5xx) multiplies the limit by
+    ``decrease`` at most once per ``cooldown`` seconds, so one burst of
+    rejected requests counts as one signal.  A success slower than
+    ``target_latency`` does not grow the limit and shrinks it by
+    ``latency_decrease`` (also at most once per ``cooldown``).
+    ``maximum=None`` means no cap until the first overload.
+    """
+
+    def __init__(self, initial=None, minimum=1, maximum=None, target_latency=None,
+                 increase=1.0, decrease=0.5, latency_decrease=0.9, cooldown=1.0):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = float(initial or maximum or 0)
+        self.target_latency = target_latency
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_decrease = latency_decrease
+        self.cooldown = cooldown
+        self._last_decrease = float("-inf")
+
+    def slots(self):
+        if self.maximum is None and not self.limit:
+            return float("inf")
+        return max(self.minimum, int(self.limit))
+
+    def _decrease(self, factor, in_flight):
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        # 제한이 없던 백엔드는 과부하를 처음 본 순간의 동시 요청 수에서 줄이기 시작한다.
+        current = self.limit or max(self.minimum, in_flight)
+        self.limit = max(self.minimum, current * factor)
+
+    def on_success(self, latency, in_flight=0):
+        if self.target_latency is not None and latency > self.target_latency:
+            self._decrease(self.latency_decrease, in_flight)
+        elif self.limit:
+            self.limit += self.increase / self.limit
+            if self.maximum is not None:
+                self.limit = min(self.maximum, self.limit)
+
+    def on_overload(self, in_flight):
+        self._decrease(self.decrease, in_flight)
+
+
+class RetryPolicy:
+    """Full-jitter exponential backoff: sleep ``U(0, min(max_delay, base_delay * 2**attempt))``.
+
+    A server's ``Retry-After`` is a lower bound on the sleep.  ``timeout`` is
+    the default deadline of one call, measured from its first attempt and
+    including time spent queued; ``None`` means attempts alone bound it.
+    """
+
+    def __init__(self, max_attempts=5, base_delay=0.5, max_delay=30.0, timeout=None):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timeout = timeout
+
+    def backoff(self, attempt, hint=None):
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if hint is not None:
+            delay = max(delay, min(hint, self.max_delay))
+        return delay
+
+
+class BackendScheduler:
+    """Token buckets, AIMD concurrency, priority lanes and retries for one backend.
+
+    :meth:`call` runs ``fn(*args, **kwargs)`` under the limits and
+    :meth:`acall` awaits a coroutine function the same way.  ``chars`` is the
+    request's size for the character bucket.  Without limits (the defaults)
+    only retries apply.
+    """
+
+    def __init__(self, name, requests_per_second=None, chars_per_second=None, burst_seconds=1.0,
+                 max_concurrency=None, min_concurrency=1, initial_concurrency=None,
+                 target_latency=None, retry=None):
+        self.name = name
+        self.requests = TokenBucket(
+            requests_per_second,
+            max(1.0, requests_per_second * burst_seconds) if requests_per_second else None,
+        )
+        self.chars = TokenBucket(
+            chars_per_second, chars_per_second * burst_seconds if chars_per_second else None
+        )
+        self.limiter = AimdLimiter(
+            initial_concurrency, min_concurrency, max_concurrency, target_latency
+        )
+        self.retry = retry or RetryPolicy()
+        self.stats = {
+            "calls": 0, "attempts": 0, "retries": 0, "throttled": 0, "failures": 0,
+            "deadline_exceeded": 0, "wait_seconds": 0.0,
+        }
+        self._waiting = []
+        self._in_flight = 0
+        self._tickets = itertools.count()
+        self._cond = threading.Condition()
+
+    def _count(self, key, value=1):
+        with self._cond:
+            self.stats[key] += value
+
+    def _start(self, priority, timeout):
+        """The call's priority and absolute deadline, filled in from the lane and the policy."""
+        lane, lane_timeout = _lane.get()
+        priority = lane if priority is None else priority
+        for value in (timeout, lane_timeout, self.retry.timeout):
+            if value is not None:
+                timeout = value
+                break
+        self._count("calls")
+        return priority, None if timeout is None else time.monotonic() + timeout
+
+    def _acquire(self, priority, deadline):
+        ticket = (priority, next(self._tickets))
+        with self._cond:
+            heapq.heappush(self._waiting, ticket)
+            depth = len(self._waiting)
+            try:
+                while self._waiting[0] != ticket or self._in_flight >= self.limiter.slots():
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        self.stats["deadline_exceeded"] += 1
+                        raise DeadlineExceeded(f"{self.name}: deadline passed while queued")
+                    self._cond.wait(remaining)
+            except BaseException:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+                raise
+            heapq.heappop(self._waiting)
+            self._in_flight += 1
+            # 한도가 남아 있으면 다음 대기자도 바로 들어온다.
+            self._cond.notify_all()
+        if metrics.enabled():
+            metrics.observe("backend_queue_depth", depth, backend=self.name,
+                            lane=LANE_NAMES.get(priority, priority))
+
+    def _try_acquire(self):
+        """Take a slot without waiting when nobody is queued and the limit allows it."""
+        with self._cond:
+            if self._waiting or self._in_flight >= self.limiter.slots():
+                return False
+            self._in_flight += 1
+            return True
+
+    def _release(self):
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def _reserve(self, chars, deadline):
+        """Seconds to sleep for the request and character tokens of one attempt."""
+        max_wait = None if deadline is None else deadline - time.monotonic()
+        wait = self.requests.reserve(1, max_wait)
+        if wait is not None:
+            char_wait = self.chars.reserve(chars, max_wait)
+            if char_wait is None:
+                self.requests.refund(1)
+            wait = None if char_wait is None else max(wait, char_wait)
+        if wait is None:
+            self._count("deadline_exceeded")
+            raise DeadlineExceeded(f"{self.name}: rate limit wait exceeds the deadline")
+        if wait:
+            self._count("wait_seconds", wait)
+            if metrics.enabled():
+                metrics.observe("backend_throttle_wait_seconds", wait, backend=self.name)
+        return wait
+
+    def _succeeded(self, started):
+        latency = time.monotonic() - started
+        with self._cond:
+            self.limiter.on_success(latency, self._in_flight)
+            limit = self.limiter.limit
+            # 한도가 늘었으면 대기 중인 요청을 깨운다.
+            self._cond.notify_all()
+        if metrics.enabled():
+            metrics.observe("backend_concurrency_limit", limit, backend=self.name)
+
+    def _failed(self, exc, attempt, deadline):
+        """Backoff before the next attempt; raises *exc* when it should not be retried."""
+        kind = classify(exc)
+        hint = retry_after(exc)
+        if kind != FATAL:
+            with self._cond:
+                self.limiter.on_overload(self._in_flight)
+        if kind == THROTTLED:
+            self._count("throttled")
+            metrics.count("backend_throttled", backend=self.name)
+        delay = self.retry.backoff(attempt, hint)
+        if kind == THROTTLED:
+            # 버킷을 비워 두어 다른 호출도 서버가 정한 시간 동안 기다리게 한다.
+            self.requests.pause(delay)
+        out_of_time = deadline is not None and time.monotonic() + delay > deadline
+        if kind == FATAL or attempt + 1 >= self.retry.max_attempts or out_of_time:
+            self._count("failures")
+            metrics.count("backend_failures", backend=self.name, reason=kind)
+            if kind != FATAL:
+                logging.warning(f"{self.name} 요청 실패, 재시도 중단 ({attempt + 1}회 시도): {exc}")
+            raise exc
+        self._count("retries")
+        metrics.count("backend_retries", backend=self.name, reason=kind)
+        logging.info(f"{self.name} 요청 재시도 {attempt + 1}회 ({kind}, {delay:.2f}초 후): {exc}")
+        return delay
+
+    def call(self, fn, *args, chars=0, priority=None, timeout=None, **kwargs):
+        """``fn(*args, **kwargs)`` within the limits, retried on throttling and transient errors."""
+        priority, deadline = self._start(priority, timeout)
+        attempt = 0
+        while True:
+            self._acquire(priority, deadline)
+            try:
+                wait = self._reserve(chars, deadline)
+                if wait:
+                    time.sleep(wait)
+                self._count("attempts")
+                started = time.monotonic()
+                try:
+                    result = fn(*args, **kwargs)
+                except Exception as exc:
+                    error = exc
+                else:
+                    self._succeeded(started)
+                    return result
+            finally:
+                self._release()
+            time.sleep(self._failed(error, attempt, deadline))
+            attempt += 1
+
+    async def acall(self, fn, *args, chars=0, priority=None, timeout=None, **kwargs):
+        """Async :meth:`call` for a coroutine function *fn*."""
+        priority, deadline = self._start(priority, timeout)
+        attempt = 0
+        while True:
+            # 기다릴 필요가 없으면 이벤트 루프에서 바로 슬롯을 얻고, 아니면 스레드에서 기다린다.
+            if not self._try_acquire():
+                acquiring = asyncio.ensure_future(
+                    asyncio.to_thread(self._acquire, priority, deadline)
+                )
+                try:
+                    await asyncio.shield(acquiring)
+                except asyncio.CancelledError:
+                    # 취소돼도 스레드는 슬롯을 얻을 수 있으므로 얻으면 돌려준다.
+                    acquiring.add_done_callback(
+                        lambda done: done.cancelled() or done.exception() or self._release()
+                    )
+                    raise
+            try:
+                wait = self._reserve(chars, deadline)
+                if wait:
+                    await asyncio.sleep(wait)
+                self._count("attempts")
+                started = time.monotonic()
+                try:
+                    result = await fn(*args, **kwargs)
+                except Exception as exc:
+                    error = exc
+                else:
+                    self._succeeded(started)
+                    return result
+            finally:
+                self._release()
+            await asyncio.sleep(self._failed(error, attempt, deadline))
+            attempt += 1
+
+    def snapshot(self):
+        with self._cond:
+            queued = {}
+            for priority, _ in self._waiting:
+                lane = LANE_NAMES.get(priority, str(priority))
+                queued[lane] = queued.get(lane, 0) + 1
+            slots = self.limiter.slots()
+            return dict(
+                self.stats,
+                wait_seconds=round(self.stats["wait_seconds"], 3),
+                in_flight=self._in_flight,
+                queued=queued,
+                concurrency_limit=None if slots == float("inf") else slots,
+            )
+
+
+_lock = threading.Lock()
+_schedulers = {}
+
+
+def backend_limits(name):
+    """:data:`DEFAULT_LIMITS` for *name* with the ``OCR_TRANSLATE_BACKEND_LIMITS`` overrides."""
+    limits = dict(DEFAULT_LIMITS.get(name, {}))
+    value = os.getenv(LIMITS_ENV)
+    if value:
+        try:
+            limits.update(json.loads(value).get(name, {}))
+        except (ValueError, AttributeError):
+            logging.warning(f"{LIMITS_ENV} 값을 해석할 수 없어 기본 한도를 사용합니다: {value!r}")
+    return limits
+
+
+def get_scheduler(name):
+    """The process-wide :class:`BackendScheduler` of backend *name*."""
+    with _lock:
+        scheduler = _schedulers.get(name)
+        if scheduler is None:
+            scheduler = _schedulers[name] = BackendScheduler(name, **backend_limits(name))
+        return scheduler
+
+
+def configure_backend(name, **limits):
+    """Replace backend *name*'s scheduler; calls already running keep the old one."""
+    scheduler = BackendScheduler(name, **limits)
+    with _lock:
+        _schedulers[name] = scheduler
+    return scheduler
+
+
+def reset_schedulers():
+    with _lock:
+        _schedulers.clear()
+
+
+def snapshot():
+    """``{backend: state}`` of every scheduler created so far."""
+    with _lock:
+        schedulers = dict(_schedulers)
+    return {name: scheduler.snapshot() for name, scheduler in schedulers.items()}
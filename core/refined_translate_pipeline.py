@@ -1,8 +1,56 @@
-from core.gpt_refiner import rewrite_with_gpt
-from core.translate import TranslateWorker
+import logging
+import threading
+
+from core.batch_translate import translate_batch
+from core.gpt_refiner import rewrite_many_with_gpt, rewrite_with_gpt
+from core.rate_limiter import CALLER_BACKEND, BackendScheduler, RetryPolicy
 from config import TARGET_LANG
 from translate.google_translate_api import translate_with_google
 
+_caller = None
+_caller_lock = threading.Lock()
+
+
+def _caller_client():
+    # Go 번역 데몬의 texts 요청으로 여러 문장을 한 번에 보낸다.  한도와 재시도는
+    # translate_batch 의 "translator" 스케줄러가 맡으므로 안쪽 스케줄러는 한 번만 시도한다.
+    global _caller
+    with _caller_lock:
+        if _caller is None:
+            from core.translate_caller_client import TranslateCallerClient
+
+            _caller = TranslateCallerClient(
+                scheduler=BackendScheduler(CALLER_BACKEND, retry=RetryPolicy(max_attempts=1))
+            )
+        return _caller
+
+
+class GoogleTranslateManager:
+    """``core.batch_translate`` manager over Google Cloud Translation.
+
+    Batches go to the translate_caller daemon in one request; when the daemon
+    cannot be started, each text falls back to :func:`translate_with_google`.
+    """
+
+    def __init__(self, source_lang='auto'):
+        self.source_lang = source_lang
+
+    def translate(self, text, target):
+        return translate_with_google(text, self.source_lang, target)
+
+    def translate_batch(self, texts, target):
+        # Cloud Translation v3 는 원문 언어를 비워 두면 자동 감지한다.
+        source = '' if self.source_lang == 'auto' else self.source_lang
+        try:
+            return _caller_client().translate_batch(texts, source, target)
+        except OSError as e:
+            logging.warning(f"translate_caller 를 시작할 수 없어 문장별로 번역합니다: {e}")
+            return [self.translate(text, target) for text in texts]
+
+    def close(self):
+        pass
+
+
 def translate_and_refine(text, source_lang='auto', target_lang=TARGET_LANG):
     # 1차 번역 (Google Cloud Translate)
     raw_translated = translate_with_google(text, source_lang, target_lang)
@@ -10,4 +58,14 @@ def translate_and_refine(text, source_lang='auto', target_lang=TARGET_LANG):
     # 2차 리라이팅 (GPT-4.1 mini or 3.5)
     refined = rewrite_with_gpt(raw_translated)
 
-    return refined
\ No newline at end of file
+    return refined
+
+def translate_and_refine_many(texts, source_lang='auto', target_lang=TARGET_LANG):
+    # 1차 번역도 중복을 없애고 크기 제한에 맞춘 묶음 요청으로 보낸 뒤,
+    # 리라이팅은 캐시 일괄 조회 + 묶음 요청으로 한 번에 처리
+    texts = list(texts)
+    unique = list(dict.fromkeys(texts))
+    translated = dict(zip(unique, translate_batch(
+        GoogleTranslateManager(source_lang), unique, target_lang
+    )))
+    return rewrite_many_with_gpt([translated[text] for text in texts])
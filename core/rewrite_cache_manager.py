@@ -1,28 +1,88 @@
-import sqlite3
 from pathlib import Path
 
+from core.memory_cache import MISSING, get_shared_cache
+from core.sqlite_store import SQLiteKVStore, WriteBehindQueue
+from core.tm_pack import close_packs, default_packs, open_packs, pack_lookup, pack_lookup_many
+
+
 class RewriteCacheManager:
-    def __init__(self, db_path="cache/rewrite_cache_gpt4mini.db"):
+    def __init__(self, db_path="cache/rewrite_cache_gpt4mini.db", write_behind=False,
+                 flush_batch_size=500, flush_interval=1.0, memory_cache=None, packs=None):
         self.db_path = Path(db_path)
-        self.conn = sqlite3.connect(self.db_path)
-        self._initialize()
-
-    def _initialize(self):
-        self.conn.execute(
-            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT)"
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # 같은 DB 를 쓰는 인스턴스끼리 프로세스 전역 메모리 계층을 공유한다.
+        if memory_cache is None:
+            memory_cache = get_shared_cache(f"rewrite:{self.db_path.resolve()}")
+        self.memory = memory_cache if memory_cache is not False else None
+        # 읽기 전용 번역 메모리 팩은 메모리 계층 다음, SQLite 앞에서 조회한다.
+        # packs 를 주지 않으면 OCR_TRANSLATE_TM_PACKS 의 팩을 연다.
+        self._pack_args = list(default_packs() if packs is None else packs)
+        self.packs = open_packs(self._pack_args)
+        self.store = SQLiteKVStore(self.db_path)
+        self._write_queue = (
+            WriteBehindQueue(self.store.put_many, flush_batch_size, flush_interval)
+            if write_behind else None
         )
-        self.conn.commit()
 
     def get(self, key):
-        cursor = self.conn.execute("SELECT value FROM cache WHERE key = ?", (key,))
-        row = cursor.fetchone()
-        return row[0] if row else None
+        if self.memory is not None:
+            value = self.memory.get(key, MISSING)
+            if value is not MISSING:
+                return value
+        if self.packs:
+            value = pack_lookup(self.packs, key)
+            if value is not None:
+                return value
+        value = None
+        if self._write_queue is not None:
+            value = self._write_queue.get(key)
+        if value is None:
+            value = self.store.get(key)
+        if value is not None and self.memory is not None:
+            self.memory.set(key, value)
+        return value
+
+    def get_many(self, keys):
+        keys = list(keys)
+        found = self.memory.get_many(keys) if self.memory is not None else {}
+        missing = [key for key in keys if key not in found]
+        if missing and self.packs:
+            found.update(pack_lookup_many(self.packs, missing))
+            missing = [key for key in missing if key not in found]
+        if not missing:
+            return found
+        loaded = self._write_queue.get_many(missing) if self._write_queue is not None else {}
+        missing = [key for key in missing if key not in loaded]
+        if missing:
+            loaded.update(self.store.get_many(missing))
+        if self.memory is not None:
+            self.memory.set_many(loaded)
+        found.update(loaded)
+        return found
 
     def add(self, key, value):
-        self.conn.execute(
-            "INSERT OR REPLACE INTO cache (key, value) VALUES (?, ?)", (key, value)
-        )
-        self.conn.commit()
+        if self.memory is not None:
+            self.memory.set(key, value)
+        if self._write_queue is not None:
+            self._write_queue.put(key, value)
+        else:
+            self.store.put(key, value)
+
+    def put_many(self, items):
+        items = list(items.items()) if isinstance(items, dict) else list(items)
+        if self.memory is not None:
+            self.memory.set_many(items)
+        if self._write_queue is not None:
+            self._write_queue.put_many(items)
+        else:
+            self.store.put_many(items)
+
+    def flush(self):
+        if self._write_queue is not None:
+            self._write_queue.flush()
 
     def close(self):
-        self.conn.close()
\ No newline at end of file
+        if self._write_queue is not None:
+            self._write_queue.close()
+        self.store.close()
+        close_packs(self.packs, keep=self._pack_args)
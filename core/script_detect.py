@@ -0,0 +1,144 @@
+"""Script-based language detection for OCR pages.
+
+Han, Kana and Hangul text is classified from Unicode ranges alone; only
+Latin-script text, which the ranges cannot tell apart, goes to a statistical
+detector.  Pages are profiled in one pass, so short OCR fragments (page
+numbers, labels, broken lines) inherit the page's dominant language instead
+of being guessed on their own.
+"""
+
+from collections import Counter
+
+HAN = "han"
+KANA = "kana"
+HANGUL = "hangul"
+LATIN = "latin"
+
+# 이보다 글자 수가 적은 조각은 페이지의 주 언어를 따른다.
+MIN_FRAGMENT_LETTERS = 12
+# 라틴 문자 문장은 이 길이 이상일 때만 통계 감지기로 따로 판정한다.
+MIN_LATIN_FALLBACK_CHARS = 80
+# 통계 감지기에 넘기는 페이지 표본 길이
+PAGE_SAMPLE_CHARS = 2000
+# 일본어 문장에도 한자가 많으므로 가나가 이 비율 이상이면 일본어로 본다.
+KANA_RATIO_FOR_JA = 0.1
+
+# 간체/번체에서 모양이 다른 고빈도 글자
+_SIMPLIFIED = set("这个们说时国会来对为发经过还进样问么现长门开关见车东书学让话语边应际")
+_TRADITIONAL = set("這個們說時國會來對為發經過還進樣問麼現長門開關見車東書學讓話語邊應際")
+
+_CHINESE = ("zh-cn", "zh-tw")
+_HAN_LANGS = ("zh-cn", "zh-tw", "ja")
+
+
+def char_script(ch):
+    code = ord(ch)
+    if code < 0x80:
+        return LATIN if ch.isalpha() else None
+    if 0x3040 <= code <= 0x30FF or 0x31F0 <= code <= 0x31FF or 0xFF66 <= code <= 0xFF9D:
+        return KANA
+    if 0xAC00 <= code <= 0xD7AF or 0x1100 <= code <= 0x11FF or 0x3130 <= code <= 0x318F:
+        return HANGUL
+    if 0x4E00 <= code <= 0x9FFF or 0x3400 <= code <= 0x4DBF or 0xF900 <= code <= 0xFAFF:
+        return HAN
+    if code <= 0x024F or 0x1E00 <= code <= 0x1EFF:
+        return LATIN if ch.isalpha() else None
+    return None
+
+
+def script_profile(text):
+    """Count letters per script, plus simplified/traditional marker characters."""
+    counts = Counter()
+    for ch in text:
+        script = char_script(ch)
+        if script is None:
+            continue
+        counts[script] += 1
+        if script == HAN:
+            if ch in _SIMPLIFIED:
+                counts["simplified"] += 1
+            elif ch in _TRADITIONAL:
+                counts["traditional"] += 1
+    return counts
+
+
+def letters(counts):
+    return counts[HAN] + counts[KANA] + counts[HANGUL] + counts[LATIN]
+
+
+def classify_profile(counts):
+    """Language code for a script profile; ``LATIN`` when only a statistical detector can tell."""
+    total = letters(counts)
+    if not total:
+        return None
+    cjk = counts[HAN] + counts[KANA]
+    if counts[HANGUL] >= max(cjk, counts[LATIN]):
+        return "ko"
+    if cjk >= counts[LATIN]:
+        if counts[KANA] >= KANA_RATIO_FOR_JA * cjk:
+            return "ja"
+        return "zh-tw" if counts["traditional"] > counts["simplified"] else "zh-cn"
+    return LATIN
+
+
+class PageLanguageDetector:
+    """Assign a language to every sentence of a page.
+
+    ``fallback(text)`` is the statistical detector (``detect_language_safe``)
+    and is only consulted for Latin script: once for a sample of the page's
+    Latin sentences, and again for Latin sentences of at least
+    ``min_latin_fallback_chars`` characters on pages dominated by another
+    script.
+    """
+
+    def __init__(self, fallback, min_fragment_letters=MIN_FRAGMENT_LETTERS,
+                 min_latin_fallback_chars=MIN_LATIN_FALLBACK_CHARS):
+        self.fallback = fallback
+        self.min_fragment_letters = min_fragment_letters
+        self.min_latin_fallback_chars = min_latin_fallback_chars
+        self.fallback_calls = 0
+
+    def _fallback(self, text):
+        self.fallback_calls += 1
+        return self.fallback(text)
+
+    def detect_page(self, sentences):
+        """Return one language code (or ``None``) per sentence, in order."""
+        profiles = [script_profile(sentence) for sentence in sentences]
+        page_counts = Counter()
+        for counts in profiles:
+            page_counts.update(counts)
+
+        page_lang = classify_profile(page_counts)
+        latin_lang = None
+        if page_counts[LATIN]:
+            sample = " ".join(
+                sentence for sentence, counts in zip(sentences, profiles)
+                if classify_profile(counts) == LATIN
+            )[:PAGE_SAMPLE_CHARS]
+            if sample:
+                latin_lang = self._fallback(sample)
+        if page_lang == LATIN:
+            page_lang = latin_lang
+
+        langs = []
+        for sentence, counts in zip(sentences, profiles):
+            lang = classify_profile(counts)
+            if letters(counts) < self.min_fragment_letters:
+                # 숫자, 라틴 약어, 일본어/중국어 페이지의 한자 조각은 페이지 언어를 따르고
+                # 가나/한글처럼 문자만으로 확실한 조각은 그대로 둔다.
+                if lang in (None, LATIN) or (lang in _CHINESE and page_lang in _HAN_LANGS):
+                    lang = page_lang
+                langs.append(lang)
+                continue
+            if lang == LATIN:
+                lang = latin_lang
+                if len(sentence) >= self.min_latin_fallback_chars and page_lang != latin_lang:
+                    # 다른 문자와 섞인 페이지의 긴 라틴 문장은 페이지 표본과 언어가 다를 수 있다.
+                    lang = self._fallback(sentence)
+            langs.append(lang)
+        return langs
+
+    def detect(self, text):
+        """Language of a single standalone text."""
+        return self.detect_page([text])[0]
@@ -1 +1,14 @@
-# signal_handler.py placeholder
+from PySide6.QtCore import QObject, Signal
+
+
+class SignalHandler(QObject):
+    """Signals a :class:`~core.translate.TranslateWorker` reports through.
+
+    ``run_summary`` carries a dict with the engine counters and, when
+    :mod:`core.metrics` is enabled, per-stage timings for the run.  It is
+    emitted once per run, right before ``finished``.
+    """
+
+    page_done = Signal(int, str)
+    run_summary = Signal(dict)
+    finished = Signal()
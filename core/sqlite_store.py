@@ -0,0 +1,168 @@
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+
+# SQLite 기본 변수 한도(999)보다 작게 잡아 오래된 빌드에서도 동작하게 한다.
+LOOKUP_CHUNK = 500
+
+
+def open_cache_connection(db_path, timeout=30.0):
+    """Open *db_path* with the pragmas shared by every cache database."""
+    conn = sqlite3.connect(db_path, timeout=timeout, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # WAL 모드에서는 NORMAL 이어도 손상 없이 커밋 단위 내구성만 약간 완화된다.
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+class SQLiteKVStore:
+    """Single-table key/value store backing the translation and rewrite caches.
+
+    Every statement is issued with a constant SQL string so the connection's
+    statement cache keeps one prepared statement per operation.  Bulk lookups
+    are padded to a fixed chunk size for the same reason, and bulk writes run
+    inside a single transaction.  The connection may be shared between threads;
+    all access goes through ``lock``.
+    """
+
+    _GET_SQL = "SELECT value FROM cache WHERE key = ?"
+    _GET_MANY_SQL = "SELECT key, value FROM cache WHERE key IN ({})".format(
+        ", ".join("?" * LOOKUP_CHUNK)
+    )
+    _PUT_SQL = "INSERT OR REPLACE INTO cache (key, value) VALUES (?, ?)"
+
+    def __init__(self, db_path, timeout=30.0):
+        self.db_path = Path(db_path)
+        self.conn = open_cache_connection(self.db_path, timeout=timeout)
+        self.lock = threading.RLock()
+        with self.lock:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT)"
+            )
+            self.conn.commit()
+
+    def get(self, key):
+        with self.lock:
+            row = self.conn.execute(self._GET_SQL, (key,)).fetchone()
+        return row[0] if row else None
+
+    def get_many(self, keys):
+        """Return ``{key: value}`` for the *keys* present in the store."""
+        unique = list(dict.fromkeys(keys))
+        found = {}
+        with self.lock:
+            for start in range(0, len(unique), LOOKUP_CHUNK):
+                chunk = unique[start:start + LOOKUP_CHUNK]
+                # 마지막 묶음은 첫 키로 채워 같은 준비문을 재사용한다.
+                padded = chunk + [chunk[0]] * (LOOKUP_CHUNK - len(chunk))
+                found.update(self.conn.execute(self._GET_MANY_SQL, padded).fetchall())
+        return found
+
+    def put(self, key, value):
+        with self.lock:
+            self.conn.execute(self._PUT_SQL, (key, value))
+            self.conn.commit()
+
+    def put_many(self, items):
+        """Write ``(key, value)`` pairs in one transaction; returns the row count."""
+        items = list(items.items()) if isinstance(items, dict) else list(items)
+        if not items:
+            return 0
+        with self.lock:
+            with self.conn:
+                self.conn.executemany(self._PUT_SQL, items)
+        return len(items)
+
+    def count(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class WriteBehindQueue:
+    """Buffers cache writes and flushes them in batches from a background thread.
+
+    Pending values stay readable through :meth:`get` until they are flushed, so
+    callers see their own writes immediately.  Repeated writes of the same key
+    collapse into one row.  ``flush_fn`` receives a list of ``(key, value)``
+    pairs and is expected to write them in a single transaction.
+    """
+
+    def __init__(self, flush_fn, batch_size=500, flush_interval=1.0):
+        self._flush_fn = flush_fn
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._pending = {}
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="cache-write-behind", daemon=True)
+        self._thread.start()
+
+    def put(self, key, value):
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("write-behind queue is closed")
+            self._pending[key] = value
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify()
+
+    def put_many(self, items):
+        items = items.items() if isinstance(items, dict) else items
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("write-behind queue is closed")
+            self._pending.update(items)
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify()
+
+    def get(self, key):
+        with self._cond:
+            return self._pending.get(key)
+
+    def get_many(self, keys):
+        with self._cond:
+            return {key: self._pending[key] for key in keys if key in self._pending}
+
+    def __len__(self):
+        with self._cond:
+            return len(self._pending)
+
+    def flush(self):
+        # 플러시 중인 배치도 get()으로 보이도록 기록이 끝난 뒤에 pending 에서 지운다.
+        with self._flush_lock:
+            with self._cond:
+                batch = dict(self._pending)
+            if not batch:
+                return 0
+            try:
+                self._flush_fn(list(batch.items()))
+            except Exception:
+                logging.exception("캐시 일괄 기록 실패")
+                return 0
+            with self._cond:
+                for key, value in batch.items():
+                    if self._pending.get(key) is value:
+                        del self._pending[key]
+            return len(batch)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._closed and len(self._pending) < self.batch_size:
+                    self._cond.wait(self.flush_interval)
+                closed = self._closed
+            self.flush()
+            if closed:
+                return
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+        self.flush()
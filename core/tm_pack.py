@@ -0,0 +1,286 @@
+"""Immutable, memory-mapped translation-memory packs.
+
+A pack is one file compiled from the SQLite caches (see :func:`export_pack`
+and ``python -m core.tm_pack export``)::
+
+    header   magic, version, entry count, hash table size, section offsets
+    entries  count x (hash64, key offset, key length, value offset, value length),
+             sorted by key bytes
+    table    open-addressing hash table of entry numbers (0 = empty slot)
+    heap     UTF-8 keys and values, packed back to back
+
+:class:`TMPack` maps the file and reads the header only; a lookup hashes the
+key, probes the table and decodes one value, so opening a pack with millions
+of entries costs one ``mmap`` call and no per-entry Python objects.  Packs
+are passed to ``TranslationCacheManager(packs=...)`` /
+``RewriteCacheManager(packs=...)``, where they are consulted after the memory
+tier and before SQLite.  Without ``packs`` both managers open the packs listed
+in ``$OCR_TRANSLATE_TM_PACKS`` (files or directories, separated by
+``os.pathsep``).
+"""
+
+import argparse
+import hashlib
+import logging
+import mmap
+import os
+import sqlite3
+import struct
+import sys
+from pathlib import Path
+
+MAGIC = b"OCRTMPK1"
+VERSION = 1
+_HEADER = struct.Struct("<8sIIQQQQ")  # magic, version, table bits, count, entries, table, heap
+_ENTRY = struct.Struct("<QIIII")
+_SLOT = struct.Struct("<I")
+_MAX_HEAP = (1 << 32) - 1
+# 해시 테이블 크기는 항목 수의 두 배 이상인 2의 거듭제곱
+_LOAD_FACTOR = 2
+# 캐시 관리자가 packs 없이 만들어질 때 열 팩 파일/디렉터리 목록 (os.pathsep 으로 구분)
+PACKS_ENV = "OCR_TRANSLATE_TM_PACKS"
+
+
+def key_hash(data):
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+
+
+def export_pack(items, path):
+    """Write ``(key, value)`` pairs to a pack at *path*; returns the entry count.
+
+    The first value seen for a key wins.  The file is written next to *path*
+    and renamed into place, so readers never see a half-written pack.
+    """
+    unique = {}
+    for key, value in items:
+        if key is not None and value is not None:
+            unique.setdefault(key, value)
+    encoded = sorted((key.encode("utf-8"), value.encode("utf-8")) for key, value in unique.items())
+    count = len(encoded)
+    table_bits = max(1, (count * _LOAD_FACTOR).bit_length())
+    table_size = 1 << table_bits
+    mask = table_size - 1
+
+    entries = bytearray(_ENTRY.size * count)
+    table = bytearray(_SLOT.size * table_size)
+    heap_size = 0
+    for number, (key, value) in enumerate(encoded):
+        hashed = key_hash(key)
+        _ENTRY.pack_into(
+            entries, number * _ENTRY.size,
+            hashed, heap_size, len(key), heap_size + len(key), len(value),
+        )
+        heap_size += len(key) + len(value)
+        if heap_size > _MAX_HEAP:
+            raise ValueError("pack heap exceeds 4 GiB; split the export")
+        slot = hashed & mask
+        while _SLOT.unpack_from(table, slot * _SLOT.size)[0]:
+            slot = (slot + 1) & mask
+        _SLOT.pack_into(table, slot * _SLOT.size, number + 1)
+
+    entries_offset = _HEADER.size
+    table_offset = entries_offset + len(entries)
+    heap_offset = table_offset + len(table)
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp = path.with_name(path.name + ".tmp")
+    with open(temp, "wb") as out:
+        out.write(
+            _HEADER.pack(MAGIC, VERSION, table_bits, count, entries_offset, table_offset, heap_offset)
+        )
+        out.write(entries)
+        out.write(table)
+        for key, value in encoded:
+            out.write(key)
+            out.write(value)
+    temp.replace(path)
+    return count
+
+
+class TMPack:
+    """Read-only view of a pack file (see the module docstring)."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, "rb") as handle:
+            self._mmap = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            (magic, version, table_bits, self.count,
+             self._entries, self._table, self._heap) = _HEADER.unpack_from(self._mmap, 0)
+        except struct.error:
+            self._mmap.close()
+            raise ValueError(f"{self.path}: not a translation memory pack")
+        if magic != MAGIC or version != VERSION:
+            self._mmap.close()
+            raise ValueError(f"{self.path}: not a translation memory pack (v{VERSION})")
+        self._mask = (1 << table_bits) - 1
+
+    def __len__(self):
+        return self.count
+
+    def _find(self, key):
+        data = key.encode("utf-8")
+        hashed = key_hash(data)
+        buf = self._mmap
+        slot = hashed & self._mask
+        while True:
+            number = _SLOT.unpack_from(buf, self._table + slot * _SLOT.size)[0]
+            if not number:
+                return None
+            entry = _ENTRY.unpack_from(buf, self._entries + (number - 1) * _ENTRY.size)
+            if entry[0] == hashed and entry[2] == len(data):
+                start = self._heap + entry[1]
+                if buf[start:start + entry[2]] == data:
+                    return entry
+            slot = (slot + 1) & self._mask
+
+    def get(self, key, default=None):
+        entry = self._find(key)
+        if entry is None:
+            return default
+        start = self._heap + entry[3]
+        return self._mmap[start:start + entry[4]].decode("utf-8")
+
+    def __contains__(self, key):
+        return self._find(key) is not None
+
+    def get_many(self, keys):
+        found = {}
+        for key in keys:
+            value = self.get(key)
+            if value is not None:
+                found[key] = value
+        return found
+
+    def items(self):
+        """Iterate ``(key, value)`` in key order."""
+        buf = self._mmap
+        for number in range(self.count):
+            _, key_at, key_len, value_at, value_len = _ENTRY.unpack_from(
+                buf, self._entries + number * _ENTRY.size
+            )
+            yield (
+                buf[self._heap + key_at:self._heap + key_at + key_len].decode("utf-8"),
+                buf[self._heap + value_at:self._heap + value_at + value_len].decode("utf-8"),
+            )
+
+    def close(self):
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def default_packs():
+    """Pack paths from ``$OCR_TRANSLATE_TM_PACKS``; empty when it is unset."""
+    value = os.getenv(PACKS_ENV, "")
+    return [path for path in value.split(os.pathsep) if path.strip()]
+
+
+def open_packs(paths):
+    """Open every pack in *paths* (files or directories of ``*.tmpack``), skipping bad files.
+
+    Already open :class:`TMPack` objects are passed through unchanged.
+    """
+    packs = []
+    for item in paths or ():
+        if isinstance(item, TMPack):
+            packs.append(item)
+            continue
+        item = Path(item)
+        files = sorted(item.glob("*.tmpack")) if item.is_dir() else [item]
+        for path in files:
+            try:
+                packs.append(TMPack(path))
+            except (OSError, ValueError) as e:
+                logging.warning(f"번역 메모리 팩 열기 실패: {path} ({e})")
+    return packs
+
+
+def close_packs(packs, keep=()):
+    """Close *packs* except the :class:`TMPack` objects in *keep* (the caller's own)."""
+    shared = {id(item) for item in keep if isinstance(item, TMPack)}
+    for pack in packs:
+        if id(pack) not in shared:
+            pack.close()
+
+
+def pack_lookup(packs, key):
+    for pack in packs:
+        value = pack.get(key)
+        if value is not None:
+            return value
+    return None
+
+
+def pack_lookup_many(packs, keys):
+    found = {}
+    remaining = list(keys)
+    for pack in packs:
+        if not remaining:
+            break
+        found.update(pack.get_many(remaining))
+        remaining = [key for key in remaining if key not in found]
+    return found
+
+
+def cache_sources(base_dir=None, base_name="translation_cache", rewrite_db=None):
+    """SQLite files of a ``TranslationCacheManager`` directory and/or a rewrite cache."""
+    sources = []
+    if base_dir:
+        sources += sorted(Path(base_dir).glob(f"{base_name}*.db"))
+    if rewrite_db:
+        sources.append(Path(rewrite_db))
+    return sources
+
+
+def iter_sqlite_items(db_paths, batch_size=10_000):
+    """``(key, value)`` rows of cache databases; earlier files win for duplicate keys."""
+    for db_path in db_paths:
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            cursor = conn.execute("SELECT key, value FROM cache")
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Translation memory pack tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="compile SQLite caches into a pack")
+    export.add_argument("output")
+    export.add_argument("--base-dir", default=None, help="TranslationCacheManager directory")
+    export.add_argument("--base-name", default="translation_cache")
+    export.add_argument("--rewrite-db", default=None, help="RewriteCacheManager database")
+    info = sub.add_parser("info", help="show a pack's entry count")
+    info.add_argument("pack")
+    get = sub.add_parser("get", help="look up one key")
+    get.add_argument("pack")
+    get.add_argument("key")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == "export":
+        sources = cache_sources(args.base_dir, args.base_name, args.rewrite_db)
+        if not sources:
+            parser.error("nothing to export: pass --base-dir and/or --rewrite-db")
+        count = export_pack(iter_sqlite_items(sources), args.output)
+        logging.info(f"{args.output}: {count}개 항목 저장")
+    elif args.command == "info":
+        with TMPack(args.pack) as pack:
+            print(f"{pack.path}: {len(pack)} entries")
+    else:
+        with TMPack(args.pack) as pack:
+            value = pack.get(args.key)
+        if value is None:
+            sys.exit(1)
+        print(value)
@@ -1,195 +1,90 @@
-import asyncio
-import html
-import io
 import logging
-import re
-from multiprocessing import Pool, cpu_count
-from typing import Dict, Optional, Tuple
+import os
+import time
+from pathlib import Path
 
-import fitz
-import pytesseract
-from PIL import Image
 from PySide6.QtCore import QRunnable, Slot
 
-from config import OCR_LANG, OCR_PSM, TARGET_LANG
-from core.lang_utils import detect_language_safe
-from core.ocr_cache import OcrCache
-from core.utils_text import split_into_sentences
-from translate.manager import TranslatorManager
-
-ALLOWED_SOURCE_LANGS = {"en", "zh", "zh-cn", "zh-tw", "ja", "fr", "de", "es"}
-
-
-def _translate_text_sync(text, target_lang, source_lang=None):
-    """Translate *text* synchronously.
-
-    The previous implementation accidentally called ``translate_text`` from
-    within itself via the asynchronous wrapper which resulted in infinite
-    recursion.  To keep the synchronous implementation reusable by both the
-    public synchronous and asynchronous helpers we perform the actual work in
-    this internal helper.
-    """
-
-    detected_lang = source_lang or detect_language_safe(text)
-
-    manager_kwargs = {"target": target_lang}
-    if detected_lang:
-        manager_kwargs["source"] = detected_lang
-
-    manager = TranslatorManager(**manager_kwargs)
-    try:
-        return manager.translate(text, target=target_lang)
-    finally:
-        # ``TranslatorManager`` exposes ``close`` to release any network or
-        # process resources.  Always close it even if translation fails so the
-        # caller does not leak resources.
-        manager.close()
-
-
-def translate_text(text, target_lang, source_lang=None):
-    """Blocking translation helper used by the rest of the code base."""
-    return _translate_text_sync(text, target_lang, source_lang)
-
-
-def ocr_single_page(args):
-    i, page_bytes, cache_enabled = args
-    ocr_cache = OcrCache() if cache_enabled else None
-
-    try:
-        img_bytes = page_bytes
-        if cache_enabled:
-            cached = ocr_cache.get_text(img_bytes)
-            if cached:
-                return (i, cached)
-
-        img = Image.open(io.BytesIO(img_bytes))
-        text = pytesseract.image_to_string(img, lang=OCR_LANG, config=f"--psm {OCR_PSM}")
-
-        if cache_enabled:
-            ocr_cache.save_text(img_bytes, text)
-
-        return (i, text)
-    except Exception as e:
-        return (i, f"[Page {i+1}] OCR 실패: {e}")
+from config import TARGET_LANG
+from core import metrics
+# 엔진은 GUI 의존성이 없는 core.document_engine 에 있다. 기존 import 경로를 위해 다시 내보낸다.
+from core.document_engine import (  # noqa: F401
+    ALLOWED_SOURCE_LANGS,
+    DocumentTranslator,
+    close_async_translator,
+    init_ocr_worker,
+    ocr_page_timed,
+    ocr_single_page,
+    translate_text,
+    translate_text_async,
+)
+from core.pdf_overlay import PdfOverlayWriter
 
 
 class TranslateWorker(QRunnable):
-    """Worker responsible for extracting text and performing translations.
-
-    The previous implementation instantiated a new ``TranslatorManager`` for
-    every page/language combination which is unnecessarily expensive.  A single
-    PDF may contain hundreds of sentences in the same language which means the
-    creation/teardown of the manager dominated the translation time.  We now
-    keep the managers alive for the lifetime of the worker and reuse
-    translations for identical sentences which significantly reduces repeated
-    RPC calls.
+    """Runs a :class:`~core.document_engine.DocumentTranslator` on a ``QThreadPool``.
+
+    Pages are reported through ``signal_handler.page_done``, the run's
+    counters and stage timings through ``signal_handler.run_summary`` and
+    completion through ``signal_handler.finished``.  Keyword options are
+    passed to the engine; tuning knobs such as ``pages_per_batch`` live on
+    ``worker.engine``.  With ``OCR_TRANSLATE_TRACE_DIR`` set, a Chrome trace
+    and a Prometheus snapshot are written there after each run.
+
+    ``overlay_pdf`` turns on the engine's layout mode and writes each page
+    into that PDF (see :class:`~core.pdf_overlay.PdfOverlayWriter`) as soon
+    as it is translated.
     """
 
-    def __init__(self, file_path, signal_handler, lang=TARGET_LANG):
+    def __init__(self, file_path, signal_handler, lang=TARGET_LANG, overlay_pdf=None, **options):
         super().__init__()
         self.file_path = file_path
         self.signal_handler = signal_handler
         self.lang = lang
-        self.cache_enabled = True
-        self._managers: Dict[str, TranslatorManager] = {}
-        self._sentence_cache: Dict[Tuple[str, str], str] = {}
-        self._language_detection_cache: Dict[str, Optional[str]] = {}
+        self.overlay_pdf = overlay_pdf
+        if overlay_pdf:
+            options.setdefault("layout", True)
+        self.engine = DocumentTranslator(file_path, lang=lang, **options)
 
     @Slot()
     def run(self):
+        started = time.perf_counter()
+        overlay = None
         try:
-            with fitz.open(self.file_path) as doc:
-                total_pages = len(doc)
-
-                def _page_image_iter():
-                    for page_index in range(total_pages):
-                        page = doc.load_page(page_index)
-                        pix = page.get_pixmap(dpi=200)
-                        yield (
-                            page_index,
-                            pix.tobytes("jpeg"),
-                            self.cache_enabled,
-                        )
-
-                # 스트리밍 처리: 페이지별 OCR 결과를 바로바로 소비
-                with Pool(min(cpu_count(), 6)) as pool:
-                    page_iter = pool.imap(
-                        ocr_single_page, _page_image_iter(), chunksize=1
-                    )
-                    for i, text in page_iter:
-                        try:
-                            # 한중일 범위 사이 공백 제거(중문 OCR 줄바꿈 교정)
-                            cleaned = re.sub(r"(?<=[一-鿿])\s+(?=[一-鿿])", "", text)
-                            sentences = split_into_sentences(cleaned)
-                            if not sentences:
-                                self.signal_handler.page_done.emit(
-                                    i, f"[Page {i+1}]\n[빈 페이지 또는 인식 실패]"
-                                )
-                                continue
-
-                            translated_sentences = []
-                            for sentence in sentences:
-                                normalized = sentence.strip()
-                                if not normalized:
-                                    continue
-
-                                # 언어 감지 결과 캐시
-                                try:
-                                    lang = self._language_detection_cache[normalized]
-                                except KeyError:
-                                    lang = detect_language_safe(normalized)
-                                    self._language_detection_cache[normalized] = lang
-
-                                if lang in ALLOWED_SOURCE_LANGS:
-                                    translated = self._translate_sentence(lang, normalized)
-                                else:
-                                    translated = normalized  # 허용 외 언어는 원문 유지
-
-                                translated_sentences.append(translated)
-
-                            result = (
-                                f"[Page {i+1}]\n"
-                                + html.unescape(" ".join(translated_sentences).strip())
-                            )
-                        except Exception as exc:
-                            logging.error(f"Page {i+1} 처리 실패: {exc}")
-                            result = f"[Page {i+1}]\n[번역 실패: {exc}]"
-
-                        self.signal_handler.page_done.emit(i, result)
+            on_page = self.signal_handler.page_done.emit
+            if self.overlay_pdf:
+                overlay = PdfOverlayWriter(self.file_path, self.overlay_pdf)
+                on_page = self._overlay_page(overlay)
+            self.engine.process(on_page)
         finally:
-            self._close_managers()
+            if overlay is not None:
+                overlay.close()
+            self._emit_summary(time.perf_counter() - started)
             self.signal_handler.finished.emit()
 
-    def _translate_sentence(self, lang: str, sentence: str) -> str:
-        cache_key = (lang, sentence)
-        cached = self._sentence_cache.get(cache_key)
-        if cached is not None:
-            return cached
-
-        manager = self._managers.get(lang)
-        if manager is None:
-            manager = TranslatorManager(source=lang, target=self.lang)
-            self._managers[lang] = manager
-
-        translated = manager.translate(sentence, target=self.lang)
-        self._sentence_cache[cache_key] = translated
-        return translated
-
-    def _close_managers(self) -> None:
-        for manager in self._managers.values():
+    def _overlay_page(self, overlay):
+        def _on_page(index, result):
             try:
-                manager.close()
+                overlay.add_result(index, result, self.engine.pop_layout(index))
             except Exception:
-                logging.exception("TranslatorManager 종료 중 오류 발생")
-        self._managers.clear()
-        self._sentence_cache.clear()
-        self._language_detection_cache.clear()
-
-
-async def translate_text_async(text, target_lang, source_lang=None):
-    """Asynchronous wrapper around :func:`_translate_text_sync`."""
-    loop = asyncio.get_running_loop()
-    result = await loop.run_in_executor(
-        None, _translate_text_sync, text, target_lang, source_lang
-    )
-    return result
+                logging.exception(f"Page {index+1} PDF 쓰기 실패")
+            self.signal_handler.page_done.emit(index, result)
+
+        return _on_page
+
+    def _emit_summary(self, seconds):
+        summary = {
+            "file": str(self.file_path),
+            "seconds": round(seconds, 3),
+            "stats": dict(self.engine.stats),
+            "metrics": self.engine.metrics_summary,
+        }
+        logging.info(f"번역 작업 요약: {summary}")
+        try:
+            metrics.export_run(os.getenv(metrics.TRACE_DIR_ENV), Path(self.file_path).stem)
+        except OSError:
+            logging.exception("메트릭 내보내기 실패")
+        # run_summary 시그널이 없는 핸들러도 그대로 쓸 수 있게 둔다.
+        signal = getattr(self.signal_handler, "run_summary", None)
+        if signal is not None:
+            signal.emit(summary)
@@ -0,0 +1,211 @@
+import itertools
+import json
+import logging
+import os
+import subprocess
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from pathlib import Path
+
+from core.rate_limiter import CALLER_BACKEND, get_scheduler
+
+CALLER_DIR = Path(__file__).resolve().parent.parent / "go_modules" / "translate_caller"
+DEFAULT_TIMEOUT = 10.0
+
+
+class TranslateCallerError(RuntimeError):
+    pass
+
+
+class TranslateCallerTimeout(TranslateCallerError):
+    """No reply in time; the daemon may still be running (and paying for) the request."""
+
+    # 데몬은 요청을 취소할 수 없으므로 재시도하면 같은 호출이 두 번 나간다.
+    retryable = False
+
+
+class TranslateCallerClient:
+    """Client for the long-lived ``translate_caller -serve`` daemon.
+
+    Requests are written as newline-delimited JSON with an ``id`` and replies
+    are matched back by that id, so many threads can share one process and the
+    daemon's keep-alive HTTP connections.  If the process dies, pending calls
+    fail and the next call starts a new one (at most ``max_restarts`` times per
+    ``restart_window`` seconds).
+
+    ``command`` defaults to ``$TRANSLATE_CALLER_BIN -serve`` when that binary
+    is set, otherwise ``go run translate_caller.go -serve``; ``endpoint``
+    overrides the translation API URL (handy for a local stub server).
+
+    :meth:`translate` and :meth:`translate_batch` go through *scheduler*
+    (default: the shared ``"translate_caller"`` backend scheduler), which
+    rate-limits them and retries throttled or transient failures; ``timeout``
+    bounds each attempt.  An attempt that times out raises
+    :class:`TranslateCallerTimeout` and is not retried, because the daemon
+    cannot cancel it.  :meth:`submit` sends exactly one request.
+    """
+
+    def __init__(self, command=None, endpoint=None, env=None, timeout=DEFAULT_TIMEOUT,
+                 max_restarts=3, restart_window=60.0, cwd=CALLER_DIR, scheduler=None):
+        if command is None:
+            binary = os.getenv("TRANSLATE_CALLER_BIN")
+            command = [binary, "-serve"] if binary else ["go", "run", "translate_caller.go", "-serve"]
+        self.command = list(command)
+        self.cwd = cwd
+        self.env = dict(os.environ if env is None else env)
+        if endpoint:
+            self.env["TRANSLATE_ENDPOINT"] = endpoint
+        self.timeout = timeout
+        self.max_restarts = max_restarts
+        self.restart_window = restart_window
+        self.scheduler = scheduler
+
+        self._proc = None
+        self._reader = None
+        self._pending = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._restarts = []
+        self._closed = False
+
+    def _ensure_process(self):
+        with self._lock:
+            if self._closed:
+                raise TranslateCallerError("client is closed")
+            if self._proc is not None and self._proc.poll() is None:
+                return self._proc
+
+            now = time.monotonic()
+            self._restarts = [t for t in self._restarts if now - t < self.restart_window]
+            if self._proc is not None:
+                if len(self._restarts) >= self.max_restarts:
+                    raise TranslateCallerError("translate_caller keeps exiting; giving up")
+                logging.warning("translate_caller 프로세스 재시작")
+            self._restarts.append(now)
+
+            proc = subprocess.Popen(
+                self.command,
+                cwd=self.cwd,
+                env=self.env,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+                encoding="utf-8",
+                bufsize=1,
+            )
+            self._proc = proc
+            self._reader = threading.Thread(
+                target=self._read_loop, args=(proc,), name="translate-caller-reader", daemon=True
+            )
+            self._reader.start()
+            return proc
+
+    def _read_loop(self, proc):
+        for line in proc.stdout:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                message = json.loads(line)
+            except ValueError:
+                logging.warning(f"translate_caller 응답 파싱 실패: {line[:200]}")
+                continue
+            if message.get("error") and not message.get("id"):
+                # 어느 요청의 오류인지 알 수 없으므로 이 프로세스에 보낸 요청을 모두 실패 처리한다.
+                logging.warning(f"translate_caller id 없는 오류: {message['error']}")
+                self._fail_pending(proc, message["error"])
+                continue
+            with self._lock:
+                future, _ = self._pending.pop(message.get("id"), (None, None))
+            if future is None:
+                continue
+            if message.get("error"):
+                future.set_exception(TranslateCallerError(message["error"]))
+            else:
+                future.set_result(message)
+
+        # 프로세스가 종료됨: 이 프로세스에 보낸 요청은 모두 실패 처리
+        self._fail_pending(proc, "translate_caller exited")
+
+    def _fail_pending(self, proc, reason):
+        with self._lock:
+            stranded = [key for key, (_, owner) in self._pending.items() if owner is proc]
+            futures = [self._pending.pop(key)[0] for key in stranded]
+        for future in futures:
+            future.set_exception(TranslateCallerError(reason))
+
+    def submit(self, request):
+        """Send *request* (a dict) and return a ``Future`` for the raw reply."""
+        proc = self._ensure_process()
+        request_id = str(next(self._ids))
+        future = Future()
+        with self._lock:
+            self._pending[request_id] = (future, proc)
+        payload = json.dumps(dict(request, id=request_id), ensure_ascii=False)
+        try:
+            with self._write_lock:
+                proc.stdin.write(payload + "\n")
+                proc.stdin.flush()
+        except (BrokenPipeError, OSError, ValueError) as exc:
+            with self._lock:
+                self._pending.pop(request_id, None)
+            future.set_exception(TranslateCallerError(f"translate_caller write failed: {exc}"))
+        return future
+
+    def _attempt(self, request, timeout):
+        future = self.submit(request)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            # 늦게 온 응답은 _read_loop 가 버린다.
+            with self._lock:
+                for key, (pending, _) in list(self._pending.items()):
+                    if pending is future:
+                        del self._pending[key]
+            raise TranslateCallerTimeout(
+                f"translate_caller did not reply within {timeout:g}s"
+            ) from None
+
+    def _request(self, request, chars, timeout):
+        scheduler = self.scheduler or get_scheduler(CALLER_BACKEND)
+        return scheduler.call(self._attempt, request, timeout or self.timeout, chars=chars)
+
+    def translate(self, text, source_lang, target_lang, timeout=None):
+        reply = self._request(
+            {"text": text, "source_lang": source_lang, "target_lang": target_lang},
+            len(text), timeout,
+        )
+        # 예전 데몬은 빈 번역이면 필드를 생략했다.
+        return reply.get("translated_text") or ""
+
+    def translate_batch(self, texts, source_lang, target_lang, timeout=None):
+        texts = list(texts)
+        if not texts:
+            return []
+        reply = self._request(
+            {"texts": texts, "source_lang": source_lang, "target_lang": target_lang},
+            sum(len(text) for text in texts), timeout,
+        )
+        translated = reply.get("translated_texts") or []
+        if len(translated) != len(texts):
+            raise TranslateCallerError(
+                f"translate_caller returned {len(translated)} translations for {len(texts)} texts"
+            )
+        return translated
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            proc = self._proc
+            self._proc = None
+        if proc is None:
+            return
+        try:
+            proc.stdin.close()
+            proc.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            proc.kill()
@@ -1,20 +1,292 @@
-from cache.cache_handler import TranslationCacheManager
+"""Cross-lingual translation memory stored as translation groups.
+
+A group holds every known variant of one sentence, one row per
+``(language, text)``.  Adding ``n`` variants writes ``n`` rows in one
+transaction, and "any known variant of this text in language X" is a single
+indexed self-join.  Lookups match on a normalized form of the text
+(NFKC, whitespace/line-break repair); case is kept, since "US" and "us" are
+different sentences.
+
+The flat ``translation_cache*.db`` shards written by earlier versions are
+imported by an explicit step: :meth:`CrossLingualCache.migrate_flat_cache` or
+``python -m core.translation_cache_crosslink migrate``.
+"""
+
+import argparse
 import logging
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+
+from core.script_detect import PageLanguageDetector
+from core.sqlite_store import open_cache_connection
+from core.utils_text import normalize_text
+
+DEFAULT_TARGET_LANG = "ko"
+DEFAULT_DB_NAME = "translation_groups.db"
+MIGRATION_BATCH = 5_000
+# 정규화 방식이 바뀌면 저장된 norm 열을 다시 계산한다 (v2: 대소문자 유지).
+NORM_VERSION = "2"
+# DocumentTranslator 의 영구 캐시 키 형식: "<원문 언어>><대상 언어>\t<문장>"
+_PERSISTENT_KEY = re.compile(r"\A([A-Za-z-]+)>([A-Za-z-]+)\t(.*)\Z", re.S)
+
+
+def normalize_key(text):
+    """Lookup form of *text*: NFKC and normalized whitespace (case is kept)."""
+    return normalize_text(unicodedata.normalize("NFKC", text))
+
+
+def _initialize_db(conn):
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS translation_groups (id INTEGER PRIMARY KEY, created REAL)"
+    )
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS group_variants ("
+        "group_id INTEGER NOT NULL, lang TEXT NOT NULL, norm TEXT NOT NULL, text TEXT NOT NULL, "
+        "UNIQUE (group_id, lang, norm))"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS group_variants_norm_lang ON group_variants (norm, lang)"
+    )
+    conn.execute("CREATE TABLE IF NOT EXISTS group_meta (name TEXT PRIMARY KEY, value TEXT)")
+    row = conn.execute("SELECT value FROM group_meta WHERE name = 'norm_version'").fetchone()
+    if row is None or row[0] != NORM_VERSION:
+        # 이전 버전은 대소문자를 접어 저장했으므로 원문에서 norm 을 다시 만든다.
+        rows = conn.execute("SELECT rowid, text FROM group_variants").fetchall()
+        conn.executemany(
+            "UPDATE group_variants SET norm = ? WHERE rowid = ?",
+            [(normalize_key(text), rowid) for rowid, text in rows],
+        )
+        conn.execute(
+            "INSERT OR REPLACE INTO group_meta (name, value) VALUES ('norm_version', ?)",
+            (NORM_VERSION,),
+        )
+    conn.commit()
+
 
 class CrossLingualCache:
-    def __init__(self, base_dir="cache", base_name="translation_cache"):
-        self.cache = TranslationCacheManager(base_dir=base_dir, base_name=base_name)
+    """Translation groups in ``<base_dir>/translation_groups.db``.
+
+    ``add_group({"en": "I love you", "zh-cn": "我爱你", "ko": "사랑해"})``
+    stores one group.  Only the source variants (``source``, default: the
+    first language of the dict) decide which existing group the new variants
+    join; a translation that happens to equal another group's translation
+    ("예." for both "Yes." and "Example.") never links the two groups.
+    ``lookup(text, "ko")`` returns the newest Korean variant of any group that
+    contains *text*.
+
+    Opening the cache does not import the flat ``<base_name>*.db`` shards;
+    call :meth:`migrate_flat_cache` (or the ``migrate`` command) once.
+    """
+
+    _FIND_GROUP_SQL = (
+        "SELECT group_id FROM group_variants WHERE norm = ? AND lang = ? "
+        "ORDER BY group_id DESC LIMIT 1"
+    )
+    _INSERT_SQL = (
+        "INSERT OR IGNORE INTO group_variants (group_id, lang, norm, text) VALUES (?, ?, ?, ?)"
+    )
+    _LOOKUP_SQL = (
+        "SELECT t.text FROM group_variants AS s "
+        "JOIN group_variants AS t ON t.group_id = s.group_id AND t.lang = ? "
+        "WHERE s.norm = ? ORDER BY t.rowid DESC LIMIT 1"
+    )
+    _LOOKUP_FROM_SQL = (
+        "SELECT t.text FROM group_variants AS s "
+        "JOIN group_variants AS t ON t.group_id = s.group_id AND t.lang = ? "
+        "WHERE s.norm = ? AND s.lang = ? ORDER BY t.rowid DESC LIMIT 1"
+    )
+    _VARIANTS_SQL = (
+        "SELECT t.lang, t.text FROM group_variants AS s "
+        "JOIN group_variants AS t ON t.group_id = s.group_id "
+        "WHERE s.norm = ? ORDER BY t.rowid"
+    )
+
+    def __init__(self, base_dir="cache", db_name=DEFAULT_DB_NAME):
+        self.base_dir = Path(base_dir)
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.base_dir / db_name
+        self.conn = open_cache_connection(self.db_path)
+        self._lock = threading.Lock()
+        with self._lock:
+            _initialize_db(self.conn)
+
+    def _add_variants(self, variants, source=None):
+        """Insert one group's variants; the caller holds the lock and the transaction."""
+        rows = [
+            (lang, normalize_key(text), text)
+            for lang, text in variants.items()
+            if lang and text and text.strip()
+        ]
+        if not rows:
+            return None
+        if source is None:
+            sources = [rows[0][0]]
+        else:
+            sources = [source] if isinstance(source, str) else list(source)
+        group_id = None
+        # 원문 변형으로만 기존 그룹을 찾는다.  번역문이 겹친다고 그룹을 잇거나 합치지 않는다.
+        for lang, norm, _ in rows:
+            if lang not in sources:
+                continue
+            row = self.conn.execute(self._FIND_GROUP_SQL, (norm, lang)).fetchone()
+            if row is not None:
+                group_id = row[0]
+                break
+        if group_id is None:
+            group_id = self.conn.execute(
+                "INSERT INTO translation_groups (created) VALUES (?)", (time.time(),)
+            ).lastrowid
+        self.conn.executemany(
+            self._INSERT_SQL, [(group_id, lang, norm, text) for lang, norm, text in rows]
+        )
+        return group_id
+
+    def add_group(self, variants, source=None):
+        """Store ``{lang: text}`` as one group in a single transaction; returns the group id.
 
-    def add_crosslinked(self, source_texts: dict, translated: str):
+        *source* names the source language(s); by default the first one in *variants*.
+        """
+        with self._lock, self.conn:
+            return self._add_variants(variants, source)
+
+    def add_groups(self, groups, source=None):
+        """Store many ``{lang: text}`` groups in one transaction; returns how many were stored."""
+        stored = 0
+        with self._lock, self.conn:
+            for variants in groups:
+                stored += self._add_variants(variants, source) is not None
+        return stored
+
+    def add_crosslinked(self, source_texts: dict, translated: str, target_lang=DEFAULT_TARGET_LANG):
         # source_texts 예시:
         # {"en": "I love you", "zh": "我爱你"}
         try:
-            for lang1, text1 in source_texts.items():
-                self.cache.add_entry(text1, translated)
-                for lang2, text2 in source_texts.items():
-                    if lang1 != lang2:
-                        # text1 -> translated -> text2 라고 간주하고 연결 저장
-                        self.cache.add_entry(text1, text2)
-                        self.cache.add_entry(text2, text1)
+            return self.add_group(
+                {**source_texts, target_lang: translated}, source=list(source_texts)
+            )
         except Exception as e:
-            logging.warning(f"교차 캐시 저장 실패: {e}")
\ No newline at end of file
+            logging.warning(f"교차 캐시 저장 실패: {e}")
+            return None
+
+    def lookup(self, text, target_lang, source_lang=None):
+        """Newest *target_lang* variant of a group containing *text*, or ``None``."""
+        norm = normalize_key(text)
+        with self._lock:
+            if source_lang is None:
+                row = self.conn.execute(self._LOOKUP_SQL, (target_lang, norm)).fetchone()
+            else:
+                row = self.conn.execute(
+                    self._LOOKUP_FROM_SQL, (target_lang, norm, source_lang)
+                ).fetchone()
+        return row[0] if row else None
+
+    def variants(self, text):
+        """``{lang: text}`` of every group containing *text* (newest variant per language)."""
+        with self._lock:
+            rows = self.conn.execute(self._VARIANTS_SQL, (normalize_key(text),)).fetchall()
+        return dict(rows)
+
+    def migrate_flat_cache(self, base_dir="cache", base_name="translation_cache",
+                           detect_language=None, batch_size=MIGRATION_BATCH):
+        """Import flat ``key -> value`` shards as two-variant groups.
+
+        Keys written by ``DocumentTranslator`` (``"en>ko\\t<sentence>"``)
+        carry both languages.  For other rows, which include the pairwise
+        entries of the old ``add_crosslinked``, the languages are detected
+        with ``detect_language`` (script ranges first, then
+        ``detect_language_safe``); rows whose languages cannot be told are
+        skipped.  Each shard is imported once and recorded in ``group_meta``.
+        Returns the number of groups stored.
+        """
+        paths = sorted(Path(base_dir).glob(f"{base_name}*.db"))
+        paths = [path for path in paths if path.resolve() != self.db_path.resolve()]
+        if not paths:
+            return 0
+        detector = None
+        stored = 0
+        for path in paths:
+            marker = f"migrated:{path.resolve()}"
+            with self._lock:
+                if self.conn.execute(
+                    "SELECT 1 FROM group_meta WHERE name = ?", (marker,)
+                ).fetchone():
+                    continue
+            if detector is None:
+                detector = PageLanguageDetector(detect_language or _default_detector())
+            stored += self._migrate_shard(path, marker, detector, batch_size)
+        if stored:
+            logging.info(f"{base_name}: {stored}개 항목을 번역 그룹으로 이전")
+        return stored
+
+    def _migrate_shard(self, path, marker, detector, batch_size):
+        source = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        stored = 0
+        try:
+            try:
+                cursor = source.execute("SELECT key, value FROM cache")
+            except sqlite3.DatabaseError as e:
+                logging.warning(f"{path.name}: 이전할 수 없는 캐시 파일 ({e})")
+                return 0
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                groups = [_group_from_row(key, value, detector) for key, value in rows]
+                stored += self.add_groups(group for group in groups if group)
+        finally:
+            source.close()
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO group_meta (name, value) VALUES (?, ?)",
+                (marker, str(time.time())),
+            )
+        return stored
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+def _default_detector():
+    try:
+        from core.lang_utils import detect_language_safe
+    except ImportError:
+        # 통계 감지기가 없으면 라틴 문자 행은 언어를 알 수 없어 건너뛴다.
+        return lambda text: None
+    return detect_language_safe
+
+
+def _group_from_row(key, value, detector):
+    if not key or not value:
+        return None
+    match = _PERSISTENT_KEY.match(key)
+    if match:
+        source_lang, target_lang, sentence = match.groups()
+        variants = {source_lang: sentence, target_lang: value}
+    else:
+        key_lang, value_lang = detector.detect(key), detector.detect(value)
+        if not key_lang or not value_lang:
+            return None
+        variants = {key_lang: key, value_lang: value}
+    # 같은 언어로 판정된 두 텍스트는 번역 관계인지 알 수 없으므로 건너뛴다.
+    return variants if len(variants) == 2 else None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cross-lingual translation group tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    migrate = sub.add_parser("migrate", help="import flat translation_cache*.db shards")
+    migrate.add_argument("--base-dir", default="cache")
+    migrate.add_argument("--base-name", default="translation_cache")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    cache = CrossLingualCache(args.base_dir)
+    try:
+        cache.migrate_flat_cache(args.base_dir, args.base_name)
+    finally:
+        cache.close()
@@ -0,0 +1,167 @@
+"""Text normalization and sentence segmentation for OCR output.
+
+``normalize_text`` repairs the usual OCR line-layout damage in one pass over
+precompiled patterns: ``\\r\\n`` line endings, words hyphenated across lines,
+line breaks inside CJK text and runs of whitespace.  ``split_into_sentences``
+and the streaming ``iter_sentences`` cut normalized text at CJK and Latin
+sentence ends.
+
+``refine_many`` / ``segment_many`` process a list of texts per call through
+the Rust ``fast_text_refiner`` extension when it is built, and through the
+pure-Python implementation below otherwise; both give identical output.
+``estimate_tokens`` is the rough prompt-size estimate shared by the LLM
+stages.
+"""
+
+import re
+
+try:
+    import fast_text_refiner as _native
+    if not hasattr(_native, "segment_many"):
+        _native = None
+except ImportError:
+    _native = None
+
+# str.isspace() 와 같은 공백 문자 집합 (Rust 구현과 글자 단위로 일치시킨다)
+WHITESPACE = (
+    "\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f \x85\xa0\u1680"
+    "\u2000\u2001\u2002\u2003\u2004\u2005\u2006\u2007\u2008\u2009\u200a"
+    "\u2028\u2029\u202f\u205f\u3000"
+)
+# 줄바꿈을 공백 없이 이어 붙이는 한중일 문자 (한글은 띄어쓰기를 하므로 제외)
+_CJK_CLASS = (
+    "\u2e80-\u2fff\u3001-\u303f\u3040-\u30ff\u3100-\u312f\u31a0-\u31ff"
+    "\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uff01-\uff9f"
+)
+_WS_CLASS = re.escape(WHITESPACE)
+_CJK_STOPS = "\u3002\uff01\uff1f"
+_TERMINATORS = ".!?\u3002\uff01\uff1f\u2026"
+_CLOSERS = "\"')]}\u201d\u2019\u300d\u300f\uff09\u3011\u3015\u300b\u3009"
+# 뒤에 마침표가 와도 문장이 끝나지 않는 약어 (소문자, 마지막 마침표 제외)
+ABBREVIATIONS = frozenset(
+    "al approx cf co dept dr e.g etc fig i.e inc jr ltd mr mrs ms no p pp prof sr st vol vs".split()
+)
+
+# 정규화/문장 분리 규칙이 바뀌면 올린다 (작업 저널이 새로 시작된다).
+SEGMENTER_VERSION = "text-v1"
+
+_LINE_ENDINGS = re.compile(r"\r\n?")
+_HYPHEN_BREAK = re.compile(r"(?<=[A-Za-z])-[ \t]*\n[ \t]*(?=[a-z])")
+_CJK_GAP = re.compile(f"(?<=[{_CJK_CLASS}])[{_WS_CLASS}]+(?=[{_CJK_CLASS}])")
+_WS_RUN = re.compile(f"[{_WS_CLASS}]+")
+_CJK_CHAR = re.compile(f"[{_CJK_CLASS}]")
+_TERMINATOR_RUN = re.compile(f"[{re.escape(_TERMINATORS)}]+[{re.escape(_CLOSERS)}]*")
+_ABBREV_CHARS = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ.")
+# 토큰 추정에서 한 글자를 한 토큰으로 세는 문자 (가나, 한자, 한글)
+_TOKEN_CJK = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]")
+
+
+def normalize_text(text):
+    """Fix line endings, hyphenation, CJK line joins and whitespace runs."""
+    text = _LINE_ENDINGS.sub("\n", text)
+    text = _HYPHEN_BREAK.sub("", text)
+    text = _CJK_GAP.sub("", text)
+    return _WS_RUN.sub(" ", text).strip(WHITESPACE)
+
+
+def _is_boundary(text, match, sentence_start):
+    # 문장 시작 앞의 글자는 보지 않는다 (스트리밍 결과와 일치시키기 위해).
+    start, end = match.span()
+    run = match.group().rstrip(_CLOSERS)
+    if any(ch in _CJK_STOPS for ch in run) or (
+        start > sentence_start and _CJK_CHAR.match(text, start - 1)
+    ):
+        return True
+    if end >= len(text):
+        return True
+    if text[end] != " ":
+        return False
+    following = text[end + 1:end + 2]
+    if "a" <= following <= "z":
+        return False
+    if run == ".":
+        word_start = start
+        while word_start > sentence_start and text[word_start - 1] in _ABBREV_CHARS:
+            word_start -= 1
+        word = text[word_start:start]
+        if word.lower() in ABBREVIATIONS or (len(word) == 1 and word.isupper()):
+            return False
+    return True
+
+
+def _sentence_spans(normalized):
+    """``(start, end)`` of every sentence in *normalized*, surrounding spaces excluded."""
+    spans = []
+    position = 0
+    for match in _TERMINATOR_RUN.finditer(normalized):
+        if _is_boundary(normalized, match, position):
+            spans.append(_trimmed(normalized, position, match.end()))
+            position = match.end()
+    spans.append(_trimmed(normalized, position, len(normalized)))
+    return [(start, end) for start, end in spans if start < end]
+
+
+def _trimmed(text, start, end):
+    while start < end and text[start] == " ":
+        start += 1
+    while end > start and text[end - 1] == " ":
+        end -= 1
+    return start, end
+
+
+def _segment(normalized):
+    return [normalized[start:end] for start, end in _sentence_spans(normalized)]
+
+
+def split_into_sentences(text):
+    """Normalize *text* and split it into sentences."""
+    return _segment(normalize_text(text))
+
+
+def iter_sentences(chunks):
+    """Yield sentences from an iterable of text chunks (e.g. OCR lines) as they complete.
+
+    Chunks are joined with line breaks; the output equals
+    ``split_into_sentences("\\n".join(chunks))``.  A single string is treated
+    as one chunk.
+    """
+    if isinstance(chunks, str):
+        chunks = (chunks,)
+    pending = None
+    trailing = ""
+    for chunk in chunks:
+        # 정규화로 잘려 나간 끝 공백은 하이픈/줄바꿈 복원에 필요하므로 따로 들고 간다.
+        raw = chunk if pending is None else f"{pending}{trailing}\n{chunk}"
+        trailing = raw[len(raw.rstrip(WHITESPACE)):]
+        pending = normalize_text(raw)
+        spans = _sentence_spans(pending)
+        # 마지막 조각은 다음 청크와 이어질 수 있으므로 붙잡아 둔다.
+        for start, end in spans[:-1]:
+            yield pending[start:end]
+        pending = pending[spans[-1][0]:] if spans else ""
+    if pending:
+        yield from _segment(pending)
+
+
+def refine_many(texts):
+    """:func:`normalize_text` for a list of texts, in one native call when available."""
+    texts = list(texts)
+    if _native is not None:
+        return _native.refine_many(texts)
+    return [normalize_text(text) for text in texts]
+
+
+def segment_many(texts):
+    """:func:`split_into_sentences` for a list of texts, in one native call when available."""
+    texts = list(texts)
+    if _native is not None:
+        return _native.segment_many(texts)
+    return [split_into_sentences(text) for text in texts]
+
+
+def estimate_tokens(text):
+    """Rough token count: one per CJK/Hangul character, one per four other characters."""
+    if not text:
+        return 0
+    cjk = len(_TOKEN_CJK.findall(text))
+    return cjk + -(-(len(text) - cjk) // 4)
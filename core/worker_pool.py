@@ -0,0 +1,119 @@
+"""Process-wide OCR worker pool.
+
+Starting a ``multiprocessing.Pool`` costs one process start per worker plus
+the OCR imports inside each of them.  :func:`get_ocr_pool` pays that once per
+process: the pool is created on first use, warmed (every worker has run
+:func:`~core.document_engine.init_ocr_worker` before the first page is
+queued) and handed to every later document.  Documents submit each page as
+its own task (see :func:`core.pipeline.run_page_pipeline`), so documents
+translated at the same time share the workers.  It is shut down at exit.
+
+The size comes from the caller, ``OCR_TRANSLATE_POOL_SIZE`` or
+``min(cpu_count(), 6)``.  ``OCR_TRANSLATE_POOL_START`` (or ``start_method``)
+picks the multiprocessing start method; with ``forkserver`` the OCR modules
+are imported once in the server and every worker is forked from it already
+loaded, which avoids both re-importing them per worker (``spawn``) and
+forking a threaded GUI process (``fork``).
+"""
+
+import atexit
+import logging
+import multiprocessing
+import os
+import threading
+import time
+
+POOL_SIZE_ENV = "OCR_TRANSLATE_POOL_SIZE"
+POOL_START_ENV = "OCR_TRANSLATE_POOL_START"
+MAX_DEFAULT_POOL_SIZE = 6
+# 예열 때 워커가 모두 모이기를 기다리는 최대 시간 (초)
+WARM_TIMEOUT = 120.0
+# forkserver 가 미리 불러 둘 모듈 (설치되지 않은 모듈은 건너뛴다)
+PRELOAD_MODULES = ("core.document_engine", "pytesseract", "PIL.Image")
+
+_lock = threading.Lock()
+# 크기별로 하나씩 둔다. 다른 문서가 쓰는 풀을 크기가 다르다는 이유로 닫지 않는다.
+_pools = {}
+
+
+def default_pool_size():
+    value = os.getenv(POOL_SIZE_ENV)
+    if value:
+        return max(1, int(value))
+    return min(multiprocessing.cpu_count(), MAX_DEFAULT_POOL_SIZE)
+
+
+# 워커 프로세스마다 받는 예열용 배리어
+_warm_barrier = None
+
+
+def _init_worker(cache_enabled, barrier):
+    global _warm_barrier
+    from core.document_engine import init_ocr_worker
+
+    _warm_barrier = barrier
+    init_ocr_worker(cache_enabled)
+
+
+def _worker_ready(_):
+    # 모든 워커가 여기 모일 때까지 붙잡아 두어, 한 워커가 예열 작업을 여러 개 가져가지 못하게 한다.
+    _warm_barrier.wait(WARM_TIMEOUT)
+    return os.getpid()
+
+
+def create_ocr_pool(size=None, cache_enabled=True, start_method=None, warm=True):
+    """A new OCR pool; with *warm*, return only after every worker has initialized.
+
+    Warming sends one task per worker and each task waits at a barrier until
+    all *size* workers hold one, so no worker is left uninitialized.
+    """
+    size = size or default_pool_size()
+    context = multiprocessing.get_context(start_method or os.getenv(POOL_START_ENV) or None)
+    if context.get_start_method() == "forkserver":
+        context.set_forkserver_preload(list(PRELOAD_MODULES))
+    started = time.perf_counter()
+    barrier = context.Barrier(size)
+    pool = context.Pool(size, initializer=_init_worker, initargs=(cache_enabled, barrier))
+    if warm:
+        try:
+            pids = pool.map(_worker_ready, range(size), chunksize=1)
+        except threading.BrokenBarrierError:
+            # 워커가 제때 모이지 못해도 풀은 쓸 수 있다. 남은 워커는 첫 작업 때 초기화된다.
+            logging.warning(f"OCR 워커 풀 예열 시간 초과 ({WARM_TIMEOUT:.0f}초)")
+        else:
+            logging.info(
+                f"OCR 워커 풀 준비 ({len(set(pids))}개, {context.get_start_method()}): "
+                f"{time.perf_counter() - started:.2f}초"
+            )
+    return pool
+
+
+def get_ocr_pool(size=None, cache_enabled=True, start_method=None):
+    """The process-wide OCR pool of *size* workers, created and warmed on first use.
+
+    *cache_enabled* and *start_method* only apply when the pool is created;
+    workers of a pool created without the OCR cache open it on the first
+    task that asks for it.
+    """
+    size = size or default_pool_size()
+    with _lock:
+        pool = _pools.get(size)
+        if pool is None:
+            pool = _pools[size] = create_ocr_pool(size, cache_enabled, start_method)
+        return pool
+
+
+def shutdown_ocr_pools(wait=True):
+    """Close the shared pools; without *wait*, running OCR tasks are killed."""
+    with _lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        if wait:
+            pool.close()
+            pool.join()
+        else:
+            pool.terminate()
+
+
+atexit.register(shutdown_ocr_pools, False)
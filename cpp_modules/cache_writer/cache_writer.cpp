@@ -1,17 +1,27 @@
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h>
 #include <sqlite3.h>
+#include <stdexcept>
 #include <string>
+#include <tuple>
+#include <vector>
 
 namespace py = pybind11;
 
+static const char* kCreateSql =
+    "CREATE TABLE IF NOT EXISTS translations ("
+    "source_text TEXT NOT NULL, target_text TEXT, lang_pair TEXT NOT NULL, "
+    "UNIQUE (source_text, lang_pair));";
+static const char* kInsertSql =
+    "INSERT OR IGNORE INTO translations (source_text, target_text, lang_pair) VALUES (?, ?, ?);";
+
 bool insert_translation(const std::string& db_path,
                         const std::string& source_text,
                         const std::string& target_text,
                         const std::string& lang_pair) {
     sqlite3* db;
     sqlite3_stmt* stmt;
-    std::string sql = "INSERT OR IGNORE INTO translations (source_text, target_text, lang_pair) VALUES (?, ?, ?);";
+    std::string sql = kInsertSql;
 
     if (sqlite3_open(db_path.c_str(), &db) != SQLITE_OK) {
         return false;
@@ -34,6 +44,124 @@ bool insert_translation(const std::string& db_path,
     return success;
 }
 
+using TranslationRow = std::tuple<std::string, std::string, std::string>;
+
+// 연결과 준비된 INSERT 문을 열어 둔 채 재사용하는 기록기.
+// insert_batch 한 번이 트랜잭션 하나(= fsync 한 번)에 해당한다.
+class CacheWriter {
+public:
+    explicit CacheWriter(const std::string& db_path) {
+        if (sqlite3_open(db_path.c_str(), &db_) != SQLITE_OK) {
+            std::string msg = db_ ? sqlite3_errmsg(db_) : "out of memory";
+            sqlite3_close(db_);
+            db_ = nullptr;
+            throw std::runtime_error("cannot open " + db_path + ": " + msg);
+        }
+        exec("PRAGMA journal_mode=WAL;");
+        exec("PRAGMA synchronous=NORMAL;");
+        exec(kCreateSql);
+        if (sqlite3_prepare_v2(db_, kInsertSql, -1, &insert_stmt_, nullptr) != SQLITE_OK) {
+            std::string msg = sqlite3_errmsg(db_);
+            close();
+            throw std::runtime_error("cannot prepare insert: " + msg);
+        }
+    }
+
+    ~CacheWriter() { close(); }
+
+    CacheWriter(const CacheWriter&) = delete;
+    CacheWriter& operator=(const CacheWriter&) = delete;
+
+    bool insert(const std::string& source_text,
+                const std::string& target_text,
+                const std::string& lang_pair) {
+        return insert_batch({TranslationRow(source_text, target_text, lang_pair)}) == 1;
+    }
+
+    // 새로 추가된 행 수를 반환한다. 실패하면 전체 배치를 롤백하고 예외를 던진다.
+    int insert_batch(const std::vector<TranslationRow>& rows) {
+        ensure_open();
+        if (rows.empty()) {
+            return 0;
+        }
+
+        int inserted = 0;
+        std::string error;
+        {
+            py::gil_scoped_release release;
+            if (sqlite3_exec(db_, "BEGIN IMMEDIATE;", nullptr, nullptr, nullptr) != SQLITE_OK) {
+                error = sqlite3_errmsg(db_);
+            } else {
+                for (const auto& row : rows) {
+                    sqlite3_reset(insert_stmt_);
+                    sqlite3_bind_text(insert_stmt_, 1, std::get<0>(row).c_str(), -1, SQLITE_STATIC);
+                    sqlite3_bind_text(insert_stmt_, 2, std::get<1>(row).c_str(), -1, SQLITE_STATIC);
+                    sqlite3_bind_text(insert_stmt_, 3, std::get<2>(row).c_str(), -1, SQLITE_STATIC);
+                    if (sqlite3_step(insert_stmt_) != SQLITE_DONE) {
+                        error = sqlite3_errmsg(db_);
+                        break;
+                    }
+                    inserted += sqlite3_changes(db_);
+                }
+                sqlite3_reset(insert_stmt_);
+                sqlite3_clear_bindings(insert_stmt_);
+                const char* finish = error.empty() ? "COMMIT;" : "ROLLBACK;";
+                if (sqlite3_exec(db_, finish, nullptr, nullptr, nullptr) != SQLITE_OK && error.empty()) {
+                    error = sqlite3_errmsg(db_);
+                    sqlite3_exec(db_, "ROLLBACK;", nullptr, nullptr, nullptr);
+                }
+            }
+        }
+        if (!error.empty()) {
+            throw std::runtime_error("insert_batch failed: " + error);
+        }
+        return inserted;
+    }
+
+    void close() {
+        if (insert_stmt_) {
+            sqlite3_finalize(insert_stmt_);
+            insert_stmt_ = nullptr;
+        }
+        if (db_) {
+            sqlite3_close(db_);
+            db_ = nullptr;
+        }
+    }
+
+private:
+    void exec(const char* sql) {
+        char* err = nullptr;
+        if (sqlite3_exec(db_, sql, nullptr, nullptr, &err) != SQLITE_OK) {
+            std::string msg = err ? err : "unknown error";
+            sqlite3_free(err);
+            close();
+            throw std::runtime_error(msg);
+        }
+    }
+
+    void ensure_open() const {
+        if (!db_) {
+            throw std::runtime_error("CacheWriter is closed");
+        }
+    }
+
+    sqlite3* db_ = nullptr;
+    sqlite3_stmt* insert_stmt_ = nullptr;
+};
+
 PYBIND11_MODULE(cache_writer, m) {
     m.def("insert_translation", &insert_translation, "Insert translation into SQLite cache");
-}
\ No newline at end of file
+
+    py::class_<CacheWriter>(m, "CacheWriter")
+        .def(py::init<const std::string&>(), py::arg("db_path"))
+        .def("insert", &CacheWriter::insert,
+             py::arg("source_text"), py::arg("target_text"), py::arg("lang_pair"),
+             "Insert one translation (one transaction)")
+        .def("insert_batch", &CacheWriter::insert_batch, py::arg("rows"),
+             "Insert (source_text, target_text, lang_pair) tuples in a single transaction")
+        .def("close", &CacheWriter::close)
+        .def("__enter__", [](CacheWriter& self) -> CacheWriter& { return self; },
+             py::return_value_policy::reference)
+        .def("__exit__", [](CacheWriter& self, py::object, py::object, py::object) { self.close(); });
+}
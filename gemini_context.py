@@ -0,0 +1,137 @@
+import re
+from collections import Counter, OrderedDict, deque
+
+from core.utils_text import estimate_tokens
+
+# 프롬프트에 넣는 이전 번역 맥락의 기본 예산 (추정 토큰)
+DEFAULT_CONTEXT_TOKENS = 1500
+DEFAULT_GLOSSARY_TOKENS = 400
+DEFAULT_MAX_PAIRS = 24
+# 이 길이 이하의 원문이 반복되면 용어(인명, 제목 등)로 보고 용어집으로 옮긴다.
+DEFAULT_TERM_MAX_CHARS = 12
+DEFAULT_TERM_MIN_COUNT = 2
+
+_SPACES = re.compile(r"\s+")
+
+
+def _normalize(text):
+    return _SPACES.sub(" ", (text or "").strip())
+
+
+class RollingContext:
+    """Bounded translation memory that is fed back into Gemini prompts.
+
+    The rendered context is ``glossary`` followed by the most recent
+    source/target pairs, kept under ``max_tokens`` in total.  Repeated sources
+    are kept once, and short sources that recurred are promoted to the
+    glossary when they fall out of the window.  When the window overflows, the oldest
+    half is evicted in one step rather than one pair per call.  The rendered
+    prefix therefore stays byte-identical across consecutive calls and can be
+    reused by prompt caching.
+    """
+
+    def __init__(self, max_tokens=DEFAULT_CONTEXT_TOKENS, glossary_tokens=DEFAULT_GLOSSARY_TOKENS,
+                 max_pairs=DEFAULT_MAX_PAIRS, term_max_chars=DEFAULT_TERM_MAX_CHARS,
+                 term_min_count=DEFAULT_TERM_MIN_COUNT, history=200):
+        self.max_tokens = max_tokens
+        self.glossary_tokens = min(glossary_tokens, max_tokens)
+        self.max_pairs = max_pairs
+        self.term_max_chars = term_max_chars
+        self.term_min_count = term_min_count
+        self.glossary = OrderedDict()
+        self.pairs = OrderedDict()
+        self._seen = Counter()
+        self._glossary_size = 0
+        self._pairs_size = 0
+        self._rendered = None
+        self.prompt_sizes = deque(maxlen=history)
+
+    # --- 맥락 갱신 ---
+    def add_term(self, source, target):
+        """Pin a glossary entry; the oldest terms are dropped once over budget."""
+        source, target = _normalize(source), _normalize(target)
+        if not source or not target or self.glossary.get(source) == target:
+            return
+        if source in self.glossary:
+            self._glossary_size -= self._line_tokens(source, self.glossary.pop(source))
+        self.glossary[source] = target
+        self._glossary_size += self._line_tokens(source, target)
+        while self._glossary_size > self.glossary_tokens and self.glossary:
+            old_source, old_target = self.glossary.popitem(last=False)
+            self._glossary_size -= self._line_tokens(old_source, old_target)
+        self._rendered = None
+
+    def add(self, source, target):
+        """Record a finished translation."""
+        source, target = _normalize(source), _normalize(target)
+        if not source or not target or source in self.glossary:
+            return
+        # 반복 횟수는 맥락에 있는 원문만 센다.  _seen 의 키가 pairs 를 넘지 않아
+        # 받아들이지 않은 긴 문단이 카운터에 쌓이지 않는다.
+        if source in self.pairs:
+            # 이미 있는 원문은 위치를 옮기지 않는다 (중복 제거 + 접두부 유지, 첫 번역을 기준으로 삼음).
+            self._seen[source] += 1
+            return
+        size = self._line_tokens(source, target)
+        if size > self.max_tokens - self.glossary_tokens:
+            # 창 하나를 통째로 차지하는 긴 문단은 맥락으로 쓰지 않는다.
+            return
+        self._seen[source] += 1
+        self.pairs[source] = target
+        self._pairs_size += size
+        self._rendered = None
+        if len(self.pairs) > self.max_pairs or self._pairs_size > self.max_tokens - self._glossary_size:
+            self._compact()
+
+    def _compact(self):
+        # 오래된 절반을 한 번에 내보내 접두부가 자주 바뀌지 않게 한다.
+        budget = self.max_tokens - self._glossary_size
+        keep_pairs = self.max_pairs // 2
+        while self.pairs and (len(self.pairs) > keep_pairs or self._pairs_size > budget // 2):
+            source, target = self.pairs.popitem(last=False)
+            self._pairs_size -= self._line_tokens(source, target)
+            if len(source) <= self.term_max_chars and self._seen[source] >= self.term_min_count:
+                self.add_term(source, target)
+        # 맥락에 남은 원문의 반복 횟수만 유지해 카운터가 무한히 커지지 않게 한다.
+        self._seen = Counter({s: c for s, c in self._seen.items() if s in self.pairs})
+        self._rendered = None
+
+    @staticmethod
+    def _line_tokens(source, target):
+        return estimate_tokens(source) + estimate_tokens(target) + 2
+
+    # --- 프롬프트 구성 ---
+    def render(self):
+        """Return the context block; new pairs only ever extend it until the next compaction."""
+        if self._rendered is None:
+            parts = []
+            if self.glossary:
+                parts.append("[용어집]")
+                parts.extend(f"{s} => {t}" for s, t in self.glossary.items())
+            if self.pairs:
+                parts.append("[이전 번역]")
+                parts.extend(f"{s} => {t}" for s, t in self.pairs.items())
+            self._rendered = "\n".join(parts) + "\n\n" if parts else ""
+        return self._rendered
+
+    @property
+    def tokens(self):
+        return self._glossary_size + self._pairs_size
+
+    def build_prompt(self, instruction, query):
+        """Compose ``instruction + context + query`` and record its estimated size."""
+        prompt = f"{instruction}\n\n{self.render()}{query}"
+        self.prompt_sizes.append(estimate_tokens(prompt))
+        return prompt
+
+    def stats(self):
+        sizes = list(self.prompt_sizes)
+        return {
+            "calls": len(sizes),
+            "last_prompt_tokens": sizes[-1] if sizes else 0,
+            "max_prompt_tokens": max(sizes) if sizes else 0,
+            "mean_prompt_tokens": round(sum(sizes) / len(sizes), 1) if sizes else 0.0,
+            "context_tokens": self.tokens,
+            "glossary_terms": len(self.glossary),
+            "window_pairs": len(self.pairs),
+        }
@@ -1,33 +1,277 @@
-import google.generativeai as genai
+import io
+import json
+import logging
+
 import PIL.Image
 
+from core.rate_limiter import GEMINI_BACKEND, get_scheduler
+from core.utils_text import estimate_tokens
+
+# 모바일 데이터 환경을 위한 업로드 예산 기본값
+DEFAULT_MAX_SIDE = 1600          # 긴 변 기준 최대 픽셀
+DEFAULT_JPEG_QUALITY = 70
+MIN_JPEG_QUALITY = 35
+DEFAULT_MAX_BATCH_IMAGES = 6
+DEFAULT_MAX_BATCH_BYTES = 1_500_000
+DEFAULT_MAX_BATCH_TOKENS = 6_000
+DEFAULT_MAX_BATCH_CHARS = 4_000
+
+# Gemini 는 384px 이하 이미지를 258 토큰, 그보다 크면 768px 타일마다 258 토큰으로 센다.
+_IMAGE_TILE = 768
+_TOKENS_PER_TILE = 258
+
+OCR_BATCH_PROMPT = (
+    "아래 [page N] 표시 뒤에 오는 각 이미지 속의 모든 중국어를 찾아서 한국어로 번역해줘. "
+    "의역은 오역과 같으니 최대한 원문 그대로 번역해. "
+    '결과는 {"pages": [{"page": N, "text": "번역문"}]} 형식의 JSON 으로만 출력하고, '
+    "모든 페이지를 빠짐없이 포함해."
+)
+TRANSLATE_BATCH_PROMPT = (
+    "다음 JSON 배열의 중국어 문장을 각각 한국어로 번역해. "
+    "입력과 같은 길이, 같은 순서의 JSON 문자열 배열로만 출력해."
+)
+
+
+def estimate_image_tokens(width, height):
+    """Approximate the prompt tokens Gemini charges for one image."""
+    if width <= 384 and height <= 384:
+        return _TOKENS_PER_TILE
+    tiles_x = -(-width // _IMAGE_TILE)
+    tiles_y = -(-height // _IMAGE_TILE)
+    return tiles_x * tiles_y * _TOKENS_PER_TILE
+
+
+class PreparedImage:
+    """A page image downscaled and re-encoded for upload."""
+
+    def __init__(self, data, width, height, mime_type="image/jpeg"):
+        self.data = data
+        self.width = width
+        self.height = height
+        self.mime_type = mime_type
+
+    @property
+    def size(self):
+        return len(self.data)
+
+    @property
+    def tokens(self):
+        return estimate_image_tokens(self.width, self.height)
+
+    def as_part(self):
+        return {"mime_type": self.mime_type, "data": self.data}
+
+
+def prepare_image(image, max_side=DEFAULT_MAX_SIDE, grayscale=True,
+                  quality=DEFAULT_JPEG_QUALITY, max_bytes=None):
+    """Downscale, optionally grayscale and JPEG-encode *image*.
+
+    *image* may be a path, raw bytes or a ``PIL.Image``.  When ``max_bytes`` is
+    given the quality (and then the size) is lowered until the encoding fits.
+    """
+    if isinstance(image, (bytes, bytearray)):
+        image = PIL.Image.open(io.BytesIO(image))
+    elif not isinstance(image, PIL.Image.Image):
+        image = PIL.Image.open(image)
+    image = image.convert("L" if grayscale else "RGB")
+    if max(image.size) > max_side:
+        image.thumbnail((max_side, max_side), PIL.Image.LANCZOS)
+
+    while True:
+        buffer = io.BytesIO()
+        image.save(buffer, format="JPEG", quality=quality, optimize=True)
+        data = buffer.getvalue()
+        if max_bytes is None or len(data) <= max_bytes:
+            break
+        if quality > MIN_JPEG_QUALITY:
+            quality = max(MIN_JPEG_QUALITY, quality - 10)
+        elif max(image.size) > 512:
+            image = image.resize((image.width * 3 // 4, image.height * 3 // 4), PIL.Image.LANCZOS)
+        else:
+            # 더 줄이면 글자를 읽을 수 없으므로 예산을 넘더라도 단독 요청으로 보낸다.
+            break
+    return PreparedImage(data, image.width, image.height)
+
+
+def pack_images(images, max_images=DEFAULT_MAX_BATCH_IMAGES, max_bytes=DEFAULT_MAX_BATCH_BYTES,
+                max_tokens=DEFAULT_MAX_BATCH_TOKENS):
+    """Greedily group ``(index, PreparedImage)`` pairs under the request budgets."""
+    batch, batch_bytes, batch_tokens = [], 0, 0
+    for index, prepared in images:
+        if batch and (
+            len(batch) >= max_images
+            or batch_bytes + prepared.size > max_bytes
+            or batch_tokens + prepared.tokens > max_tokens
+        ):
+            yield batch
+            batch, batch_bytes, batch_tokens = [], 0, 0
+        batch.append((index, prepared))
+        batch_bytes += prepared.size
+        batch_tokens += prepared.tokens
+    if batch:
+        yield batch
+
+
+def _parse_json(text):
+    text = (text or "").strip()
+    if text.startswith("```"):
+        text = text.strip("`")
+        text = text[text.find("\n") + 1:] if "\n" in text else ""
+    return json.loads(text)
+
+
 class GeminiOCRTranslate:
-    def __init__(self, api_key):
-        # 1. API 설정
-        genai.configure(api_key=api_key)
-        # 2. Gemini 3 Flash 모델 선택
-        self.model = genai.GenerativeModel('gemini-3-flash')
+    def __init__(self, api_key=None, model=None, model_name='gemini-3-flash',
+                 max_side=DEFAULT_MAX_SIDE, jpeg_quality=DEFAULT_JPEG_QUALITY, grayscale=True,
+                 max_batch_images=DEFAULT_MAX_BATCH_IMAGES, max_batch_bytes=DEFAULT_MAX_BATCH_BYTES,
+                 max_batch_tokens=DEFAULT_MAX_BATCH_TOKENS, max_batch_chars=DEFAULT_MAX_BATCH_CHARS,
+                 context=None, scheduler=None):
+        if model is None:
+            import google.generativeai as genai
+
+            # 1. API 설정
+            genai.configure(api_key=api_key)
+            # 2. Gemini 3 Flash 모델 선택
+            model = genai.GenerativeModel(model_name)
+        # generate_content(contents, generation_config=...) 만 있으면 되므로 테스트용 가짜 모델도 주입할 수 있다.
+        self.model = model
+        self.max_side = max_side
+        self.jpeg_quality = jpeg_quality
+        self.grayscale = grayscale
+        self.max_batch_images = max_batch_images
+        self.max_batch_bytes = max_batch_bytes
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_chars = max_batch_chars
+        # 이전 번역 맥락 (gemini_context.RollingContext). 없으면 매 호출이 독립적이다.
+        self.context = context
+        # 요청 한도와 429/5xx 재시도 (core.rate_limiter). 없으면 프로세스 공용 "gemini" 스케줄러.
+        self.scheduler = scheduler
+        self.stats = {
+            "requests": 0, "images": 0, "upload_bytes": 0, "fallbacks": 0, "last_prompt_tokens": 0,
+        }
+
+    def _prompt(self, instruction, query=""):
+        if self.context is not None:
+            prompt = self.context.build_prompt(instruction, query)
+        else:
+            prompt = f"{instruction} {query}" if query else instruction
+        self.stats["last_prompt_tokens"] = estimate_tokens(prompt)
+        logging.debug(f"Gemini 프롬프트 크기: 약 {self.stats['last_prompt_tokens']} 토큰")
+        return prompt
+
+    def _generate(self, contents, json_output=False):
+        self.stats["requests"] += 1
+        scheduler = self.scheduler or get_scheduler(GEMINI_BACKEND)
+        parts = [contents] if isinstance(contents, str) else contents
+        chars = sum(len(part) for part in parts if isinstance(part, str))
+        if json_output:
+            response = scheduler.call(
+                self.model.generate_content, contents,
+                generation_config={"response_mime_type": "application/json"}, chars=chars,
+            )
+        else:
+            response = scheduler.call(self.model.generate_content, contents, chars=chars)
+        return response.text
+
+    def prepare(self, image):
+        return prepare_image(
+            image,
+            max_side=self.max_side,
+            grayscale=self.grayscale,
+            quality=self.jpeg_quality,
+            max_bytes=self.max_batch_bytes,
+        )
 
     def process_all(self, image_path):
         """이미지를 읽어서 텍스트 추출과 번역을 한 번에 수행"""
-        img = PIL.Image.open(image_path)
-        
+        return self._process_prepared(self.prepare(image_path))
+
+    def _process_prepared(self, prepared):
+        self.stats["images"] += 1
+        self.stats["upload_bytes"] += prepared.size
+
         # 프롬프트: 자연스러운 번역지침
         prompt = (
             "이미지 속의 모든 중국어를 찾아서 한국어로 번역해줘. "
             "의역은 오역과 같으니 최대한 원문 그대로 번역하고, "
             "결과는 번역문만 깔끔하게 텍스트로 출력해."
         )
-        
+
         # 3. 클라우드 엔진 가동 (OCR + 번역 통합)
-        response = self.model.generate_content([prompt, img])
-        return response.text
+        return self._generate([self._prompt(prompt), prepared.as_part()])
+
+    def process_batch(self, images):
+        """Translate several page images, packing them into as few requests as the budget allows.
+
+        Returns one text per input image, in input order.
+        """
+        prepared = [(i, self.prepare(image)) for i, image in enumerate(images)]
+        results = [None] * len(prepared)
+        for batch in pack_images(prepared, self.max_batch_images, self.max_batch_bytes,
+                                 self.max_batch_tokens):
+            contents = [self._prompt(OCR_BATCH_PROMPT)]
+            for index, image in batch:
+                contents.append(f"[page {index}]")
+                contents.append(image.as_part())
+            self.stats["images"] += len(batch)
+            self.stats["upload_bytes"] += sum(image.size for _, image in batch)
+
+            pages = {}
+            try:
+                payload = _parse_json(self._generate(contents, json_output=True))
+                for item in payload.get("pages", []):
+                    pages[int(item["page"])] = str(item.get("text", ""))
+            except (ValueError, TypeError, KeyError, AttributeError) as e:
+                logging.warning(f"Gemini 배치 응답 파싱 실패, 페이지별로 재시도: {e}")
+
+            for index, image in batch:
+                if index in pages:
+                    results[index] = pages[index]
+                else:
+                    # 응답에서 빠진 페이지만 단독 요청으로 다시 보낸다.
+                    self.stats["fallbacks"] += 1
+                    results[index] = self._process_prepared(image)
+        return results
 
     def translate_text(self, text):
         """단순 텍스트(대화) 번역"""
-        prompt = f"다음 중국어 문장을 한국어로 번역해: '{text}'"
-        response = self.model.generate_content(prompt)
-        return response.text
+        prompt = self._prompt("다음 중국어 문장을 한국어로 번역해:", f"'{text}'")
+        result = self._generate(prompt)
+        if self.context is not None:
+            self.context.add(text, result)
+        return result
+
+    def translate_batch(self, texts):
+        """Translate many strings with one request per ``max_batch_chars`` of input."""
+        texts = list(texts)
+        unique = list(dict.fromkeys(texts))
+        translated = {}
+        batch, batch_chars = [], 0
+        for text in unique + [None]:
+            if text is not None and (not batch or batch_chars + len(text) <= self.max_batch_chars):
+                batch.append(text)
+                batch_chars += len(text)
+                continue
+            if batch:
+                translated.update(self._translate_chunk(batch))
+            batch, batch_chars = ([text], len(text)) if text is not None else ([], 0)
+        return [translated[text] for text in texts]
+
+    def _translate_chunk(self, batch):
+        prompt = self._prompt(TRANSLATE_BATCH_PROMPT, json.dumps(batch, ensure_ascii=False))
+        try:
+            output = _parse_json(self._generate(prompt, json_output=True))
+            if isinstance(output, list) and len(output) == len(batch):
+                translated = dict(zip(batch, (str(item) for item in output)))
+                if self.context is not None:
+                    for source, target in translated.items():
+                        self.context.add(source, target)
+                return translated
+            logging.warning(f"Gemini 배치 번역 결과 개수 불일치: {len(batch)}개 요청")
+        except (ValueError, TypeError) as e:
+            logging.warning(f"Gemini 배치 번역 응답 파싱 실패: {e}")
+        self.stats["fallbacks"] += len(batch)
+        return {text: self.translate_text(text) for text in batch}
 
 # --- 사용법 (탭 S9 터미널용) ---
 # 1. API 키를 넣으세요
@@ -36,5 +280,11 @@ class GeminiOCRTranslate:
 # 2. 이미지 번역 테스트
 # print(translator.process_all('test_image.jpg'))
 
-# 3. 일반 대화 번역 테스트
+# 3. 여러 페이지를 한 번에 (예산 안에서 요청 수를 줄임)
+# print(translator.process_batch(['page1.jpg', 'page2.jpg', 'page3.jpg']))
+
+# 4. 일반 대화 번역 테스트 (이전 번역을 맥락으로 쓰려면 context 를 넘긴다)
+# from gemini_context import RollingContext
+# translator = GeminiOCRTranslate("여기에_API_KEY_입력", context=RollingContext())
 # print(translator.translate_text("你好，今天天气怎么样？"))
+# print(translator.translate_batch(["你好", "谢谢", "再见"]))
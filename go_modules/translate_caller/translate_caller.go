@@ -1,20 +1,28 @@
 package main
 
 import (
+    "bufio"
     "bytes"
     "encoding/json"
+    "flag"
     "fmt"
+    "io"
     "io/ioutil"
+    "net"
     "net/http"
     "os"
+    "sync"
     "time"
 )
 
-// 요청 입력 구조
+// 요청 입력 구조 (texts 가 있으면 한 번의 API 호출로 일괄 번역)
+// 데몬 모드에서는 id 를 그대로 응답에 돌려주어 동시 요청을 구분한다.
 type TranslateRequest struct {
-    Text        string `json:"text"`
-    SourceLang  string `json:"source_lang"`
-    TargetLang  string `json:"target_lang"`
+    ID          string   `json:"id,omitempty"`
+    Text        string   `json:"text"`
+    Texts       []string `json:"texts,omitempty"`
+    SourceLang  string   `json:"source_lang"`
+    TargetLang  string   `json:"target_lang"`
 }
 
 // Google API 요청 구조
@@ -27,7 +35,11 @@ type GoogleTranslatePayload struct {
 
 // 출력 구조
 type TranslateResponse struct {
-    TranslatedText string `json:"translated_text"`
+    ID              string   `json:"id,omitempty"`
+    // 빈 번역도 유효한 결과이므로 omitempty 를 쓰지 않는다.
+    TranslatedText  string   `json:"translated_text"`
+    TranslatedTexts []string `json:"translated_texts"`
+    Error           string   `json:"error,omitempty"`
 }
 
 // Google API 응답 구조
@@ -37,7 +49,41 @@ type GoogleResponse struct {
     } `json:"translations"`
 }
 
+// 모든 요청이 공유하는 HTTP 클라이언트: keep-alive 연결을 재사용한다.
+var httpClient = &http.Client{
+    Timeout: 10 * time.Second,
+    Transport: &http.Transport{
+        Proxy:               http.ProxyFromEnvironment,
+        MaxIdleConns:        64,
+        MaxIdleConnsPerHost: 32,
+        IdleConnTimeout:     90 * time.Second,
+    },
+}
+
+var endpointOverride string
+
 func main() {
+    serve := flag.Bool("serve", false, "run as a daemon reading newline-delimited JSON requests from stdin")
+    socketPath := flag.String("socket", "", "run as a daemon listening on this Unix socket")
+    maxConcurrency := flag.Int("max-concurrency", 16, "maximum number of API calls in flight (daemon mode)")
+    flag.StringVar(&endpointOverride, "endpoint", os.Getenv("TRANSLATE_ENDPOINT"), "translation API URL (default: Google Cloud Translation v3)")
+    flag.Parse()
+
+    switch {
+    case *socketPath != "":
+        if err := serveSocket(*socketPath, *maxConcurrency); err != nil {
+            fmt.Fprintf(os.Stderr, "Socket error: %v\n", err)
+            os.Exit(1)
+        }
+    case *serve:
+        serveConn(os.Stdin, os.Stdout, *maxConcurrency)
+    default:
+        runOnce()
+    }
+}
+
+// 단발 실행: 요청 하나를 읽고 응답 하나를 쓴 뒤 종료한다.
+func runOnce() {
     var req TranslateRequest
     decoder := json.NewDecoder(os.Stdin)
     err := decoder.Decode(&req)
@@ -46,27 +92,125 @@ func main() {
         os.Exit(1)
     }
 
-    translated, err := callGoogleTranslate(req.Text, req.SourceLang, req.TargetLang)
+    res, err := handleRequest(req)
     if err != nil {
         fmt.Fprintf(os.Stderr, "API Error: %v\n", err)
         os.Exit(1)
     }
 
-    res := TranslateResponse{TranslatedText: translated}
     resJSON, _ := json.Marshal(res)
     fmt.Println(string(resJSON))
 }
 
-func callGoogleTranslate(text, sourceLang, targetLang string) (string, error) {
+func handleRequest(req TranslateRequest) (TranslateResponse, error) {
+    contents := req.Texts
+    if len(contents) == 0 {
+        contents = []string{req.Text}
+    }
+
+    res := TranslateResponse{ID: req.ID}
+    translated, err := callGoogleTranslate(contents, req.SourceLang, req.TargetLang)
+    if err != nil {
+        return res, err
+    }
+
+    if len(req.Texts) > 0 {
+        res.TranslatedTexts = translated
+    } else {
+        res.TranslatedText = translated[0]
+    }
+    return res, nil
+}
+
+// 데몬 모드: 한 줄에 요청 하나씩 읽어 고루틴으로 처리하고, 끝나는 순서대로 응답을 쓴다.
+func serveConn(r io.Reader, w io.Writer, maxConcurrency int) {
+    scanner := bufio.NewScanner(r)
+    scanner.Buffer(make([]byte, 0, 64*1024), 16*1024*1024)
+
+    var writeMu sync.Mutex
+    encoder := json.NewEncoder(w)
+    write := func(res TranslateResponse) {
+        writeMu.Lock()
+        defer writeMu.Unlock()
+        if err := encoder.Encode(res); err != nil {
+            fmt.Fprintf(os.Stderr, "Write error: %v\n", err)
+        }
+    }
+
+    slots := make(chan struct{}, maxConcurrency)
+    var wg sync.WaitGroup
+    for scanner.Scan() {
+        line := bytes.TrimSpace(scanner.Bytes())
+        if len(line) == 0 {
+            continue
+        }
+        var req TranslateRequest
+        if err := json.Unmarshal(line, &req); err != nil {
+            // 필드 형식만 틀린 요청은 id 를 되살려 호출자가 응답을 기다리지 않게 한다.
+            var probe struct {
+                ID string `json:"id"`
+            }
+            _ = json.Unmarshal(line, &probe)
+            write(TranslateResponse{ID: probe.ID, Error: fmt.Sprintf("Invalid input: %v", err)})
+            continue
+        }
+
+        slots <- struct{}{}
+        wg.Add(1)
+        go func(req TranslateRequest) {
+            defer wg.Done()
+            defer func() { <-slots }()
+            res, err := handleRequest(req)
+            if err != nil {
+                res = TranslateResponse{ID: req.ID, Error: err.Error()}
+            }
+            write(res)
+        }(req)
+    }
+    wg.Wait()
+    if err := scanner.Err(); err != nil {
+        fmt.Fprintf(os.Stderr, "Read error: %v\n", err)
+    }
+}
+
+func serveSocket(path string, maxConcurrency int) error {
+    os.Remove(path)
+    listener, err := net.Listen("unix", path)
+    if err != nil {
+        return err
+    }
+    defer listener.Close()
+    for {
+        conn, err := listener.Accept()
+        if err != nil {
+            return err
+        }
+        go func(conn net.Conn) {
+            defer conn.Close()
+            serveConn(conn, conn, maxConcurrency)
+        }(conn)
+    }
+}
+
+func translateEndpoint() (string, error) {
+    if endpointOverride != "" {
+        return endpointOverride, nil
+    }
     projectID := os.Getenv("GOOGLE_PROJECT_ID")
     if projectID == "" {
         return "", fmt.Errorf("GOOGLE_PROJECT_ID not set")
     }
+    return fmt.Sprintf("https://translation.googleapis.com/v3/projects/%s/locations/global:translateText", projectID), nil
+}
 
-    url := fmt.Sprintf("https://translation.googleapis.com/v3/projects/%s/locations/global:translateText", projectID)
+func callGoogleTranslate(contents []string, sourceLang, targetLang string) ([]string, error) {
+    url, err := translateEndpoint()
+    if err != nil {
+        return nil, err
+    }
 
     payload := GoogleTranslatePayload{
-        Contents:           []string{text},
+        Contents:           contents,
         SourceLanguageCode: sourceLang,
         TargetLanguageCode: targetLang,
         MimeType:           "text/plain",
@@ -75,22 +219,29 @@ func callGoogleTranslate(text, sourceLang, targetLang string) (string, error) {
     body, _ := json.Marshal(payload)
     req, _ := http.NewRequest("POST", url, bytes.NewBuffer(body))
     req.Header.Set("Content-Type", "application/json")
-    client := &http.Client{Timeout: 10 * time.Second}
-    resp, err := client.Do(req)
+    resp, err := httpClient.Do(req)
     if err != nil {
-        return "", err
+        return nil, err
     }
     defer resp.Body.Close()
 
     respBody, _ := ioutil.ReadAll(resp.Body)
     if resp.StatusCode != 200 {
-        return "", fmt.Errorf("Google API error: %s", respBody)
+        // 상태 코드를 남겨 파이썬 쪽 스케줄러가 429/5xx 를 재시도할 수 있게 한다.
+        return nil, fmt.Errorf("Google API error (HTTP %d): %s", resp.StatusCode, respBody)
     }
 
     var parsed GoogleResponse
     if err := json.Unmarshal(respBody, &parsed); err != nil {
-        return "", err
+        return nil, err
+    }
+    if len(parsed.Translations) != len(contents) {
+        return nil, fmt.Errorf("expected %d translations, got %d", len(contents), len(parsed.Translations))
     }
 
-    return parsed.Translations[0].TranslatedText, nil
-}
\ No newline at end of file
+    translated := make([]string, len(parsed.Translations))
+    for i, t := range parsed.Translations {
+        translated[i] = t.TranslatedText
+    }
+    return translated, nil
+}
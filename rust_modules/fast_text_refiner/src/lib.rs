@@ -1,23 +1,37 @@
 use pyo3::prelude::*;
-use regex::Regex;
 
-/// Python에서 사용할 함수: refine_text
+mod text;
+
+/// Python에서 사용할 함수: refine_text (줄바꿈/중복 공백 제거, 양 끝 공백 제거)
 #[pyfunction]
 fn refine_text(text: &str) -> PyResult<String> {
-    // 1. 줄바꿈 제거
-    let cleaned = text.replace("\n", " ");
+    Ok(text::collapse_whitespace(text))
+}
 
-    // 2. 중복 공백 제거
-    let re_space = Regex::new(r"\s+").unwrap();
-    let cleaned = re_space.replace_all(&cleaned, " ");
+/// core.utils_text.normalize_text 와 같은 결과
+#[pyfunction]
+fn normalize_text(text: &str) -> PyResult<String> {
+    Ok(text::normalize(text))
+}
 
-    // 3. 양 끝 공백 제거
-    Ok(cleaned.trim().to_string())
+/// 여러 텍스트를 한 번의 호출로 정규화한다 (처리 중에는 GIL 을 놓는다).
+#[pyfunction]
+fn refine_many(py: Python<'_>, texts: Vec<String>) -> PyResult<Vec<String>> {
+    Ok(py.allow_threads(|| texts.iter().map(|t| text::normalize(t)).collect()))
+}
+
+/// 여러 텍스트를 한 번의 호출로 정규화하고 문장으로 나눈다.
+#[pyfunction]
+fn segment_many(py: Python<'_>, texts: Vec<String>) -> PyResult<Vec<Vec<String>>> {
+    Ok(py.allow_threads(|| texts.iter().map(|t| text::split_sentences(t)).collect()))
 }
 
 /// 모듈 정의
 #[pymodule]
 fn fast_text_refiner(_py: Python, m: &PyModule) -> PyResult<()> {
     m.add_function(wrap_pyfunction!(refine_text, m)?)?;
+    m.add_function(wrap_pyfunction!(normalize_text, m)?)?;
+    m.add_function(wrap_pyfunction!(refine_many, m)?)?;
+    m.add_function(wrap_pyfunction!(segment_many, m)?)?;
     Ok(())
-}
\ No newline at end of file
+}
@@ -0,0 +1,220 @@
+//! core/utils_text.py 의 normalize_text / split_into_sentences 와 글자 단위로 같은 결과를 내는 구현.
+//! 정규식 없이 한 번씩 훑으므로 호출마다 패턴을 컴파일하지 않는다.
+
+const ABBREVIATIONS: &[&str] = &[
+    "al", "approx", "cf", "co", "dept", "dr", "e.g", "etc", "fig", "i.e", "inc", "jr", "ltd", "mr",
+    "mrs", "ms", "no", "p", "pp", "prof", "sr", "st", "vol", "vs",
+];
+
+/// Python 의 str.isspace() 와 같은 집합
+pub fn is_space(c: char) -> bool {
+    matches!(
+        c,
+        '\t' | '\n' | '\u{0b}' | '\u{0c}' | '\r' | '\u{1c}'..='\u{1f}' | ' ' | '\u{85}' | '\u{a0}'
+            | '\u{1680}' | '\u{2000}'..='\u{200a}' | '\u{2028}' | '\u{2029}' | '\u{202f}'
+            | '\u{205f}' | '\u{3000}'
+    )
+}
+
+/// 줄바꿈을 공백 없이 이어 붙이는 한중일 문자 (한글 제외)
+pub fn is_cjk(c: char) -> bool {
+    matches!(
+        c,
+        '\u{2e80}'..='\u{2fff}' | '\u{3001}'..='\u{303f}' | '\u{3040}'..='\u{30ff}'
+            | '\u{3100}'..='\u{312f}' | '\u{31a0}'..='\u{31ff}' | '\u{3400}'..='\u{4dbf}'
+            | '\u{4e00}'..='\u{9fff}' | '\u{f900}'..='\u{faff}' | '\u{ff01}'..='\u{ff9f}'
+    )
+}
+
+fn is_cjk_stop(c: char) -> bool {
+    matches!(c, '\u{3002}' | '\u{ff01}' | '\u{ff1f}')
+}
+
+fn is_terminator(c: char) -> bool {
+    matches!(c, '.' | '!' | '?' | '\u{3002}' | '\u{ff01}' | '\u{ff1f}' | '\u{2026}')
+}
+
+fn is_closer(c: char) -> bool {
+    matches!(
+        c,
+        '"' | '\'' | ')' | ']' | '}' | '\u{201d}' | '\u{2019}' | '\u{300d}' | '\u{300f}'
+            | '\u{ff09}' | '\u{3011}' | '\u{3015}' | '\u{300b}' | '\u{3009}'
+    )
+}
+
+fn is_blank(c: char) -> bool {
+    c == ' ' || c == '\t'
+}
+
+fn unify_line_endings(chars: &[char]) -> Vec<char> {
+    let mut out = Vec::with_capacity(chars.len());
+    let mut i = 0;
+    while i < chars.len() {
+        if chars[i] == '\r' {
+            out.push('\n');
+            i += if chars.get(i + 1) == Some(&'\n') { 2 } else { 1 };
+        } else {
+            out.push(chars[i]);
+            i += 1;
+        }
+    }
+    out
+}
+
+fn repair_hyphenation(chars: &[char]) -> Vec<char> {
+    let n = chars.len();
+    let mut out = Vec::with_capacity(n);
+    let mut i = 0;
+    while i < n {
+        if chars[i] == '-' && i > 0 && chars[i - 1].is_ascii_alphabetic() {
+            let mut j = i + 1;
+            while j < n && is_blank(chars[j]) {
+                j += 1;
+            }
+            if j < n && chars[j] == '\n' {
+                j += 1;
+                while j < n && is_blank(chars[j]) {
+                    j += 1;
+                }
+                if j < n && chars[j].is_ascii_lowercase() {
+                    i = j;
+                    continue;
+                }
+            }
+        }
+        out.push(chars[i]);
+        i += 1;
+    }
+    out
+}
+
+fn join_cjk_lines(chars: &[char]) -> Vec<char> {
+    let n = chars.len();
+    let mut out = Vec::with_capacity(n);
+    let mut i = 0;
+    while i < n {
+        if !is_space(chars[i]) {
+            out.push(chars[i]);
+            i += 1;
+            continue;
+        }
+        let mut j = i;
+        while j < n && is_space(chars[j]) {
+            j += 1;
+        }
+        if !(i > 0 && is_cjk(chars[i - 1]) && j < n && is_cjk(chars[j])) {
+            out.extend_from_slice(&chars[i..j]);
+        }
+        i = j;
+    }
+    out
+}
+
+fn collapse_chars(chars: &[char]) -> Vec<char> {
+    let mut out: Vec<char> = Vec::with_capacity(chars.len());
+    for &c in chars {
+        if is_space(c) {
+            if out.last() != Some(&' ') {
+                out.push(' ');
+            }
+        } else {
+            out.push(c);
+        }
+    }
+    let start = out.iter().position(|&c| c != ' ').unwrap_or(out.len());
+    let end = out.iter().rposition(|&c| c != ' ').map_or(start, |p| p + 1);
+    out[start..end].to_vec()
+}
+
+/// 공백 연속을 한 칸으로 줄이고 양 끝을 자른다.
+pub fn collapse_whitespace(text: &str) -> String {
+    let chars: Vec<char> = text.chars().collect();
+    collapse_chars(&chars).into_iter().collect()
+}
+
+fn normalize_chars(text: &str) -> Vec<char> {
+    let chars: Vec<char> = text.chars().collect();
+    let chars = unify_line_endings(&chars);
+    let chars = repair_hyphenation(&chars);
+    let chars = join_cjk_lines(&chars);
+    collapse_chars(&chars)
+}
+
+/// 줄바꿈, 줄 끝 하이픈, 한중일 줄 이음, 공백 연속을 정리한다.
+pub fn normalize(text: &str) -> String {
+    normalize_chars(text).into_iter().collect()
+}
+
+fn is_boundary(chars: &[char], start: usize, run_end: usize, end: usize, sentence_start: usize) -> bool {
+    let run = &chars[start..run_end];
+    if run.iter().any(|&c| is_cjk_stop(c)) || (start > sentence_start && is_cjk(chars[start - 1])) {
+        return true;
+    }
+    if end >= chars.len() {
+        return true;
+    }
+    if chars[end] != ' ' {
+        return false;
+    }
+    if chars.get(end + 1).map_or(false, |c| c.is_ascii_lowercase()) {
+        return false;
+    }
+    if run == ['.'] {
+        let mut word_start = start;
+        while word_start > sentence_start
+            && (chars[word_start - 1].is_ascii_alphabetic() || chars[word_start - 1] == '.')
+        {
+            word_start -= 1;
+        }
+        let word = &chars[word_start..start];
+        let lower: String = word.iter().map(|c| c.to_ascii_lowercase()).collect();
+        if ABBREVIATIONS.contains(&lower.as_str()) || (word.len() == 1 && word[0].is_ascii_uppercase()) {
+            return false;
+        }
+    }
+    true
+}
+
+fn push_trimmed(chars: &[char], mut start: usize, mut end: usize, out: &mut Vec<String>) {
+    while start < end && chars[start] == ' ' {
+        start += 1;
+    }
+    while end > start && chars[end - 1] == ' ' {
+        end -= 1;
+    }
+    if start < end {
+        out.push(chars[start..end].iter().collect());
+    }
+}
+
+fn segment_chars(chars: &[char]) -> Vec<String> {
+    let n = chars.len();
+    let mut sentences = Vec::new();
+    let mut position = 0;
+    let mut i = 0;
+    while i < n {
+        if !is_terminator(chars[i]) {
+            i += 1;
+            continue;
+        }
+        let start = i;
+        while i < n && is_terminator(chars[i]) {
+            i += 1;
+        }
+        let run_end = i;
+        while i < n && is_closer(chars[i]) {
+            i += 1;
+        }
+        if is_boundary(chars, start, run_end, i, position) {
+            push_trimmed(chars, position, i, &mut sentences);
+            position = i;
+        }
+    }
+    push_trimmed(chars, position, n, &mut sentences);
+    sentences
+}
+
+/// 텍스트를 정규화한 뒤 문장으로 나눈다.
+pub fn split_sentences(text: &str) -> Vec<String> {
+    segment_chars(&normalize_chars(text))
+}
@@ -5,4 +5,5 @@ export PYTHONPATH=$(pwd)
 export GOOGLE_PROJECT_ID="your_project_id"
 export GOOGLE_APPLICATION_CREDENTIALS="/path/to/your_service_account.json"
 
-python3 core/refined_translate_pipeline.py --input test_data/input.txt --output result.txt
\ No newline at end of file
+# 파일/디렉터리/글롭을 받아 페이지별 결과를 JSONL 로 스트리밍 (요약은 stderr)
+python3 -m core.batch_cli "${@:-test_data}" --jobs 2 --output result.jsonl
\ No newline at end of file
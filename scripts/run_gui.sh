@@ -5,5 +5,9 @@ export PYTHONPATH=$(pwd)
 export GOOGLE_PROJECT_ID="your_project_id"
 export GOOGLE_APPLICATION_CREDENTIALS="/path/to/your_service_account.json"
 
+# Go 번역 데몬을 한 번 빌드해 두고 GUI 가 재사용하게 한다 (매번 go run 으로 컴파일하지 않음)
+(cd go_modules/translate_caller && go build -o translate_caller translate_caller.go) \
+    && export TRANSLATE_CALLER_BIN="$(pwd)/go_modules/translate_caller/translate_caller"
+
 cd ui
 python3 main_window.py
\ No newline at end of file
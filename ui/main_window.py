@@ -1,5 +1,9 @@
 from PySide6.QtWidgets import QApplication, QWidget, QPushButton, QTextEdit, QVBoxLayout, QLabel
-import subprocess, json
+
+from core.rate_limiter import (
+    INTERACTIVE, INTERACTIVE_TIMEOUT, TRANSLATOR_BACKEND, get_scheduler, priority_lane,
+)
+from core.translate_caller_client import TranslateCallerClient
 
 # Rust 모듈 import
 try:
@@ -35,6 +39,18 @@ class MainWindow(QWidget):
 
         self.translate_btn.clicked.connect(self.on_translate)
 
+        # 연결을 창 수명 동안 유지해 번역마다 DB 를 다시 열지 않는다.
+        self.cache_writer = None
+        if cache_writer:
+            try:
+                self.cache_writer = cache_writer.CacheWriter("translation_cache.db")
+            except (AttributeError, RuntimeError):
+                self.cache_writer = None
+
+        # Go 번역 데몬은 첫 호출 때 한 번 띄우고 창이 닫힐 때까지 재사용한다.
+        # 문서 일괄 번역과 같은 번역 API 한도를 쓰므로 같은 스케줄러에서 우선순위를 다툰다.
+        self.translate_client = TranslateCallerClient(scheduler=get_scheduler(TRANSLATOR_BACKEND))
+
     def on_translate(self):
         text = self.input_text.toPlainText().strip()
         if not text:
@@ -48,30 +64,26 @@ class MainWindow(QWidget):
         translated = self.call_translate_go(refined)
 
         # 3. C++ 캐시에 저장
-        if cache_writer:
+        if self.cache_writer:
+            self.cache_writer.insert_batch([(refined, translated, "ko_zh")])
+        elif cache_writer:
             cache_writer.insert_translation("translation_cache.db", refined, translated, "ko_zh")
 
         # 4. 결과 출력
         self.output_text.setPlainText(translated)
         self.status_label.setText("Translated and cached.")
 
+    def closeEvent(self, event):
+        if self.cache_writer:
+            self.cache_writer.close()
+        self.translate_client.close()
+        super().closeEvent(event)
+
     def call_translate_go(self, text):
-        req = {
-            "text": text,
-            "source_lang": "ko",
-            "target_lang": "zh"
-        }
         try:
-            proc = subprocess.Popen(
-                ["go", "run", "translate_caller.go"],
-                cwd="../go_modules/translate_caller",
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            out, err = proc.communicate(input=json.dumps(req), timeout=10)
-            return json.loads(out)["translated_text"]
+            # 화면에서 기다리는 요청이므로 진행 중인 일괄 번역보다 먼저 보낸다.
+            with priority_lane(INTERACTIVE, timeout=INTERACTIVE_TIMEOUT):
+                return self.translate_client.translate(text, "ko", "zh")
         except Exception as e:
             return f"[Error] {str(e)}"
 